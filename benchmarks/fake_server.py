@@ -0,0 +1,253 @@
+"""
+Локальная замена Mojang, Fabric/Quilt meta, Forge и Modrinth для бенчмарков.
+
+Все данные синтетические и детерминированные (зависят только от seed и размеров набора).
+Сервер отдает их по префиксам вида /<alias>/..., а лаунчер попадает сюда через
+правила зеркал (configure_mirrors(..., exclusive=True)), поэтому в коде лаунчера остаются
+настоящие URL. Задержка, ограничение скорости и доля отказов задаются при запуске.
+"""
+import io
+import re
+import json
+import time
+import random
+import hashlib
+import zipfile
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+MC_VERSION = "1.20.1"
+ASSET_INDEX_ID = "5"
+FABRIC_LOADER = "0.15.11"
+QUILT_LOADER = "0.26.0"
+FORGE_VERSION = "47.3.0"
+NEOFORGE_VERSION = "20.1.200"
+
+# Оригинальный префикс -> псевдоним на локальном сервере
+ORIGINS = {
+    "https://piston-meta.mojang.com/": "piston-meta",
+    "https://piston-data.mojang.com/": "piston-data",
+    "https://libraries.minecraft.net/": "libraries",
+    "https://resources.download.minecraft.net/": "resources",
+    "https://meta.fabricmc.net/": "fabric-meta",
+    "https://meta.quiltmc.org/": "quilt-meta",
+    "https://files.minecraftforge.net/": "forge-files",
+    "https://maven.minecraftforge.net/": "forge-maven",
+    "https://maven.neoforged.net/": "neoforge-maven",
+    "https://api.modrinth.com/": "modrinth-api",
+    "https://cdn.modrinth.com/": "modrinth-cdn",
+}
+
+def mirror_rules(base_url):
+    """Правила для configure_mirrors: каждый оригинальный хост ведет на свой префикс локального сервера."""
+    return {origin: f"{base_url}/{alias}/" for origin, alias in ORIGINS.items()}
+
+def _local_path(url):
+    for origin, alias in ORIGINS.items():
+        if url.startswith(origin): return f"/{alias}/{url[len(origin):]}"
+    raise ValueError(url)
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+class Dataset:
+    """Синтетический набор: версия с библиотеками и ассетами, метаданные загрузчиков, mrpack и каталог Modrinth."""
+
+    def __init__(self, assets=3000, libraries=60, mods=200, client_mb=16, search_hits=400, seed=1):
+        self.rng = random.Random(seed)
+        self.files = {}
+        self.sizes = {"assets": assets, "libraries": libraries, "mods": mods, "client_mb": client_mb, "search_hits": search_hits}
+        self._build_version(assets, libraries, client_mb)
+        self._build_loaders()
+        self._build_modrinth(mods, search_hits)
+
+    def _blob(self, low, high):
+        return self.rng.randbytes(self.rng.randint(low, high))
+
+    def add(self, url, data, content_type="application/octet-stream"):
+        if isinstance(data, (dict, list)):
+            data, content_type = json.dumps(data).encode(), "application/json"
+        self.files[_local_path(url)] = (data, content_type)
+        return {"url": url, "sha1": _sha1(data), "size": len(data)}
+
+    def _build_version(self, assets, libraries, client_mb):
+        objects = {}
+        for i in range(assets):
+            data = self._blob(512, 16 * 1024)
+            digest = _sha1(data)
+            objects[f"minecraft/bench/asset_{i}.bin"] = {"hash": digest, "size": len(data)}
+            self.add(f"https://resources.download.minecraft.net/{digest[:2]}/{digest}", data)
+        index = self.add(f"https://piston-meta.mojang.com/v1/packages/index/{ASSET_INDEX_ID}.json", {"objects": objects})
+
+        libs = []
+        for i in range(libraries):
+            path = f"bench/lib{i}/1.0/lib{i}-1.0.jar"
+            artifact = self.add(f"https://libraries.minecraft.net/{path}", self._blob(20 * 1024, 600 * 1024))
+            libs.append({"name": f"bench:lib{i}:1.0", "downloads": {"artifact": dict(artifact, path=path)}})
+        client = self.add(f"https://piston-data.mojang.com/v1/objects/client/{MC_VERSION}.jar", self.rng.randbytes(client_mb * 1024 * 1024))
+
+        version = {
+            "id": MC_VERSION, "type": "release", "mainClass": "net.minecraft.client.main.Main",
+            "assetIndex": dict(index, id=ASSET_INDEX_ID, totalSize=sum(o["size"] for o in objects.values())),
+            "assets": ASSET_INDEX_ID, "downloads": {"client": client}, "libraries": libs,
+            "javaVersion": {"component": "java-runtime-gamma", "majorVersion": 17},
+        }
+        entry = self.add(f"https://piston-meta.mojang.com/v1/packages/version/{MC_VERSION}.json", version)
+        self.version_entry = entry
+        self.add("https://piston-meta.mojang.com/mc/game/version_manifest_v2.json", {
+            "latest": {"release": MC_VERSION, "snapshot": MC_VERSION},
+            "versions": [{"id": MC_VERSION, "type": "release", "url": entry["url"], "sha1": entry["sha1"], "releaseTime": "2023-06-12T13:25:51+00:00"}],
+        })
+
+    def _build_loaders(self):
+        games = [{"version": v, "stable": True} for v in (MC_VERSION, "1.20", "1.19.4")]
+        self.add("https://meta.fabricmc.net/v2/versions/game", games)
+        self.add("https://meta.fabricmc.net/v2/versions/loader", [{"version": v, "stable": i > 0} for i, v in enumerate(["0.16.0-beta.1", FABRIC_LOADER, "0.15.10", "0.15.9"])])
+        self.add("https://meta.quiltmc.org/v3/versions/game", games)
+        self.add("https://meta.quiltmc.org/v3/versions/loader", [{"version": v} for v in ["0.27.0-beta.1", QUILT_LOADER, "0.25.0"]])
+        self.add("https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json", {"promos": {f"{MC_VERSION}-recommended": FORGE_VERSION, f"{MC_VERSION}-latest": FORGE_VERSION}})
+        forge = "".join(f"<version>{MC_VERSION}-47.{i}.0</version>" for i in range(4)) + "".join(f"<version>1.19.4-45.{i}.0</version>" for i in range(200))
+        self.add("https://maven.minecraftforge.net/net/minecraftforge/forge/maven-metadata.xml", f"<metadata><versioning><versions>{forge}</versions></versioning></metadata>".encode(), "application/xml")
+        neo = "".join(f"<version>20.1.{i}</version>" for i in range(201)) + "".join(f"<version>20.4.{i}-beta</version>" for i in range(200))
+        self.add("https://maven.neoforged.net/releases/net/neoforged/neoforge/maven-metadata.xml", f"<metadata><versioning><versions>{neo}</versions></versioning></metadata>".encode(), "application/xml")
+
+    def _build_modrinth(self, mods, search_hits):
+        files = []
+        for i in range(mods):
+            data = self._blob(16 * 1024, 400 * 1024)
+            url = f"https://cdn.modrinth.com/data/bench{i:04d}/versions/1.0/mod{i}.jar"
+            self.add(url, data)
+            files.append({"path": f"mods/mod{i}.jar", "hashes": {"sha1": _sha1(data), "sha512": hashlib.sha512(data).hexdigest()}, "env": {"client": "required", "server": "required"}, "downloads": [url], "fileSize": len(data)})
+        index = {"formatVersion": 1, "game": "minecraft", "versionId": "1.0", "name": "Bench Pack", "files": files, "dependencies": {"minecraft": MC_VERSION, "fabric-loader": FABRIC_LOADER}}
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("modrinth.index.json", json.dumps(index))
+            for i in range(100):
+                z.writestr(f"overrides/config/bench{i}.json", json.dumps({"option": i, "values": list(range(50))}))
+            z.writestr("overrides/options.txt", "renderDistance:12\n")
+        self.mrpack = self.add("https://cdn.modrinth.com/data/benchpack/versions/1.0/bench.mrpack", buffer.getvalue())
+
+        self.hits = []
+        for i in range(search_hits):
+            icon = self.add(f"https://cdn.modrinth.com/data/hit{i:04d}/icon.png", self._blob(1024, 4096), "image/png")
+            self.hits.append({"project_id": f"hit{i:04d}", "slug": f"bench-mod-{i}", "title": f"Bench Mod {i}", "description": "Synthetic search hit", "project_type": "mod", "downloads": 1000000 - i, "icon_url": icon["url"], "categories": ["fabric"], "versions": [MC_VERSION]})
+
+    def search(self, query):
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["20"])[0])
+        return {"hits": self.hits[offset:offset + limit], "offset": offset, "limit": limit, "total_hits": len(self.hits)}
+
+class BenchServer:
+    """
+    HTTP-сервер над Dataset. latency_ms - задержка перед каждым ответом, bandwidth_kbps - скорость
+    отдачи одного соединения (0 - без ограничения), failure_rate - доля запросов, которые получают 503
+    или обрываются на середине тела. Поддерживает Range, HEAD и keep-alive.
+    """
+
+    def __init__(self, dataset, latency_ms=0, bandwidth_kbps=0, failure_rate=0.0, seed=1):
+        self.dataset = dataset
+        self.latency = latency_ms / 1000
+        self.bandwidth = bandwidth_kbps * 1024
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes": 0, "failures": 0}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело уходят отдельными write; без TCP_NODELAY каждый ответ ждал бы delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args): pass
+
+            def do_HEAD(self): server._handle(self, head=True)
+            def do_GET(self): server._handle(self)
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                server._handle(self, body=self.rfile.read(length))
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="bench-server", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def snapshot(self):
+        with self.lock: return dict(self.stats)
+
+    def _count(self, key, value=1):
+        with self.lock: self.stats[key] += value
+
+    def _resolve(self, method, path, query, body):
+        if path == "/__stats":
+            return json.dumps(self.snapshot()).encode(), "application/json"
+        if path == "/modrinth-api/v2/search":
+            return json.dumps(self.dataset.search(query)).encode(), "application/json"
+        if method == "POST" and path in ("/modrinth-api/v2/version_files", "/modrinth-api/v2/version_files/update"):
+            return b"{}", "application/json"
+        return self.dataset.files.get(path)
+
+    def _handle(self, handler, head=False, body=None):
+        self._count("requests")
+        if self.latency: time.sleep(self.latency)
+        split = urlsplit(handler.path)
+        found = self._resolve(handler.command, split.path, parse_qs(split.query), body)
+        with self.lock: fail = self.failure_rate and split.path != "/__stats" and self.rng.random() < self.failure_rate
+        if found is None or (fail and self.rng.random() < 0.5):
+            if fail: self._count("failures")
+            handler.send_response(404 if found is None else 503)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        data, content_type = found
+        start, end, status = 0, len(data) - 1, 200
+        match = re.match(r"bytes=(\d+)-(\d*)", handler.headers.get("Range", ""))
+        if_range = handler.headers.get("If-Range")
+        if match and (not if_range or if_range == f'"{_sha1(data)}"'):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            if start > end:
+                handler.send_response(416)
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return
+            status = 206
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(end - start + 1))
+        handler.send_header("Accept-Ranges", "bytes")
+        handler.send_header("ETag", f'"{_sha1(data)}"')
+        if status == 206: handler.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        handler.end_headers()
+        if head: return
+        self._send(handler, data[start:end + 1], cut=fail)
+
+    def _send(self, handler, payload, cut=False):
+        """Отдает тело блоками с учетом ограничения скорости; при cut соединение рвется на середине."""
+        limit = len(payload) // 2 if cut else len(payload)
+        block = 64 * 1024
+        sent = 0
+        started = time.monotonic()
+        try:
+            while sent < limit:
+                chunk = payload[sent:min(sent + block, limit)]
+                handler.wfile.write(chunk)
+                sent += len(chunk)
+                if self.bandwidth:
+                    ahead = sent / self.bandwidth - (time.monotonic() - started)
+                    if ahead > 0: time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self._count("bytes", sent)
+        if cut:
+            self._count("failures")
+            handler.close_connection = True
@@ -0,0 +1,142 @@
+"""
+Офлайн-бенчмарк горячих путей лаунчера.
+
+    python benchmarks/run.py                          # все сценарии
+    python benchmarks/run.py -s cold_vanilla -s mrpack_import --latency-ms 40 --bandwidth-kbps 20000
+    python benchmarks/run.py --failure-rate 0.05 --repeat 3
+
+Поднимает локальный сервер (fake_server.py), направляет на него все хосты через правила
+зеркал и запускает каждый сценарий в отдельном процессе с пустым каталогом данных.
+Результаты (время, трафик, пропускная способность, пиковый RSS) печатаются и дописываются
+в bench_output.txt в корне репозитория вместе с коммитом и параметрами.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+OUTPUT_PATH = os.path.join(REPO_DIR, "bench_output.txt")
+
+def peak_rss_mb():
+    # VmHWM относится к самому процессу, а ru_maxrss в Linux наследует пик родителя через fork
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"): return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдает килобайты, macOS - байты
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+def run_child(args):
+    """Процесс одного сценария: каталог данных задается до импорта модулей лаунчера."""
+    os.environ["FOLIA_DATA_DIR"] = os.path.join(args.workdir, "data")
+    sys.path.insert(0, REPO_DIR)
+    from fake_server import mirror_rules
+    from scenarios import SCENARIOS, Context, dump
+    from src.backend.utils import configure_mirrors, configure_downloads
+    configure_mirrors(mirror_rules(args.base_url), exclusive=True)
+    if args.workers: configure_downloads(args.workers)
+
+    ctx = Context(args.workdir, args.base_url)
+    SCENARIOS[args.child](ctx)
+    result = json.loads(dump(ctx))
+    result["peak_rss_mb"] = peak_rss_mb()
+    print("BENCH_RESULT " + json.dumps(result))
+
+def git_revision():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "") if rev else "unknown"
+    except OSError:
+        return "unknown"
+
+def run_scenario(name, base_url, args):
+    workdir = tempfile.mkdtemp(prefix=f"folia-bench-{name}-")
+    try:
+        command = [sys.executable, os.path.abspath(__file__), "--child", name, "--workdir", workdir, "--base-url", base_url]
+        if args.workers: command += ["--workers", str(args.workers)]
+        proc = subprocess.run(command, cwd=BENCH_DIR, capture_output=True, text=True, encoding="utf-8", errors="replace")
+        line = next((l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")), None)
+        if proc.returncode != 0 or not line:
+            tail = "\n".join((proc.stdout + proc.stderr).splitlines()[-20:])
+            raise RuntimeError(f"сценарий {name} завершился с кодом {proc.returncode}:\n{tail}")
+        return json.loads(line[len("BENCH_RESULT "):])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def format_row(name, r):
+    mb = r["bytes"] / (1024 * 1024)
+    throughput = mb / r["wall"] if r["wall"] > 0 else 0
+    rss = f"{r['peak_rss_mb']:.1f}" if r.get("peak_rss_mb") is not None else "n/a"
+    return f"{name:<24} {r['wall']:>9.3f} {mb:>9.2f} {throughput:>9.2f} {r['requests']:>8} {rss:>9}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк FoliaLauncher")
+    parser.add_argument("-s", "--scenario", action="append", help="сценарий (можно несколько раз); по умолчанию все")
+    parser.add_argument("--repeat", type=int, default=1, help="повторов каждого сценария (в отчет идет медиана по времени)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="задержка сервера перед каждым ответом")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0, help="скорость одного соединения, КБ/с (0 - без ограничения)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="доля запросов с 503 или оборванным телом")
+    parser.add_argument("--assets", type=int, default=3000)
+    parser.add_argument("--libraries", type=int, default=60)
+    parser.add_argument("--mods", type=int, default=200)
+    parser.add_argument("--client-mb", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=0, help="потоков загрузки (download_threads); 0 - по умолчанию")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child: return run_child(args)
+
+    from fake_server import Dataset, BenchServer
+    from scenarios import SCENARIOS
+    names = args.scenario or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown: parser.error(f"неизвестные сценарии: {', '.join(unknown)}; доступны: {', '.join(SCENARIOS)}")
+
+    started = time.perf_counter()
+    dataset = Dataset(assets=args.assets, libraries=args.libraries, mods=args.mods, client_mb=args.client_mb)
+    print(f"Набор данных готов за {time.perf_counter() - started:.1f}s")
+
+    header = f"{'scenario':<24} {'wall_s':>9} {'MB':>9} {'MB/s':>9} {'requests':>8} {'rss_MB':>9}"
+    rows = []
+    with BenchServer(dataset, latency_ms=args.latency_ms, bandwidth_kbps=args.bandwidth_kbps, failure_rate=args.failure_rate) as server:
+        print(header)
+        for name in names:
+            runs = sorted((run_scenario(name, server.base_url, args) for _ in range(max(1, args.repeat))), key=lambda r: r["wall"])
+            result = runs[len(runs) // 2]
+            rows.append(format_row(name, result))
+            print(rows[-1] + (f"  {json.dumps(result['extra'])}" if result["extra"] else ""))
+        stats = server.snapshot()
+
+    report = [
+        f"# {time.strftime('%Y-%m-%d %H:%M:%S')} commit {git_revision()} python {sys.version.split()[0]} {sys.platform}",
+        f"# latency_ms={args.latency_ms} bandwidth_kbps={args.bandwidth_kbps} failure_rate={args.failure_rate} repeat={args.repeat} workers={args.workers or 'default'}",
+        f"# dataset {json.dumps(dataset.sizes)}; server requests={stats['requests']} injected_failures={stats['failures']}",
+        header, *rows, "",
+    ]
+    with open(args.output, "a", encoding="utf-8") as f: f.write("\n".join(report) + "\n")
+    print(f"Результаты дописаны в {args.output}")
+
+if __name__ == "__main__":
+    main()
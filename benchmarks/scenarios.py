@@ -0,0 +1,115 @@
+"""
+Сценарии бенчмарка. Каждый выполняется в отдельном процессе с чистым каталогом данных
+(FOLIA_DATA_DIR), поэтому пиковая память и кеши не переходят из сценария в сценарий.
+Сценарий получает Context и оборачивает измеряемую часть в ctx.measure(); подготовка вне
+measure() в результат не входит.
+"""
+import os
+import time
+import json
+from contextlib import contextmanager
+
+from fake_server import MC_VERSION
+
+class Context:
+    def __init__(self, workdir, base_url):
+        self.workdir = workdir
+        self.base_url = base_url
+        self.wall = 0.0
+        self.bytes = 0
+        self.requests = 0
+        self.extra = {}
+
+    def instance(self, name):
+        path = os.path.join(self.workdir, "instances", name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _server_stats(self):
+        from src.backend.utils import get_session
+        return get_session().get(f"{self.base_url}/__stats", timeout=15).json()
+
+    @contextmanager
+    def measure(self):
+        before = self._server_stats()
+        started = time.perf_counter()
+        try: yield
+        finally:
+            self.wall += time.perf_counter() - started
+            after = self._server_stats()
+            self.bytes += after["bytes"] - before["bytes"]
+            self.requests += after["requests"] - before["requests"] - 1
+
+def cold_vanilla(ctx):
+    """Установка версии с нуля: манифест, json версии, библиотеки, ассеты и клиент в пустое хранилище."""
+    from src.backend.installers import prefetch_vanilla
+    instance = ctx.instance("cold")
+    with ctx.measure(): prefetch_vanilla(MC_VERSION, instance)
+    ctx.extra["assets"] = sum(len(files) for _, _, files in os.walk(os.path.join(instance, "assets", "objects")))
+
+def warm_relaunch(ctx):
+    """Повторный запуск установленного инстанса: проверка манифеста и повторный проход установки по готовым файлам."""
+    from src.backend.installers import prefetch_vanilla
+    from src.backend.install_state import ensure_installed, write_manifest
+    instance = ctx.instance("warm")
+    prefetch_vanilla(MC_VERSION, instance)
+    write_manifest(instance, "Vanilla", MC_VERSION, MC_VERSION)
+    with ctx.measure():
+        version_id = ensure_installed("Vanilla", MC_VERSION, instance)
+        prefetch_vanilla(MC_VERSION, instance)
+    ctx.extra["version_id"] = version_id
+
+def shared_store_instance(ctx):
+    """Второй инстанс той же версии: файлы берутся из общего хранилища ссылками, без сети."""
+    from src.backend.installers import prefetch_vanilla
+    prefetch_vanilla(MC_VERSION, ctx.instance("first"))
+    with ctx.measure(): prefetch_vanilla(MC_VERSION, ctx.instance("second"))
+
+def mrpack_import(ctx):
+    """Импорт модпака: скачивание .mrpack, параллельная загрузка модов и распаковка overrides."""
+    from src.backend.utils import download_file
+    from src.backend.mrpack import install_mrpack_archive
+    instance = ctx.instance("pack")
+    mrpack_path = os.path.join(ctx.workdir, "bench.mrpack")
+    with ctx.measure():
+        download_file("https://cdn.modrinth.com/data/benchpack/versions/1.0/bench.mrpack", mrpack_path)
+        install_mrpack_archive(mrpack_path, instance)
+    ctx.extra["mods"] = len(os.listdir(os.path.join(instance, "mods")))
+
+def modrinth_search_paging(ctx, pages=10):
+    """Набор запроса по буквам (устаревшие запросы отбрасываются), затем листание страниц и возврат к первой."""
+    from src.backend import modrinth
+    facets = [["project_type:mod"], [f"versions:{MC_VERSION}"]]
+    hits = 0
+    with ctx.measure():
+        for seq, query in enumerate(["s", "so", "sod", "sodi", "sodium"]):
+            modrinth.search(query, facets, 0, channel="bench", seq=seq)
+        for page in range(pages):
+            result = modrinth.search("", facets, page * modrinth.SEARCH_LIMIT, channel="bench-pages", seq=page)
+            hits += len(result or [])
+        for page in range(pages):
+            modrinth.search("", facets, page * modrinth.SEARCH_LIMIT, channel="bench-pages", seq=pages + page)
+    ctx.extra["hits"] = hits
+
+def loader_metadata(ctx, warm_calls=100):
+    """Выбор сборок Fabric/Quilt/Forge/NeoForge: холодный каталог, затем повторные вызовы из памяти."""
+    from src.backend.loader_index import resolve_loader_version
+    resolved = {}
+    with ctx.measure():
+        for loader in ("Fabric", "Quilt", "Forge", "NeoForge"):
+            resolved[loader] = resolve_loader_version(loader, MC_VERSION)
+        for _ in range(warm_calls):
+            for loader in resolved: resolve_loader_version(loader, MC_VERSION)
+    ctx.extra.update(resolved)
+
+SCENARIOS = {
+    "cold_vanilla": cold_vanilla,
+    "warm_relaunch": warm_relaunch,
+    "shared_store_instance": shared_store_instance,
+    "mrpack_import": mrpack_import,
+    "modrinth_search_paging": modrinth_search_paging,
+    "loader_metadata": loader_metadata,
+}
+
+def dump(ctx):
+    return json.dumps({"wall": ctx.wall, "bytes": ctx.bytes, "requests": ctx.requests, "extra": ctx.extra})
@@ -1,21 +1,17 @@
+import time
+STARTED = time.perf_counter()
+
 import sys
-import webview
-import minecraft_launcher_lib
-import subprocess
 import os
-import uuid
-import threading
-import json
-import requests
-import platform
-import time
-import shutil
-import xml.etree.ElementTree as ET
-import zipfile
+import webview
+from src.backend import startup
 from src.backend.api import LauncherApi
 
 if __name__ == "__main__":
+    startup.begin(STARTED)
+    startup.mark("import")
     api = LauncherApi()
+    startup.mark("api_init")
     
     if getattr(sys, 'frozen', False):
         base_path = sys._MEIPASS
@@ -25,4 +21,5 @@ if __name__ == "__main__":
     html_path = os.path.join(base_path, 'src', 'index.html')
     window = webview.create_window('FoliaLauncher', url=html_path, js_api=api, width=1100, height=700, background_color='#1e1e1e')
     api.set_window(window)
+    startup.mark("window")
     webview.start(debug=False)
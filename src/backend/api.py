@@ -2,17 +2,34 @@ import os
 import sys
 import uuid
 import json
-import requests
-import threading
-import zipfile
 import time
 import shutil
 import subprocess
 import platform
-import webview
-import minecraft_launcher_lib
-from .installers import install_loader
-from .utils import download_file
+from .installers import deep_verify_instance, VERSION_MANIFEST_URL
+from . import http_cache, loader_index
+from .install_state import ensure_installed, invalidate_manifest
+from .java_runtime import JAVA_REGISTRY, select_java, windowless_java
+from . import tracing
+from .jobs import JobScheduler, BANDWIDTH, INTERACTIVE, INSTALL, MAINTENANCE, BACKGROUND
+from .jvm_profiles import PROFILES, CDS_MIN_JAVA, AppCds, LaunchStats, MainMenuTimer, resolve_settings, jvm_arguments, extra_arguments, cds_fingerprint, profile_key, format_summary
+from .mrpack import install_mrpack_archive
+from .registry import InstanceRegistry
+from .modindex import ModIndex, mark_duplicates
+from . import modrinth
+from .gamelog import ConsolePump, GameLogWriter, rotate_game_log, LOG_NAME
+from .logindex import LogIndex
+from . import startup
+from .utils import get_data_root, download_file, configure_downloads, configure_mirrors, format_size
+
+INSTANCE_PAGE_SIZE = 100
+# Тип контента -> (каталог инстанса, расширения файлов)
+CONTENT_FOLDERS = {
+    "mod": ("mods", (".jar",)),
+    "resourcepack": ("resourcepacks", (".zip", ".jar")),
+    "shader": ("shaderpacks", (".zip",)),
+    "datapack": ("datapacks", (".zip",)),
+}
 
 class LauncherApi:
     def __init__(self):
@@ -28,6 +45,11 @@ class LauncherApi:
             
         self.base_dir = os.path.join(self.script_dir, "minecraft_instances")
         if not os.path.exists(self.base_dir): os.makedirs(self.base_dir)
+        self.registry = InstanceRegistry(self.base_dir, os.path.join(get_data_root(), "cache", "instances.json"))
+        self.mod_index = ModIndex(os.path.join(get_data_root(), "cache", "mod_index.json"))
+        self.launch_stats = LaunchStats()
+        self.jobs = JobScheduler(on_change=self._push_jobs)
+        self.log_index = LogIndex(self.base_dir, os.path.join(get_data_root(), "cache", "logs"), mods=self._mod_ids)
             
         self.user_dir = os.path.join(self.script_dir, "data", "user")
         if not os.path.exists(self.user_dir): os.makedirs(self.user_dir)
@@ -35,6 +57,14 @@ class LauncherApi:
         self.config_file = os.path.join(self.script_dir, "data", "launcher_config.json")
         self.java_path = "java"
         self.ram_mb = 2048
+        self.jvm_profile = "default"
+        self.appcds = False
+        self.tracing = False
+        self.download_threads = 8
+        self.mirrors = {}
+        self.mirrors_exclusive = False
+        self.bandwidth_limit_kbps = 0
+        self.parallel_jobs = 2
         self.client_token = None
         self.ms_client_id = "00000000402b5328"
         self.ms_redirect_uri = None
@@ -42,16 +72,11 @@ class LauncherApi:
         self.language = "en"
         self.current_account = None
 
+        self._accounts = None
         self.load_config()
-        self.load_accounts()
         self.current_instance_name = None
         self.current_account = None
-        
-        if self.selected_account_uuid:
-            for acc in self.accounts_cache:
-                if acc.get("uuid") == self.selected_account_uuid:
-                    self.set_account(acc["uuid"])
-                    break
+        self._restore_account()
 
     def set_window(self, window):
         self._window = window
@@ -59,35 +84,48 @@ class LauncherApi:
     def tr(self, key):
         return key
 
+    def report_startup(self, page_ms=None):
+        """Вызывается интерфейсом после первой отрисовки; печатает разбивку времени запуска."""
+        startup.mark("first_paint")
+        result = startup.report()
+        if page_ms is not None: result["page"] = round(page_ms, 1)
+        return result
+
+    def _restore_account(self):
+        """
+        Восстанавливает выбранный аккаунт при создании API, чтобы он был у любого пути запуска
+        (в том числе до первого get_init_data) и не терялся при save_config_file.
+        """
+        if self.current_account or not self.selected_account_uuid: return
+        for acc in self.accounts_cache:
+            if acc.get("uuid") == self.selected_account_uuid:
+                try:
+                    with open(os.path.join(self.user_dir, acc["file"]), "r") as f: self.current_account = json.load(f)
+                except (OSError, ValueError): pass
+                break
+
     def get_init_data(self):
+        instances = self.registry.page(0, INSTANCE_PAGE_SIZE)
         return {
-            "instances": self.get_instances(),
+            "instances": instances["items"],
+            "instances_total": instances["total"],
             "accounts": self.accounts_cache,
             "current_account": self.current_account,
-            "config": {"ram": self.ram_mb, "java_path": self.java_path, "language": self.language}
+            "jobs": self.jobs.list(),
+            "config": {"ram": self.ram_mb, "java_path": self.java_path, "language": self.language, "jvm_profile": self.jvm_profile, "appcds": self.appcds, "jvm_profiles": list(PROFILES)}
         }
 
     def get_instances(self):
-        instances = []
-        if os.path.exists(self.base_dir):
-            dirs = [d for d in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, d))]
-            for d in dirs:
-                cfg_path = os.path.join(self.base_dir, d, "instance_config.json")
-                version = "?"
-                loader = "Vanilla"
-                if os.path.exists(cfg_path):
-                    try:
-                        with open(cfg_path, "r") as f:
-                            cfg = json.load(f)
-                            version = cfg.get("version", "?")
-                            loader = cfg.get("loader", "Vanilla")
-                    except: pass
-                instances.append({"name": d, "version": version, "loader": loader})
-        return instances
+        return self.registry.list()
+
+    def get_instances_page(self, offset=0, limit=50):
+        return self.registry.page(offset, limit)
 
     def select_instance(self, name):
         self.current_instance_name = name
         print(f"Selected instance: {name}")
+        instance_dir = os.path.join(self.base_dir, name)
+        self.mod_index.warm([(os.path.join(instance_dir, folder), extensions) for folder, extensions in CONTENT_FOLDERS.values()])
 
     def load_config(self):
         if os.path.exists(self.config_file):
@@ -96,10 +134,23 @@ class LauncherApi:
                     config = json.load(f)
                     self.java_path = config.get("java_path", "java")
                     self.ram_mb = config.get("ram_mb", 2048)
+                    self.jvm_profile = config.get("jvm_profile", "default")
+                    self.appcds = config.get("appcds", False)
+                    self.tracing = config.get("tracing", False)
                     self.client_token = config.get("client_token")
                     self.selected_account_uuid = config.get("selected_account_uuid")
                     self.language = config.get("language", "en")
+                    self.download_threads = config.get("download_threads", 8)
+                    self.mirrors = config.get("mirrors", {})
+                    self.mirrors_exclusive = config.get("mirrors_exclusive", False)
+                    self.bandwidth_limit_kbps = config.get("bandwidth_limit_kbps", 0)
+                    self.parallel_jobs = config.get("parallel_jobs", 2)
             except: pass
+        configure_downloads(self.download_threads)
+        configure_mirrors(self.mirrors, self.mirrors_exclusive)
+        BANDWIDTH.configure(self.bandwidth_limit_kbps)
+        self.jobs.configure(self.parallel_jobs)
+        tracing.configure(self.tracing, os.path.join(get_data_root(), "traces"))
         
         if not self.client_token: self.client_token = str(uuid.uuid4())
         if not os.path.exists(self.config_file): self.save_config_file()
@@ -107,24 +158,58 @@ class LauncherApi:
     def save_settings(self, settings):
         self.java_path = settings.get("java_path", self.java_path)
         self.ram_mb = int(settings.get("ram", self.ram_mb))
+        if settings.get("jvm_profile") in PROFILES: self.jvm_profile = settings["jvm_profile"]
+        self.appcds = bool(settings.get("appcds", self.appcds))
         self.language = settings.get("language", self.language)
         self.save_config_file()
         return True
 
+    def get_launch_stats(self, instance_name):
+        """Время до главного меню по профилям: {"g1+appcds": {"last", "median", "runs"}, ...}"""
+        if isinstance(instance_name, dict): instance_name = instance_name.get("name")
+        return self.launch_stats.summary(instance_name)
+
+    def set_instance_jvm(self, instance_name, settings):
+        """Переопределения JVM инстанса в instance_config.json; пустое значение возвращает глобальную настройку."""
+        if isinstance(instance_name, dict): instance_name = instance_name.get("name")
+        cfg_path = os.path.join(self.base_dir, instance_name, "instance_config.json")
+        try:
+            with open(cfg_path, "r") as f: config = json.load(f)
+            for key in ("jvm_profile", "appcds", "ram_mb", "jvm_args", "java_path"):
+                if key not in settings: continue
+                if settings[key] in (None, ""): config.pop(key, None)
+                else: config[key] = settings[key]
+            with open(cfg_path, "w") as f: json.dump(config, f)
+            self.registry.update(instance_name)
+            return True
+        except Exception as e:
+            print(e); return False
+
+    def get_java_runtimes(self, rescan=False):
+        """Найденные Java: [{"path", "version", "major", "vendor", "arch", ...}], новые версии первыми."""
+        runtimes = JAVA_REGISTRY.scan(force=bool(rescan))
+        return sorted(runtimes, key=lambda e: (-(e["major"] or 0), e["path"]))
+
     def save_config_file(self):
-        data = {"java_path": self.java_path, "ram_mb": self.ram_mb, "client_token": self.client_token, "language": self.language}
+        data = {"java_path": self.java_path, "ram_mb": self.ram_mb, "jvm_profile": self.jvm_profile, "appcds": self.appcds, "tracing": self.tracing, "client_token": self.client_token, "language": self.language, "download_threads": self.download_threads, "mirrors": self.mirrors, "mirrors_exclusive": self.mirrors_exclusive, "bandwidth_limit_kbps": self.bandwidth_limit_kbps, "parallel_jobs": self.parallel_jobs}
         if self.current_account: data["selected_account_uuid"] = self.current_account.get("uuid")
         with open(self.config_file, "w") as f: json.dump(data, f)
 
+    @property
+    def accounts_cache(self):
+        """Список аккаунтов читается с диска только при первом обращении."""
+        if self._accounts is None: self.load_accounts()
+        return self._accounts
+
     def load_accounts(self):
-        self.accounts_cache = []
+        self._accounts = []
         if os.path.exists(self.user_dir):
             for f in os.listdir(self.user_dir):
                 if f.endswith(".json"):
                     try:
                         with open(os.path.join(self.user_dir, f), "r") as af:
                             data = json.load(af)
-                            self.accounts_cache.append({"type": data.get("type", "unknown"), "username": data.get("username", "unknown"), "uuid": data.get("uuid"), "file": f})
+                            self._accounts.append({"type": data.get("type", "unknown"), "username": data.get("username", "unknown"), "uuid": data.get("uuid"), "file": f})
                     except: pass
 
     def set_account(self, uuid):
@@ -148,6 +233,7 @@ class LauncherApi:
     def add_account_elyby(self, username, password):
         try:
             payload = {"agent": {"name": "Minecraft", "version": 1}, "username": username, "password": password, "clientToken": self.client_token}
+            import requests
             r = requests.post('https://authserver.ely.by/auth/authenticate', json=payload, headers={'Content-Type': 'application/json'}, timeout=15)
             r.raise_for_status()
             data = r.json()
@@ -181,7 +267,7 @@ class LauncherApi:
 
     def get_mc_versions(self):
         try:
-            v_list = minecraft_launcher_lib.utils.get_version_list()
+            v_list = http_cache.get_json(VERSION_MANIFEST_URL, "version_manifest").get("versions", [])
             return [v['id'] for v in v_list if v['type'] == 'release']
         except: return ["1.20.1", "1.19.4", "1.18.2", "1.16.5", "1.12.2"]
 
@@ -194,68 +280,174 @@ class LauncherApi:
 
     def delete_instance(self):
         if not self.current_instance_name: return
+        if self.jobs.busy(self.current_instance_name):
+            print(f"Instance {self.current_instance_name} is busy, not deleting")
+            return False
         try:
             shutil.rmtree(os.path.join(self.base_dir, self.current_instance_name))
+            self.registry.remove(self.current_instance_name)
+            self.launch_stats.remove(self.current_instance_name)
+            self.log_index.remove(self.current_instance_name)
             self.current_instance_name = None
             return True
         except Exception as e:
             print(e); return False
 
-    def create_instance(self, name, version, loader):
+    def verify_instance(self):
+        """Глубокая проверка: перехеширует все файлы инстанса, поврежденные удаляет для перекачки."""
+        if not self.current_instance_name: return None
+        name = self.current_instance_name
+        return self._run_job("verify", name, lambda job: self._verify_instance(name, job), MAINTENANCE, failed={"success": False})
+
+    def _verify_instance(self, instance_name, job):
+        instance_dir = os.path.join(self.base_dir, instance_name)
+        self._window.evaluate_js("setLoading(true)")
+        try:
+            broken = deep_verify_instance(instance_dir, self._make_callback(job))
+            if broken: invalidate_manifest(instance_dir)
+            return {"success": True, "broken": [os.path.relpath(p, instance_dir) for p in broken]}
+        except Exception as e:
+            print(f"Verify error: {e}")
+            return {"success": False, "error": str(e)}
+        finally: self._window.evaluate_js("setLoading(false)")
+
+    def repair_instance(self):
+        """Следующий запуск заново установит версию и загрузчик вместо быстрого пути по манифесту."""
+        if not self.current_instance_name: return False
+        invalidate_manifest(os.path.join(self.base_dir, self.current_instance_name))
+        return True
+
+    def get_loader_versions(self, loader, version):
+        try: return loader_index.get_loader_versions(loader, version)
+        except Exception as e:
+            print(f"Loader versions error: {e}")
+            return []
+
+    def create_instance(self, name, version, loader, loader_version=None):
         instance_path = os.path.join(self.base_dir, name)
         if not os.path.exists(instance_path):
             os.makedirs(instance_path)
-            with open(os.path.join(instance_path, "instance_config.json"), "w") as f: json.dump({"version": version, "loader": loader}, f)
+            config = {"version": version, "loader": loader}
+            if loader_version: config["loader_version"] = loader_version
+            with open(os.path.join(instance_path, "instance_config.json"), "w") as f: json.dump(config, f)
+            self.registry.update(name)
             return True
         return False
 
-    def launch_game_thread(self):
-        threading.Thread(target=self.launch_game).start()
-
-    def launch_game(self):
-        if not self.current_instance_name or not self.current_account: return
-        instance_dir = os.path.join(self.base_dir, self.current_instance_name)
-        with open(os.path.join(instance_dir, "instance_config.json"), "r") as f: config = json.load(f)
-        version, loader = config.get("version", "1.20.1"), config.get("loader", "Vanilla")
-        
-        self._window.evaluate_js(f"updateStatus('{self.tr('installing').format(loader, version)}')")
-        self._window.evaluate_js("setLoading(true)")
-        
+    def _make_callback(self, job=None):
+        """
+        Callback-словарь setStatus/setMax/setProgress, пробрасывающий прогресс в UI.
+        С задачей каждый вызов обновляет ее статус в очереди и служит точкой отмены.
+        """
         progress_max = [1]
         def set_max(m): progress_max[0] = max(1, int(m))
         def set_progress(c):
+            if job: job.check()
             try:
                 p = int((float(c) / float(progress_max[0])) * 100)
+                if job: job.update(progress=p)
                 self._window.evaluate_js(f"updateProgress({p})")
             except: pass
+        def set_status(t):
+            if job:
+                job.check()
+                job.update(status=t)
+            self._window.evaluate_js(f"updateStatus('{t.replace(chr(39), chr(92)+chr(39))}')")
 
-        callback = {
-            "setStatus": lambda t: self._window.evaluate_js(f"updateStatus('{t.replace(chr(39), chr(92)+chr(39))}')"),
+        return {
+            "setStatus": set_status,
             "setMax": set_max,
             "setProgress": set_progress
         }
 
+    def _run_job(self, kind, instance_name, fn, priority=INSTALL, key=None, failed=None):
+        """
+        Выполняет fn(job) через очередь задач и ждет результата: вызовы из JS остаются синхронными.
+        Если задача упала или отменена, возвращается failed (словарь) с error - текстом ошибки или "cancelled".
+        """
+        job = self.jobs.submit(kind, instance_name, fn, title=f"{kind}: {instance_name}", priority=priority, key=key)
+        job.wait()
+        if job.state == "done": return job.result
+        error = job.error if job.state == "failed" else "cancelled"
+        return dict(failed or {"success": False}, error=error)
+
+    def _push_jobs(self, jobs):
+        if self._window:
+            try: self._window.evaluate_js(f"updateJobs({json.dumps(jobs)})")
+            except Exception: pass
+
+    def get_jobs(self):
+        """Очередь задач: выполняющиеся, ожидающие и последние завершенные."""
+        return self.jobs.list()
+
+    def cancel_job(self, job_id):
+        return self.jobs.cancel(int(job_id))
+
+    def launch_game_thread(self):
+        """Ставит запуск выбранного инстанса в очередь с интерактивным приоритетом; возвращает id задачи."""
+        if not self.current_instance_name or not self.current_account: return None
+        name = self.current_instance_name
+        return self.jobs.submit("launch", name, lambda job: self.launch_game(name, job), title=f"launch: {name}", priority=INTERACTIVE).id
+
+    def launch_game(self, instance_name=None, job=None):
+        instance_name = instance_name or self.current_instance_name
+        if not instance_name or not self.current_account: return
+        instance_dir = os.path.join(self.base_dir, instance_name)
+        with open(os.path.join(instance_dir, "instance_config.json"), "r") as f: config = json.load(f)
+        version, loader = config.get("version", "1.20.1"), config.get("loader", "Vanilla")
+        
+        self._window.evaluate_js(f"updateStatus('{self.tr('installing').format(loader, version)}')")
+        self._window.evaluate_js("setLoading(true)")
+        
+        callback = self._make_callback(job)
+        trace = tracing.start("launch")
+
         try:
-            installed_version_id = install_loader(loader, version, instance_dir, callback, java_path=self.java_path)
+            installed_version_id = ensure_installed(loader, version, instance_dir, callback, java_path=self.java_path, loader_version=config.get("loader_version"))
             self._window.evaluate_js(f"updateStatus('{self.tr('launching')}')")
             
-            final_java_path = self.java_path
-            runtime_dir = os.path.join(instance_dir, "runtime")
-            if os.path.exists(runtime_dir):
-                exe_name = "javaw.exe" if self.is_windows else "java"
-                for root, dirs, files in os.walk(runtime_dir):
-                    if exe_name in files: final_java_path = os.path.join(root, exe_name); break
+            # java_path в instance_config.json задается вручную и используется как есть
+            java_path = config.get("java_path") or select_java(installed_version_id, instance_dir, self.java_path, callback)
+            java_info = JAVA_REGISTRY.describe(java_path) or {}
+            final_java_path = windowless_java(java_path)
 
             logs_dir = os.path.join(instance_dir, "logs")
             if not os.path.exists(logs_dir): os.makedirs(logs_dir)
 
-            options = {"username": self.current_account["username"], "uuid": self.current_account["uuid"], "token": self.current_account.get("accessToken") or self.current_account.get("access_token") or "", "launcherName": "FoliaLauncher", "gameDirectory": instance_dir, "executablePath": final_java_path, "jvmArguments": [f"-Xmx{self.ram_mb}M", f"-Xms{self.ram_mb}M", f"-XX:ErrorFile={os.path.join(logs_dir, 'hs_err_pid%p.log')}"]}
-            minecraft_command = minecraft_launcher_lib.command.get_minecraft_command(installed_version_id, instance_dir, options)
+            with tracing.span("build_command"):
+                jvm = resolve_settings({"jvm_profile": self.jvm_profile, "appcds": self.appcds, "ram_mb": self.ram_mb}, config)
+                jvm_args, profile = jvm_arguments(jvm["jvm_profile"], jvm["ram_mb"], java_info.get("major"))
+                cds = None
+                if jvm.get("appcds"):
+                    if (java_info.get("major") or 0) >= CDS_MIN_JAVA:
+                        cds = AppCds(instance_dir, cds_fingerprint(instance_dir, installed_version_id, java_info, profile))
+                        jvm_args += cds.arguments()
+                    else: print(f"AppCDS пропущен: нужна Java {CDS_MIN_JAVA}+, выбрана {java_info.get('version', java_path)}")
+                jvm_args += extra_arguments(jvm.get("jvm_args")) + [f"-XX:ErrorFile={os.path.join(logs_dir, 'hs_err_pid%p.log')}"]
+
+                options = {"username": self.current_account["username"], "uuid": self.current_account["uuid"], "token": self.current_account.get("accessToken") or self.current_account.get("access_token") or "", "launcherName": "FoliaLauncher", "gameDirectory": instance_dir, "executablePath": final_java_path, "jvmArguments": jvm_args}
+                import minecraft_launcher_lib
+                minecraft_command = minecraft_launcher_lib.command.get_minecraft_command(installed_version_id, instance_dir, options)
             
             self._window.evaluate_js("hideWindow()")
             
-            with open(os.path.join(logs_dir, "game_output.log"), "w", encoding="utf-8") as log_file:
+            console_pump = ConsolePump(self._window)
+            duplicates = mark_duplicates(self._installed_items(instance_name, "mod"))
+            for mod_id, files in duplicates.items():
+                console_pump.push(f"[FoliaLauncher] Duplicate mod id '{mod_id}': {', '.join(files)}")
+            rotate_game_log(logs_dir)
+            self.registry.touch(instance_name, played_at=time.time())
+            launch_key = profile_key(profile, cds is not None and not cds.recording)
+            if cds and cds.recording: console_pump.push("[FoliaLauncher] Recording AppCDS archive for this instance")
+            log_writer = GameLogWriter(os.path.join(logs_dir, LOG_NAME), on_spam=lambda rate: console_pump.push(f"[FoliaLauncher] Log spam: {rate} lines/s"))
+            try:
+                menu_timer = MainMenuTimer()
+                game_started = time.perf_counter()
                 process = subprocess.Popen(minecraft_command, cwd=instance_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                # Отмена задачи запуска закрывает игру; инстанс освобождается для других задач, пока идет игра
+                if job:
+                    job.on_cancel = process.terminate
+                    job.detach()
                 while True:
                     line = process.stdout.readline()
                     if not line and process.poll() is not None: break
@@ -263,33 +455,107 @@ class LauncherApi:
                         try: l = line.decode('utf-8', errors='replace').strip()
                         except: l = str(line).strip()
                         print(l)
-                        log_file.write(l + "\n")
-                        log_file.flush()
-                        self._window.evaluate_js(f"consoleLog('{l.replace(chr(39), chr(92)+chr(39))}')")
+                        log_writer.write(l)
+                        console_pump.push(l)
+                        elapsed = menu_timer.feed(l)
+                        if elapsed is not None:
+                            self.launch_stats.record(instance_name, launch_key, elapsed)
+                            summary = format_summary(self.launch_stats.summary(instance_name), launch_key)
+                            console_pump.push(f"[FoliaLauncher] Main menu in {elapsed:.1f}s with profile {launch_key} ({summary})")
+                            # Трасса запуска заканчивается в главном меню, дальше идет сама игра
+                            tracing.record("game_start", game_started, profile=launch_key, java=java_info.get("version"))
+                            written = tracing.finish(trace)
+                            if written: console_pump.push(f"[FoliaLauncher] Launch trace: {written[0]}")
+            finally:
+                stats = log_writer.close()
+                summary = f"[FoliaLauncher] Game log: {stats['lines']} lines, {format_size(stats['bytes'])}, {stats['lines_per_sec']} lines/s (peak {stats['peak_lines_per_sec']})"
+                print(summary)
+                console_pump.push(summary)
+                if cds and cds.finish(): console_pump.push(f"[FoliaLauncher] AppCDS archive saved: {format_size(os.path.getsize(cds.archive))}")
+                console_pump.close()
+                self.registry.touch(instance_name)
+                self.log_index.schedule([instance_name])
             self._window.evaluate_js("showWindow()")
             self._window.evaluate_js(f"updateStatus('{self.tr('game_closed')}')")
         except Exception as e:
             print(e); self._window.evaluate_js(f"updateStatus('{self.tr('error_title')}: {str(e)}')")
-        finally: self._window.evaluate_js("gameClosed()")
+        finally:
+            tracing.finish(trace)
+            self._window.evaluate_js("gameClosed()")
+
+    def _installed_items(self, instance_name, kind):
+        """Содержимое каталога инстанса с метаданными из ModIndex (имя, версия, id, иконка, дубликаты)."""
+        folder, extensions = CONTENT_FOLDERS[kind]
+        return self.mod_index.list(os.path.join(self.base_dir, instance_name, folder), extensions)
+
+    def _mod_ids(self, instance_name):
+        """{имя jar: id мода} для сопоставления jar из стектрейсов в индексе логов."""
+        return {item["file_name"]: item.get("id") for item in self._installed_items(instance_name, "mod")}
+
+    def search_logs(self, query="", filters=None):
+        """
+        Поиск по логам, краш-репортам и hs_err всех инстансов. filters: instance, level, kind, mod, since, limit.
+        Индекс дополняется в фоне; пока он строится, в ответе indexing=True и поиск можно повторить.
+        """
+        filters = filters or {}
+        self.log_index.schedule([filters["instance"]] if filters.get("instance") else None)
+        options = {key: filters[key] for key in ("instance", "level", "kind", "mod", "since", "limit") if filters.get(key) is not None}
+        try: return self.log_index.search(query, **options)
+        except Exception as e:
+            print(f"Log search error: {e}")
+            return {"results": [], "total": 0, "signatures": [], "indexing": False, "error": str(e)}
+
+    def get_log_excerpt(self, instance_name, file, offset, lines=40):
+        """Текст лога вокруг найденного события (offset из search_logs)."""
+        try: return self.log_index.excerpt(instance_name, file, int(offset), int(lines))
+        except (OSError, ValueError, EOFError) as e:
+            print(f"Log excerpt error: {e}")
+            return None
 
     def get_installed_mods(self, instance_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
-        mods_dir = os.path.join(self.base_dir, instance_name, "mods")
-        if not os.path.exists(mods_dir): return []
-        return [{"name": f, "file_name": f} for f in os.listdir(mods_dir) if f.endswith(".jar")]
+        return self._installed_items(instance_name, "mod")
 
     def delete_mod(self, instance_name, file_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
         try:
             os.remove(os.path.join(self.base_dir, instance_name, "mods", file_name))
+            self.registry.touch(instance_name)
             return True
         except: return False
 
+    def check_mod_updates(self, instance_name):
+        """Доступные обновления модов инстанса (один пакетный запрос к Modrinth по sha1 файлов)."""
+        if isinstance(instance_name, dict): instance_name = instance_name.get("name")
+        cfg = self.registry.get_config(instance_name) or {}
+        try:
+            mods_dir = os.path.join(self.base_dir, instance_name, "mods")
+            return {"success": True, "updates": modrinth.check_updates(mods_dir, cfg.get("loader"), cfg.get("version"), self.mod_index)}
+        except Exception as e:
+            print(f"Update check error: {e}")
+            return {"success": False, "error": str(e)}
+
+    def update_all_mods(self, instance_name):
+        """Проверяет и ставит все обновления модов одной задачей с общим прогрессом."""
+        if isinstance(instance_name, dict): instance_name = instance_name.get("name")
+        return self._run_job("update_mods", instance_name, lambda job: self._update_all_mods(instance_name, job), BACKGROUND, failed={"success": False})
+
+    def _update_all_mods(self, instance_name, job):
+        self._window.evaluate_js("setLoading(true)")
+        try:
+            result = self.check_mod_updates(instance_name)
+            if not result["success"] or not result["updates"]: return result
+            count = modrinth.apply_updates(os.path.join(self.base_dir, instance_name, "mods"), result["updates"], self._make_callback(job))
+            self.registry.touch(instance_name)
+            return {"success": True, "updated": count}
+        except Exception as e:
+            print(f"Update error: {e}")
+            return {"success": False, "error": str(e)}
+        finally: self._window.evaluate_js("setLoading(false)")
+
     def get_installed_resourcepacks(self, instance_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
-        rp_dir = os.path.join(self.base_dir, instance_name, "resourcepacks")
-        if not os.path.exists(rp_dir): return []
-        return [{"name": f, "file_name": f} for f in os.listdir(rp_dir) if f.endswith((".zip", ".jar"))]
+        return self._installed_items(instance_name, "resourcepack")
 
     def delete_resourcepack(self, instance_name, file_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
@@ -300,9 +566,7 @@ class LauncherApi:
 
     def get_installed_shaders(self, instance_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
-        sp_dir = os.path.join(self.base_dir, instance_name, "shaderpacks")
-        if not os.path.exists(sp_dir): return []
-        return [{"name": f, "file_name": f} for f in os.listdir(sp_dir) if f.endswith(".zip")]
+        return self._installed_items(instance_name, "shader")
 
     def delete_shader(self, instance_name, file_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
@@ -313,9 +577,7 @@ class LauncherApi:
 
     def get_installed_datapacks(self, instance_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
-        dp_dir = os.path.join(self.base_dir, instance_name, "datapacks")
-        if not os.path.exists(dp_dir): return []
-        return [{"name": f, "file_name": f} for f in os.listdir(dp_dir) if f.endswith(".zip")]
+        return self._installed_items(instance_name, "datapack")
 
     def delete_datapack(self, instance_name, file_name):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
@@ -324,16 +586,13 @@ class LauncherApi:
             return True
         except: return False
 
-    def search_modrinth(self, query, instance_name, offset=0, project_type='mod'):
+    def search_modrinth(self, query, instance_name, offset=0, project_type='mod', seq=None):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
         if not instance_name: return []
-        try:
-            instance_dir = os.path.join(self.base_dir, instance_name)
-            with open(os.path.join(instance_dir, "instance_config.json"), "r") as f: cfg = json.load(f)
-            game_version = cfg.get("version")
-            loader = cfg.get("loader", "").lower()
-            if not game_version: return []
-        except: return []
+        cfg = self.registry.get_config(instance_name) or {}
+        game_version = cfg.get("version")
+        loader = cfg.get("loader", "").lower()
+        if not game_version: return []
         
         try:
             facets = [[f"versions:{game_version}"], [f"project_type:{project_type}"]]
@@ -344,35 +603,19 @@ class LauncherApi:
                 else: # Don't search for mods on vanilla
                     return []
 
-            params = {'query': query, 'limit': 20, 'offset': offset, 'facets': json.dumps(facets)}
-            headers = {'User-Agent': 'FoliaLauncher/beta-2'}
-            if not query:
-                params['index'] = 'downloads'
-            r = requests.get("https://api.modrinth.com/v2/search", params=params, headers=headers, timeout=15)
-            r.raise_for_status()
-            hits = r.json().get('hits', [])
-            print(f"Modrinth search for '{query}' on '{game_version}/{loader}' returned {len(hits)} hits.")
+            hits = modrinth.search(query, facets, offset, index=None if query else 'downloads', channel="items", seq=seq)
+            if hits is not None: print(f"Modrinth search for '{query}' on '{game_version}/{loader}' returned {len(hits)} hits.")
             return hits
         except Exception as e:
             print(f"Search error (API request): {e}")
             return []
 
-    def search_modrinth_modpacks(self, query, version=None, offset=0):
+    def search_modrinth_modpacks(self, query, version=None, offset=0, seq=None):
         try:
             facets = [["project_type:modpack"]]
             if version:
                 facets.append([f"versions:{version}"])
-
-            params = {
-                'query': query,
-                'limit': 20,
-                'offset': offset,
-                'facets': json.dumps(facets)
-            }
-            headers = {'User-Agent': 'FoliaLauncher/beta-2'}
-            r = requests.get("https://api.modrinth.com/v2/search", params=params, headers=headers, timeout=15)
-            r.raise_for_status()
-            return r.json().get('hits', [])
+            return modrinth.search(query, facets, offset, channel="modpacks", seq=seq)
         except Exception as e:
             print(f"Modpack search error: {e}")
             return []
@@ -380,59 +623,34 @@ class LauncherApi:
     def get_modpack_versions(self, project_id):
         try:
             headers = {'User-Agent': 'FoliaLauncher/beta-2'}
-            r = requests.get(f"https://api.modrinth.com/v2/project/{project_id}/version", headers=headers, timeout=15)
-            r.raise_for_status()
-            return r.json()
+            return http_cache.get_json(f"https://api.modrinth.com/v2/project/{project_id}/version", "modrinth", headers=headers)
         except Exception as e:
             print(f"Get versions error: {e}")
             return []
 
     def open_file_dialog(self):
+        import webview
         result = self._window.create_file_dialog(webview.OPEN_DIALOG, allow_multiple=False, file_types=('Modrinth Modpack (*.mrpack)', 'All files (*.*)'))
         return result[0] if result else None
 
-    def _process_mrpack(self, instance_dir, mrpack_path):
-        """Internal method to extract and install mrpack"""
-        with zipfile.ZipFile(mrpack_path, 'r') as z:
-            with z.open("modrinth.index.json") as f:
-                index = json.load(f)
-            
-            # Dependencies
-            mc_version = index['dependencies']['minecraft']
-            loader = "Vanilla"
-            if 'fabric-loader' in index['dependencies']: loader = "Fabric"
-            elif 'forge' in index['dependencies']: loader = "Forge"
-            elif 'quilt-loader' in index['dependencies']: loader = "Quilt"
-            elif 'neoforge' in index['dependencies']: loader = "NeoForge"
-
-            with open(os.path.join(instance_dir, "instance_config.json"), "w") as f:
-                json.dump({"version": mc_version, "loader": loader}, f)
-
-            # Download files
-            for file_info in index['files']:
-                path = os.path.join(instance_dir, file_info['path'])
-                os.makedirs(os.path.dirname(path), exist_ok=True)
-                download_file(file_info['downloads'][0], path)
-
-            # Extract overrides
-            for name in z.namelist():
-                if name.startswith("overrides/"):
-                    target = os.path.join(instance_dir, name[len("overrides/"):])
-                    if not name.endswith("/"):
-                        os.makedirs(os.path.dirname(target), exist_ok=True)
-                        with z.open(name) as source, open(target, "wb") as dest:
-                            shutil.copyfileobj(source, dest)
+    @tracing.traced()
+    def _process_mrpack(self, instance_dir, mrpack_path, callback=None):
+        """Устанавливает mrpack в инстанс и записывает instance_config.json"""
+        mc_version, loader = install_mrpack_archive(mrpack_path, instance_dir, callback)
+        with open(os.path.join(instance_dir, "instance_config.json"), "w") as f:
+            json.dump({"version": mc_version, "loader": loader}, f)
+        self.registry.update(os.path.basename(instance_dir))
 
     def import_mrpack_local(self, instance_name, file_path):
+        return self._run_job("import_mrpack", instance_name, lambda job: self._import_mrpack_local(instance_name, file_path, job))
+
+    def _import_mrpack_local(self, instance_name, file_path, job):
         instance_dir = os.path.join(self.base_dir, instance_name)
         if os.path.exists(instance_dir): return False
         os.makedirs(instance_dir)
         
         try:
-            mrpack_path = os.path.join(instance_dir, "modpack.mrpack")
-            shutil.copy2(file_path, mrpack_path)
-            self._process_mrpack(instance_dir, mrpack_path)
-            os.remove(mrpack_path)
+            with tracing.session("mrpack"): self._process_mrpack(instance_dir, file_path, self._make_callback(job))
             return True
         except Exception as e:
             print(f"Import mrpack error: {e}")
@@ -440,19 +658,18 @@ class LauncherApi:
             return False
 
     def install_mrpack(self, instance_name, project_id, version_id=None):
+        return self._run_job("install_mrpack", instance_name, lambda job: self._install_mrpack(instance_name, project_id, version_id, job))
+
+    def _install_mrpack(self, instance_name, project_id, version_id, job):
         headers = {'User-Agent': 'FoliaLauncher/beta-2'}
         instance_dir = os.path.join(self.base_dir, instance_name)
         
         try:
             # 1. Get latest version info
             if version_id:
-                r = requests.get(f"https://api.modrinth.com/v2/version/{version_id}", headers=headers, timeout=15)
-                r.raise_for_status()
-                version_data = r.json()
+                version_data = http_cache.get_json(f"https://api.modrinth.com/v2/version/{version_id}", "modrinth", headers=headers)
             else:
-                r = requests.get(f"https://api.modrinth.com/v2/project/{project_id}/version", headers=headers, timeout=15)
-                r.raise_for_status()
-                versions = r.json()
+                versions = http_cache.get_json(f"https://api.modrinth.com/v2/project/{project_id}/version", "modrinth", headers=headers)
                 if not versions: return False
                 version_data = versions[0]
 
@@ -465,9 +682,10 @@ class LauncherApi:
 
             # 3. Download mrpack
             mrpack_path = os.path.join(instance_dir, "modpack.mrpack")
-            download_file(mrpack_file['url'], mrpack_path)
 
-            self._process_mrpack(instance_dir, mrpack_path)
+            with tracing.session("mrpack"):
+                download_file(mrpack_file['url'], mrpack_path, sha1=mrpack_file.get('hashes', {}).get('sha1'))
+                self._process_mrpack(instance_dir, mrpack_path, self._make_callback(job))
 
             os.remove(mrpack_path)
             return True
@@ -478,46 +696,17 @@ class LauncherApi:
 
     def install_item_from_modrinth(self, instance_name, project_id):
         if isinstance(instance_name, dict): instance_name = instance_name.get("name")
+        return self._run_job("install_item", instance_name, lambda job: self._install_item_from_modrinth(instance_name, project_id, job), key=project_id, failed={"success": False})
+
+    def _install_item_from_modrinth(self, instance_name, project_id, job):
         try:
             instance_dir = os.path.join(self.base_dir, instance_name)
-            with open(os.path.join(instance_dir, "instance_config.json"), "r") as f: cfg = json.load(f)
-            
-            loader = cfg.get("loader", "").lower()
-            version = cfg.get("version")
-            
-            headers = {'User-Agent': 'FoliaLauncher/beta-2'}
-            
-            # We need to get project type first to construct the version query
-            project_info_res = requests.get(f"https://api.modrinth.com/v2/project/{project_id}", headers=headers, timeout=15)
-            project_info_res.raise_for_status()
-            project_info = project_info_res.json()
-            project_type = project_info.get("project_type")
-
-            params = {'game_versions': json.dumps([version])}
-            if project_type == 'mod':
-                params['loaders'] = json.dumps([loader])
-            
-            r = requests.get(f"https://api.modrinth.com/v2/project/{project_id}/version", params=params, headers=headers, timeout=15)
-            r.raise_for_status()
-            versions = r.json()
-            
-            if not versions: return {"success": False, "error": self.tr("no_compatible")}
-            
-            file_data = versions[0]['files'][0]
-            sha1 = file_data.get('hashes', {}).get('sha1')
-            
-            folder_map = {
-                "mod": "mods",
-                "resourcepack": "resourcepacks",
-                "shaderpack": "shaderpacks",
-                "datapack": "datapacks"
-            }
-            target_folder_name = folder_map.get(project_type, "mods")
-            target_dir = os.path.join(instance_dir, target_folder_name)
-            
-            download_file(file_data['url'], os.path.join(target_dir, file_data['filename']), sha1=sha1)
-            
-            return {"success": True, "type": project_type}
+            cfg = self.registry.get_config(instance_name) or {}
+            result = modrinth.install_with_dependencies(project_id, instance_dir, cfg.get("loader"), cfg.get("version"), self.mod_index, self._make_callback(job))
+            if not result: return {"success": False, "error": self.tr("no_compatible")}
+            if result["missing"]: print(f"No compatible version for dependencies: {', '.join(result['missing'])}")
+            self.registry.touch(instance_name)
+            return dict(result, success=True)
         except Exception as e:
-
+            print(f"Install error: {e}")
             return {"success": False, "error": str(e)}
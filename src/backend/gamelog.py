@@ -0,0 +1,185 @@
+import os
+import json
+import gzip
+import time
+import queue
+import shutil
+import threading
+from collections import deque
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOG_NAME = "game_output.log"
+ARCHIVE_DIR = "archive"
+KEEP_SESSIONS = 10
+SPAM_LINES_PER_SEC = 2000
+COMPRESSED_SUFFIXES = (".log.gz", ".log.zst")
+
+# Сжатие и очистка архива не пересекаются: иначе очистка могла удалить файл, который еще сжимается
+_archive_lock = threading.Lock()
+
+class ConsolePump:
+    """
+    Буфер между выводом игры и webview: строки копятся и уходят в UI одним вызовом
+    consoleLogBatch раз в interval секунд или при накоплении batch_lines строк.
+    Подряд идущие одинаковые строки склеиваются, а при переполнении старые строки отбрасываются.
+    """
+
+    def __init__(self, window, interval=0.1, batch_lines=500, max_pending=5000):
+        self.window = window
+        self.interval = interval
+        self.batch_lines = batch_lines
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="console-pump", daemon=True)
+        self.thread.start()
+
+    def push(self, line):
+        with self.lock:
+            if self.pending and self.pending[-1][0] == line:
+                self.pending[-1][1] += 1
+                return
+            self.pending.append([line, 1])
+            if len(self.pending) > self.max_pending:
+                self.pending.popleft()
+                self.dropped += 1
+            if len(self.pending) >= self.batch_lines: self.wakeup.set()
+
+    def _take(self):
+        with self.lock:
+            entries, dropped = list(self.pending), self.dropped
+            self.pending.clear()
+            self.dropped = 0
+        lines = [f"[... {dropped} lines skipped ...]"] if dropped else []
+        lines.extend(line if count == 1 else f"{line} (x{count})" for line, count in entries)
+        return lines
+
+    def flush(self):
+        lines = self._take()
+        if not lines: return
+        try: self.window.evaluate_js(f"consoleLogBatch({json.dumps(lines)})")
+        except Exception as e: print(f"Console pump error: {e}")
+
+    def _run(self):
+        while not self.closed:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join(timeout=2)
+        self.flush()
+
+
+def _compress_log(path):
+    """Сжимает архивный лог в zstd (если установлен zstandard) или gzip и удаляет исходник."""
+    if zstandard:
+        target = path + ".zst"
+        with open(path, "rb") as src, open(target + ".tmp", "wb") as dst:
+            zstandard.ZstdCompressor(level=10).copy_stream(src, dst)
+    else:
+        target = path + ".gz"
+        with open(path, "rb") as src, gzip.open(target + ".tmp", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(target + ".tmp", target)
+    os.remove(path)
+    return target
+
+def _prune_archive(archive_dir, keep):
+    """Удаляет старые сессии сверх keep. Учитываются только уже сжатые логи; несжатые и .tmp не трогаются."""
+    sessions = sorted(f for f in os.listdir(archive_dir) if f.startswith("game_output-") and f.endswith(COMPRESSED_SUFFIXES))
+    for name in sessions[:-keep] if keep > 0 else sessions:
+        try: os.remove(os.path.join(archive_dir, name))
+        except OSError: pass
+
+def _archive_worker(path, archive_dir, keep):
+    with _archive_lock:
+        try: _compress_log(path)
+        except Exception as e: print(f"Log compression error: {e}")
+        _prune_archive(archive_dir, keep)
+
+def rotate_game_log(logs_dir, keep=KEEP_SESSIONS):
+    """
+    Переносит лог прошлой сессии в logs/archive/game_output-<время>.log и сжимает его в фоне.
+    Хранится не более keep прошлых сессий.
+    """
+    current = os.path.join(logs_dir, LOG_NAME)
+    if not os.path.exists(current) or os.path.getsize(current) == 0: return None
+    archive_dir = os.path.join(logs_dir, ARCHIVE_DIR)
+    os.makedirs(archive_dir, exist_ok=True)
+    stamp = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(os.path.getmtime(current)))
+    rotated = os.path.join(archive_dir, f"game_output-{stamp}.log")
+    os.replace(current, rotated)
+    threading.Thread(target=_archive_worker, args=(rotated, archive_dir, keep), name="log-archive", daemon=True).start()
+    return rotated
+
+class GameLogWriter:
+    """
+    Пишет лог игры в отдельном потоке: поток чтения stdout только кладет строку в ограниченную очередь,
+    а запись идет крупными буферизованными пачками с редким flush.
+    Считает строки/байты и сообщает через on_spam, когда мод засыпает лог.
+    """
+
+    def __init__(self, path, on_spam=None, queue_size=20000, buffer_size=1024 * 1024, flush_interval=1.0):
+        self.file = open(path, "w", encoding="utf-8", errors="replace", buffering=buffer_size)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.on_spam = on_spam
+        self.flush_interval = flush_interval
+        self.lines = 0
+        self.bytes = 0
+        self.peak_rate = 0
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name="game-log-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        self.queue.put(line)
+
+    def _run(self):
+        last_flush = window_start = time.monotonic()
+        window_lines = 0
+        running = True
+        while running:
+            try: batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty: batch = []
+            while len(batch) < 1000:
+                try: batch.append(self.queue.get_nowait())
+                except queue.Empty: break
+            if None in batch:
+                running = False
+                batch = batch[:batch.index(None)]
+            if batch:
+                data = "\n".join(batch) + "\n"
+                self.file.write(data)
+                self.lines += len(batch)
+                self.bytes += len(data.encode("utf-8", errors="replace"))
+                window_lines += len(batch)
+
+            now = time.monotonic()
+            if now - last_flush >= self.flush_interval:
+                self.file.flush()
+                last_flush = now
+            if now - window_start >= 1.0:
+                rate = int(window_lines / (now - window_start))
+                self.peak_rate = max(self.peak_rate, rate)
+                if rate >= SPAM_LINES_PER_SEC and self.on_spam: self.on_spam(rate)
+                window_start, window_lines = now, 0
+        self.file.close()
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {"lines": self.lines, "bytes": self.bytes, "seconds": round(elapsed, 1), "lines_per_sec": round(self.lines / elapsed, 1), "peak_lines_per_sec": self.peak_rate}
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        return self.stats()
@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from .utils import get_data_root, get_session, MIRRORS
+from . import tracing
+
+CACHE_DIR = os.path.join(get_data_root(), "cache", "http")
+
+# Время свежести ответа и окно stale-while-revalidate (в секундах) для каждого класса эндпоинтов
+TTL = {
+    "version_manifest": (600, 7 * 86400),
+    "loader_meta": (3600, 7 * 86400),
+    "forge_promos": (3600, 7 * 86400),
+    "maven_metadata": (6 * 3600, 7 * 86400),
+    "modrinth": (300, 86400),
+}
+
+_revalidating = set()
+_lock = threading.Lock()
+
+def _cache_key(url, params):
+    raw = url + "?" + json.dumps(params or {}, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _load_entry(key):
+    try:
+        with open(os.path.join(CACHE_DIR, key + ".json"), "r") as f: meta = json.load(f)
+        with open(os.path.join(CACHE_DIR, key + ".body"), "rb") as f: body = f.read()
+        return meta, body
+    except (OSError, ValueError): return None, None
+
+def _save_entry(key, meta, body=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if body is not None:
+        with open(os.path.join(CACHE_DIR, key + ".body.tmp"), "wb") as f: f.write(body)
+        os.replace(os.path.join(CACHE_DIR, key + ".body.tmp"), os.path.join(CACHE_DIR, key + ".body"))
+    with open(os.path.join(CACHE_DIR, key + ".json.tmp"), "w") as f: json.dump(meta, f)
+    os.replace(os.path.join(CACHE_DIR, key + ".json.tmp"), os.path.join(CACHE_DIR, key + ".json"))
+
+def _revalidate(key, url, params, headers, meta, timeout):
+    """Условный запрос с If-None-Match / If-Modified-Since. Возвращает тело ответа."""
+    request_headers = dict(headers or {})
+    if meta and meta.get("etag"): request_headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"): request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    resp = get_session().get(MIRRORS.rewrite(url), params=params, headers=request_headers, timeout=timeout)
+    if resp.status_code == 304 and meta:
+        meta["fetched_at"] = time.time()
+        _save_entry(key, meta)
+        return None
+    resp.raise_for_status()
+    body = resp.content
+    new_meta = {"url": url, "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified"), "fetched_at": time.time(), "sha1": hashlib.sha1(body).hexdigest()}
+    _save_entry(key, new_meta, body)
+    return body
+
+def _revalidate_background(key, url, params, headers, meta, timeout):
+    with _lock:
+        if key in _revalidating: return
+        _revalidating.add(key)
+
+    def worker():
+        try: _revalidate(key, url, params, headers, meta, timeout)
+        except Exception as e: print(f"HTTP cache: background revalidation failed for {url}: {e}")
+        finally:
+            with _lock: _revalidating.discard(key)
+    threading.Thread(target=worker, name="http-revalidate", daemon=True).start()
+
+def fetch(url, kind, params=None, headers=None, timeout=15):
+    """
+    GET с дисковым кешем. Свежий ответ отдается без сети, устаревший в пределах окна
+    stale-while-revalidate отдается сразу с фоновой ревалидацией, а при недоступной сети
+    используется последний сохраненный ответ. Возвращает тело ответа (bytes).
+    """
+    ttl, stale_window = TTL.get(kind, (300, 86400))
+    key = _cache_key(url, params)
+    meta, body = _load_entry(key)
+    age = time.time() - meta.get("fetched_at", 0) if meta else None
+
+    if body is not None and age < ttl:
+        tracing.count("http_cache_hits")
+        return body
+    if body is not None and age < ttl + stale_window:
+        tracing.count("http_cache_stale")
+        _revalidate_background(key, url, params, headers, meta, timeout)
+        return body
+    tracing.count("http_cache_misses")
+    try:
+        fresh = _revalidate(key, url, params, headers, meta if body is not None else None, timeout)
+        return body if fresh is None else fresh
+    except Exception as e:
+        if body is None: raise
+        print(f"HTTP cache: using stale response for {url}: {e}")
+        return body
+
+def get_json(url, kind, params=None, headers=None, timeout=15):
+    return json.loads(fetch(url, kind, params=params, headers=headers, timeout=timeout))
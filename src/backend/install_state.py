@@ -0,0 +1,91 @@
+import os
+import json
+import time
+from .installers import install_loader, collect_version_files
+from . import tracing
+
+MANIFEST_NAME = "install_manifest.json"
+
+def manifest_path(instance_dir):
+    return os.path.join(instance_dir, MANIFEST_NAME)
+
+def load_manifest(instance_dir):
+    try:
+        with open(manifest_path(instance_dir), "r") as f: return json.load(f)
+    except (OSError, ValueError): return None
+
+def invalidate_manifest(instance_dir):
+    """Сбрасывает манифест: следующий запуск заново пройдет через install_loader (ремонт/обновление)."""
+    try: os.remove(manifest_path(instance_dir))
+    except OSError: pass
+
+def loader_version_from_id(loader_type, version_id, mc_version=None):
+    """
+    Достает версию загрузчика из id версии, который вернул install_loader.
+    Нужна только для манифестов, записанных до появления явного loader_version.
+    """
+    if loader_type in ("Fabric", "Quilt"):
+        # fabric-loader-0.15.11-1.20.1 / quilt-loader-0.26.0-beta.1-1.20.1: версия загрузчика может содержать дефисы
+        prefix = f"{loader_type.lower()}-loader-"
+        if not version_id.startswith(prefix): return None
+        rest = version_id[len(prefix):]
+        if mc_version and rest.endswith("-" + mc_version): return rest[:-len(mc_version) - 1] or None
+        return rest.rsplit("-", 1)[0] if "-" in rest else None
+    if loader_type == "Forge" and "-forge-" in version_id:
+        return version_id.split("-forge-", 1)[1]
+    if loader_type == "NeoForge" and version_id.startswith("neoforge-"):
+        return version_id[len("neoforge-"):]
+    return None
+
+def write_manifest(instance_dir, loader_type, version, version_id, loader_version=None):
+    """loader_version - версия загрузчика, которую реально установил install_loader (сохраняется как есть)."""
+    files = {}
+    for path, _ in collect_version_files(version_id, instance_dir):
+        try: files[os.path.relpath(path, instance_dir)] = os.path.getsize(path)
+        except OSError: pass
+    natives_dir = os.path.join(instance_dir, "versions", version_id, "natives")
+    manifest = {
+        "loader": loader_type,
+        "version": version,
+        "version_id": version_id,
+        "loader_version": loader_version or loader_version_from_id(loader_type, version_id, version),
+        "installed_at": time.time(),
+        "natives": os.path.isdir(natives_dir),
+        "files": files,
+    }
+    temp_path = manifest_path(instance_dir) + ".tmp"
+    with open(temp_path, "w") as f: json.dump(manifest, f)
+    os.replace(temp_path, manifest_path(instance_dir))
+    return manifest
+
+def manifest_matches(manifest, loader_type, version, instance_dir, loader_version=None):
+    """Проверяет только метаданные (наличие и размер файлов) - без сети и без хеширования."""
+    if not manifest or manifest.get("loader") != loader_type or manifest.get("version") != version: return False
+    if loader_version:
+        installed = manifest.get("loader_version") or loader_version_from_id(loader_type, manifest.get("version_id", ""), version)
+        if installed != loader_version: return False
+    if not manifest.get("files"): return False
+    if manifest.get("natives") and not os.path.isdir(os.path.join(instance_dir, "versions", manifest["version_id"], "natives")): return False
+    for rel_path, size in manifest["files"].items():
+        try:
+            if os.path.getsize(os.path.join(instance_dir, rel_path)) != size: return False
+        except OSError: return False
+    return True
+
+@tracing.traced()
+def ensure_installed(loader_type, version, instance_dir, callback=None, java_path=None, force=False, loader_version=None):
+    """
+    Возвращает id версии для запуска. Если манифест инстанса совпадает с файлами на диске,
+    install_loader не вызывается вовсе; иначе инстанс устанавливается заново и манифест перезаписывается.
+    """
+    manifest = None if force else load_manifest(instance_dir)
+    if manifest_matches(manifest, loader_type, version, instance_dir, loader_version):
+        print(f"Инстанс уже установлен ({manifest['version_id']}), установка пропущена")
+        tracing.count("install_skipped")
+        return manifest["version_id"]
+
+    version_id = install_loader(loader_type, version, instance_dir, callback, java_path=java_path, loader_version=loader_version)
+    # Явно заданная версия загрузчика и есть установленная: install_loader ставит ее или падает
+    try: write_manifest(instance_dir, loader_type, version, version_id, loader_version=loader_version if loader_type != "Vanilla" else None)
+    except Exception as e: print(f"Не удалось записать манифест установки: {e}")
+    return version_id
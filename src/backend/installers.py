@@ -1,21 +1,16 @@
 import os
-import sys
 import json
-import requests
 import zipfile
 import time
-import shutil
+import threading
 import subprocess
-import xml.etree.ElementTree as ET
-import minecraft_launcher_lib
-from .utils import get_os_name, download_file
+import contextlib
+from .utils import get_os_name, get_data_root, download_file, download_files, verify_zip, deep_verify, link_file
+from . import http_cache, tracing
+from .loader_index import resolve_loader_version
+from .java_runtime import select_java, link_shared_runtime
 
-def get_data_root():
-    if getattr(sys, 'frozen', False):
-        return os.path.join(os.path.dirname(sys.executable), "data")
-
-    path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    return os.path.join(path, "data")
+VERSION_MANIFEST_URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
 
 CACHE_DIR = os.path.join(get_data_root(), "modloader")
 
@@ -32,71 +27,159 @@ def check_rules(rules):
             if not os_rule or os_rule.get('name') == os_name: allow = False
     return allow
 
+def library_path(name):
+    """Maven-координата group:artifact:version -> относительный путь jar."""
+    parts = name.split(':')
+    domain = parts[0].replace('.', '/')
+    artifact, version = parts[1], parts[2]
+    return f"{domain}/{artifact}/{version}/{artifact}-{version}.jar"
+
+@tracing.traced()
 def install_libraries(data, instance_dir, callback=None):
     lib_dir = os.path.join(instance_dir, "libraries")
     libs = data.get('libraries', [])
+    tasks = []
     
-    if callback: callback.get("setMax", lambda x: None)(len(libs))
-    
-    for i, lib in enumerate(libs):
-        if callback: callback.get("setProgress", lambda x: None)(i)
+    for lib in libs:
         if not check_rules(lib.get('rules')): continue
         
         if 'downloads' in lib:
             downloads = lib['downloads']
             if 'artifact' in downloads:
                 art = downloads['artifact']
-                download_file(art['url'], os.path.join(lib_dir, art['path']), callback, sha1=art.get('sha1'))
+                tasks.append({"url": art['url'], "path": os.path.join(lib_dir, art['path']), "sha1": art.get('sha1'), "size": art.get('size'), "shared": True})
             
             classifiers = downloads.get('classifiers', {})
             native_key = f"natives-{get_os_name()}"
             if native_key in classifiers:
                 nat = classifiers[native_key]
-                download_file(nat['url'], os.path.join(lib_dir, nat['path']), callback, sha1=nat.get('sha1'))
+                tasks.append({"url": nat['url'], "path": os.path.join(lib_dir, nat['path']), "sha1": nat.get('sha1'), "size": nat.get('size'), "shared": True})
                 
         name = lib.get('name')
         if name:
-            parts = name.split(':')
-            domain = parts[0].replace('.', '/')
-            artifact = parts[1]
-            version = parts[2]
-            filename = f"{artifact}-{version}.jar"
-            path = f"{domain}/{artifact}/{version}/{filename}"
+            path = library_path(name)
             
             if not ('downloads' in lib and 'artifact' in lib['downloads']):
                 base_url = lib.get('url', "https://libraries.minecraft.net/")
                 if not base_url.endswith('/'): base_url += '/'
-                download_file(base_url + path, os.path.join(lib_dir, path), callback)
+                tasks.append({"url": base_url + path, "path": os.path.join(lib_dir, path), "sha1": lib.get('sha1'), "size": lib.get('size'), "shared": True})
     
-    if callback: callback.get("setProgress", lambda x: None)(len(libs))
+    download_files(tasks, callback)
 
-def install_assets(data, instance_dir):
+@tracing.traced()
+def install_assets(data, instance_dir, callback=None):
     if 'assetIndex' not in data: return
     idx = data['assetIndex']
     idx_path = os.path.join(instance_dir, "assets", "indexes", f"{idx['id']}.json")
-    download_file(idx['url'], idx_path)
+    download_file(idx['url'], idx_path, sha1=idx.get('sha1'))
     
     if os.path.exists(idx_path):
         with open(idx_path, 'r') as f: idx_data = json.load(f)
         obj_dir = os.path.join(instance_dir, "assets", "objects")
+        tasks = []
         for obj in idx_data.get('objects', {}).values():
             h = obj['hash']
-            download_file(f"https://resources.download.minecraft.net/{h[:2]}/{h}", os.path.join(obj_dir, h[:2], h), sha1=h)
+            tasks.append({"url": f"https://resources.download.minecraft.net/{h[:2]}/{h}", "path": os.path.join(obj_dir, h[:2], h), "sha1": h, "size": obj.get('size'), "shared": True})
+        download_files(tasks, callback)
+
+def collect_version_files(version_id, instance_dir):
+    """
+    Собирает файлы установленной версии (с учетом inheritsFrom): json, клиент, библиотеки,
+    индекс и объекты ассетов. Возвращает список пар (абсолютный путь, sha1 или None).
+    """
+    files = []
+    seen_versions = set()
+    while version_id and version_id not in seen_versions:
+        seen_versions.add(version_id)
+        ver_dir = os.path.join(instance_dir, "versions", version_id)
+        json_path = os.path.join(ver_dir, f"{version_id}.json")
+        if not os.path.exists(json_path): break
+        with open(json_path, "r") as f: data = json.load(f)
+        files.append((json_path, None))
+
+        client = data.get("downloads", {}).get("client")
+        jar_path = os.path.join(ver_dir, f"{version_id}.jar")
+        if client or os.path.exists(jar_path): files.append((jar_path, client.get("sha1") if client else None))
+
+        lib_dir = os.path.join(instance_dir, "libraries")
+        for lib in data.get("libraries", []):
+            if not check_rules(lib.get("rules")): continue
+            downloads = lib.get("downloads", {})
+            if "artifact" in downloads:
+                art = downloads["artifact"]
+                files.append((os.path.join(lib_dir, art["path"]), art.get("sha1")))
+            elif lib.get("name"):
+                files.append((os.path.join(lib_dir, library_path(lib["name"])), lib.get("sha1")))
+            nat = downloads.get("classifiers", {}).get(f"natives-{get_os_name()}")
+            if nat: files.append((os.path.join(lib_dir, nat["path"]), nat.get("sha1")))
+
+        idx = data.get("assetIndex")
+        if idx:
+            idx_path = os.path.join(instance_dir, "assets", "indexes", f"{idx['id']}.json")
+            files.append((idx_path, idx.get("sha1")))
+            if os.path.exists(idx_path):
+                with open(idx_path, "r") as f: objects = json.load(f).get("objects", {})
+                obj_dir = os.path.join(instance_dir, "assets", "objects")
+                for obj in objects.values():
+                    h = obj["hash"]
+                    files.append((os.path.join(obj_dir, h[:2], h), h))
+        version_id = data.get("inheritsFrom")
+    return files
 
+def deep_verify_instance(instance_dir, callback=None):
+    """Полная параллельная перепроверка всех версий инстанса. Возвращает удаленные поврежденные файлы."""
+    versions_dir = os.path.join(instance_dir, "versions")
+    entries = []
+    if os.path.exists(versions_dir):
+        for version_id in os.listdir(versions_dir):
+            entries.extend(collect_version_files(version_id, instance_dir))
+    if callback: callback.get("setStatus", lambda x: None)(f"Проверка файлов: {len(entries)}")
+    return deep_verify(entries, callback)
+
+@tracing.traced()
+def prefetch_vanilla(version, instance_dir, callback=None):
+    """
+    Заполняет инстанс из общего хранилища (data/store) до запуска minecraft_launcher_lib.
+    Библиотеки, ассеты и клиент связываются ссылками, поэтому библиотека находит их готовыми
+    и не качает повторно для каждого инстанса.
+    """
+    json_path = os.path.join(instance_dir, "versions", version, f"{version}.json")
+    if not os.path.exists(json_path):
+        manifest = http_cache.get_json(VERSION_MANIFEST_URL, "version_manifest")
+        entry = next((v for v in manifest.get("versions", []) if v["id"] == version), None)
+        if not entry: return
+        download_file(entry["url"], json_path, sha1=entry.get("sha1"))
+
+    with open(json_path, "r") as f: data = json.load(f)
+    install_libraries(data, instance_dir, callback)
+    install_assets(data, instance_dir, callback)
+
+    tasks = []
+    client = data.get("downloads", {}).get("client")
+    if client:
+        tasks.append({"url": client["url"], "path": os.path.join(instance_dir, "versions", version, f"{version}.jar"), "sha1": client["sha1"], "size": client.get("size"), "shared": True})
+    log_file = data.get("logging", {}).get("client", {}).get("file")
+    if log_file:
+        tasks.append({"url": log_file["url"], "path": os.path.join(instance_dir, "assets", "log_configs", log_file["id"]), "sha1": log_file["sha1"], "size": log_file.get("size"), "shared": True})
+    download_files(tasks, callback)
+
+@tracing.traced()
 def install_vanilla_manual(version, instance_dir, callback=None):
+    import minecraft_launcher_lib
     print(f"Установка Vanilla {version} через библиотеку...")
     jar_path = os.path.join(instance_dir, "versions", version, f"{version}.jar")
-    if os.path.exists(jar_path):
-        try:
-            with zipfile.ZipFile(jar_path, 'r') as z:
-                if z.testzip() is not None: raise zipfile.BadZipFile("CRC mismatch")
-        except zipfile.BadZipFile:
-            try: os.remove(jar_path)
-            except OSError: pass
+    if os.path.exists(jar_path) and not verify_zip(jar_path):
+        try: os.remove(jar_path)
+        except OSError: pass
 
     if not callback:
         callback = {"setStatus": lambda text: print(f"Status: {text}"), "setProgress": lambda value: None, "setMax": lambda value: None}
     
+    # Рантайм Mojang, который ставит библиотека, кладется в общий data/runtime
+    link_shared_runtime(instance_dir)
+    try: prefetch_vanilla(version, instance_dir, callback)
+    except Exception as e: print(f"Общее хранилище недоступно, обычная установка: {e}")
+
     max_retries = 3
     for attempt in range(max_retries):
         try:
@@ -107,28 +190,27 @@ def install_vanilla_manual(version, instance_dir, callback=None):
             if attempt == max_retries - 1: raise e
             time.sleep(3)
 
-def install_loader(loader_type, version, instance_dir, callback=None, java_path=None):
+@tracing.traced()
+def install_loader(loader_type, version, instance_dir, callback=None, java_path=None, loader_version=None):
     print(f"Запуск ручной установки: {loader_type} для {version}")
     install_vanilla_manual(version, instance_dir, callback)
 
     if loader_type == "Vanilla": return version
-    elif loader_type == "Fabric": return install_fabric_manual(version, instance_dir, callback)
-    elif loader_type == "Quilt": return install_quilt_manual(version, instance_dir, callback)
-    elif loader_type == "Forge": return install_forge_manual(version, instance_dir, java_path, callback)
-    elif loader_type == "NeoForge": return install_neoforge_manual(version, instance_dir, java_path, callback)
+    elif loader_type == "Fabric": return install_fabric_manual(version, instance_dir, callback, loader_version)
+    elif loader_type == "Quilt": return install_quilt_manual(version, instance_dir, callback, loader_version)
+    elif loader_type == "Forge": return install_forge_manual(version, instance_dir, java_path, callback, loader_version)
+    elif loader_type == "NeoForge": return install_neoforge_manual(version, instance_dir, java_path, callback, loader_version)
     return version
 
-def install_fabric_manual(mc_version, mc_dir, callback=None):
+@tracing.traced()
+def install_fabric_manual(mc_version, mc_dir, callback=None, loader_version=None):
+    import minecraft_launcher_lib
     try:
-        url = f"https://meta.fabricmc.net/v2/versions/loader/{mc_version}"
-        resp = requests.get(url, timeout=15); resp.raise_for_status()
-        data = resp.json()
-        if not data: raise Exception(f"Fabric не поддерживает версию {mc_version}")
-        loader_ver = data[0]["loader"]["version"]
+        loader_ver = resolve_loader_version("Fabric", mc_version, loader_version)
+        if not loader_ver: raise Exception(f"Fabric не поддерживает версию {mc_version}")
         
         profile_url = f"https://meta.fabricmc.net/v2/versions/loader/{mc_version}/{loader_ver}/profile/json"
-        resp = requests.get(profile_url, timeout=15); resp.raise_for_status()
-        profile_json = resp.json()
+        profile_json = http_cache.get_json(profile_url, "loader_meta")
         version_id = profile_json["id"]
         
         ver_dir = os.path.join(mc_dir, "versions", version_id)
@@ -145,17 +227,15 @@ def install_fabric_manual(mc_version, mc_dir, callback=None):
     except Exception as e:
         print(f"Ошибка API Fabric: {e}"); raise e
 
-def install_quilt_manual(mc_version, mc_dir, callback=None):
+@tracing.traced()
+def install_quilt_manual(mc_version, mc_dir, callback=None, loader_version=None):
+    import minecraft_launcher_lib
     try:
-        url = f"https://meta.quiltmc.org/v3/versions/loader/{mc_version}"
-        resp = requests.get(url, timeout=15); resp.raise_for_status()
-        data = resp.json()
-        if not data: raise Exception(f"Quilt не поддерживает версию {mc_version}")
-        loader_ver = data[0]["loader"]["version"]
+        loader_ver = resolve_loader_version("Quilt", mc_version, loader_version)
+        if not loader_ver: raise Exception(f"Quilt не поддерживает версию {mc_version}")
         
         profile_url = f"https://meta.quiltmc.org/v3/versions/loader/{mc_version}/{loader_ver}/profile/json"
-        resp = requests.get(profile_url, timeout=15); resp.raise_for_status()
-        profile_json = resp.json()
+        profile_json = http_cache.get_json(profile_url, "loader_meta")
         version_id = profile_json["id"]
         
         ver_dir = os.path.join(mc_dir, "versions", version_id)
@@ -172,11 +252,10 @@ def install_quilt_manual(mc_version, mc_dir, callback=None):
     except Exception as e:
         print(f"Ошибка API Quilt: {e}"); raise e
 
-def install_forge_manual(mc_version, mc_dir, java_path, callback=None):
-    promos_url = "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
-    resp = requests.get(promos_url, timeout=15)
-    promos = resp.json().get("promos", {})
-    forge_ver = promos.get(f"{mc_version}-recommended") or promos.get(f"{mc_version}-latest")
+@tracing.traced()
+def install_forge_manual(mc_version, mc_dir, java_path, callback=None, loader_version=None):
+    import minecraft_launcher_lib
+    forge_ver = resolve_loader_version("Forge", mc_version, loader_version)
     if not forge_ver: raise Exception(f"Forge не найден для {mc_version}")
         
     full_ver = f"{mc_version}-{forge_ver}"
@@ -187,19 +266,16 @@ def install_forge_manual(mc_version, mc_dir, java_path, callback=None):
     os.makedirs(installer_dir, exist_ok=True)
     installer_path = os.path.join(installer_dir, f"forge-{full_ver}-installer.jar")
 
-    id = download_and_run_installer_cached(installer_url, installer_path, mc_dir, expected_id, java_path)
+    java_path = select_java(mc_version, mc_dir, java_path, callback)
+    id = download_and_run_installer_cached(installer_url, installer_path, mc_dir, expected_id, java_path, outputs_key=(mc_version, forge_ver), callback=callback)
     try: minecraft_launcher_lib.install.install_minecraft_version(id, mc_dir, callback=callback)
     except Exception as e: print(f"Warning: Forge library check failed: {e}")
     return id
 
-def install_neoforge_manual(mc_version, mc_dir, java_path, callback=None):
-    meta_url = "https://maven.neoforged.net/releases/net/neoforged/neoforge/maven-metadata.xml"
-    resp = requests.get(meta_url, timeout=15)
-    root = ET.fromstring(resp.content)
-    target_ver = None
-    for ver in root.findall(".//version"):
-        if mc_version in ver.text: target_ver = ver.text
-            
+@tracing.traced()
+def install_neoforge_manual(mc_version, mc_dir, java_path, callback=None, loader_version=None):
+    import minecraft_launcher_lib
+    target_ver = resolve_loader_version("NeoForge", mc_version, loader_version)
     if not target_ver: raise Exception(f"NeoForge установщик не нашел версию для {mc_version}")
 
     installer_url = f"https://maven.neoforged.net/releases/net/neoforged/neoforge/{target_ver}/neoforge-{target_ver}-installer.jar"
@@ -207,18 +283,141 @@ def install_neoforge_manual(mc_version, mc_dir, java_path, callback=None):
     os.makedirs(installer_dir, exist_ok=True)
     installer_path = os.path.join(installer_dir, f"neoforge-{target_ver}-installer.jar")
 
-    id = download_and_run_installer_cached(installer_url, installer_path, mc_dir, f"neoforge-{target_ver}", java_path)
+    java_path = select_java(mc_version, mc_dir, java_path, callback)
+    id = download_and_run_installer_cached(installer_url, installer_path, mc_dir, f"neoforge-{target_ver}", java_path, outputs_key=(mc_version, target_ver), callback=callback)
     try: minecraft_launcher_lib.install.install_minecraft_version(id, mc_dir, callback=callback)
     except Exception as e: print(f"Warning: NeoForge library check failed: {e}")
     return id
 
-def download_and_run_installer_cached(url, installer_path, mc_dir, expected_id, java_path=None):
+def _snapshot_tree(mc_dir, subdirs=("versions", "libraries")):
+    """(size, mtime_ns) для каждого файла в подпапках инстанса - чтобы найти то, что создал инсталлер."""
+    snapshot = {}
+    for sub in subdirs:
+        for root, dirs, files in os.walk(os.path.join(mc_dir, sub)):
+            for name in files:
+                path = os.path.join(root, name)
+                try: st = os.stat(path)
+                except OSError: continue
+                snapshot[os.path.relpath(path, mc_dir)] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+# Установки одного (mc, загрузчик) в разные инстансы работают с одним outputs_dir: выполняются по очереди
+_outputs_locks = {}
+_outputs_locks_guard = threading.Lock()
+
+def _outputs_lock(outputs_dir):
+    key = os.path.normcase(os.path.abspath(outputs_dir))
+    with _outputs_locks_guard: return _outputs_locks.setdefault(key, threading.Lock())
+
+def _restore_installer_outputs(outputs_dir, mc_dir):
+    """Связывает закешированные результаты инсталлера с инстансом. Возвращает outputs.json или None, если кеш неполный."""
+    try:
+        with open(os.path.join(outputs_dir, "outputs.json"), "r") as f: outputs = json.load(f)
+    except (OSError, ValueError): return None
+    files = outputs.get("files", [])
+    if not _outputs_complete(outputs_dir, files, outputs.get("version_id")): return None
+    if not all(os.path.exists(os.path.join(outputs_dir, rel)) for rel in files): return None
+    for rel in files:
+        src, dest = os.path.join(outputs_dir, rel), os.path.join(mc_dir, rel)
+        if os.path.exists(dest) and os.path.samefile(src, dest): continue
+        link_file(src, dest)
+    return outputs
+
+def _library_paths(version_json):
+    """Пути библиотек версии относительно mc_dir: downloads.artifact.path или путь по maven-имени."""
+    paths = []
+    for lib in version_json.get("libraries", []):
+        artifact = (lib.get("downloads") or {}).get("artifact")
+        if artifact and artifact.get("path"):
+            paths.append("libraries/" + artifact["path"])
+            continue
+        if artifact is None and "natives" in lib: continue
+        name, _, ext = lib.get("name", "").partition("@")
+        parts = name.split(":")
+        if len(parts) < 3: continue
+        group, artifact_id, version = parts[0], parts[1], parts[2]
+        classifier = f"-{parts[3]}" if len(parts) > 3 else ""
+        paths.append(f"libraries/{group.replace('.', '/')}/{artifact_id}/{version}/{artifact_id}-{version}{classifier}.{ext or 'jar'}")
+    return paths
+
+def _required_outputs(root, version_id):
+    """Файлы, без которых результат инсталлера неполный: json версии и все ее библиотеки. None, если json нет."""
+    version_rel = f"versions/{version_id}/{version_id}.json"
+    try:
+        with open(os.path.join(root, version_rel), "r", encoding="utf-8") as f: version_json = json.load(f)
+    except (OSError, ValueError): return None
+    return [version_rel] + _library_paths(version_json)
+
+def _outputs_complete(outputs_dir, files, version_id):
+    if not files or not version_id: return False
+    required = _required_outputs(outputs_dir, version_id)
+    if required is None: return False
+    listed = set(os.path.normpath(rel) for rel in files)
+    return all(os.path.normpath(rel) in listed for rel in required)
+
+def _store_installer_outputs(outputs_dir, mc_dir, files, mc_version, loader_version, expected_id, seconds):
+    """
+    Сохраняет результаты инсталлера, только если они полные: json версии и все ее библиотеки.
+    Библиотеки, которые уже лежали в инстансе до запуска, тоже попадают в кеш, чтобы запись была самодостаточной.
+    Возвращает число сохраненных файлов или None, если кешировать нечего.
+    """
+    required = _required_outputs(mc_dir, expected_id)
+    if not files or required is None: return None
+    if not all(os.path.isfile(os.path.join(mc_dir, rel)) for rel in required): return None
+    listed = set(os.path.normpath(rel) for rel in files)
+    files = sorted(files + [os.path.normpath(rel) for rel in required if os.path.normpath(rel) not in listed])
+    for rel in files:
+        link_file(os.path.join(mc_dir, rel), os.path.join(outputs_dir, rel))
+    outputs = {"mc_version": mc_version, "loader_version": loader_version, "version_id": expected_id, "install_seconds": round(seconds, 1), "files": files}
+    temp_path = os.path.join(outputs_dir, "outputs.json.tmp")
+    with open(temp_path, "w") as f: json.dump(outputs, f)
+    os.replace(temp_path, os.path.join(outputs_dir, "outputs.json"))
+    return len(files)
+
+@tracing.traced()
+def download_and_run_installer_cached(url, installer_path, mc_dir, expected_id, java_path=None, outputs_key=None, callback=None):
+    """
+    Запускает Forge/NeoForge инсталлер. Если задан outputs_key = (mc_version, loader_version),
+    результаты (пропатченный клиент, json версии, артефакты процессоров) кешируются в
+    data/modloader/<loader>/outputs/<mc>-<loader> и при повторной установке Java не запускается вовсе.
+    Установки с одним outputs_key выполняются по очереди: вторая дождется первой и возьмет ее результат из кеша.
+    """
+    outputs_dir = os.path.join(os.path.dirname(installer_path), "outputs", "-".join(outputs_key)) if outputs_key else None
+    with _outputs_lock(outputs_dir) if outputs_dir else contextlib.nullcontext():
+        return _run_installer_cached(url, installer_path, mc_dir, expected_id, java_path, outputs_key, outputs_dir, callback)
+
+def _run_installer_cached(url, installer_path, mc_dir, expected_id, java_path, outputs_key, outputs_dir, callback):
+    set_status = (callback or {}).get("setStatus", lambda x: None)
+    started = time.monotonic()
+    if outputs_dir:
+        outputs = _restore_installer_outputs(outputs_dir, mc_dir)
+        if outputs:
+            elapsed = time.monotonic() - started
+            print(f"Кеш инсталлера: попадание {expected_id} за {elapsed:.2f}с (инсталлер занимал {outputs.get('install_seconds', '?')}с)")
+            set_status(f"Кеш загрузчика: {expected_id} ({elapsed:.1f}s)")
+            tracing.count("installer_cache_hits")
+            return expected_id
+        print(f"Кеш инсталлера: промах {expected_id}")
+
     if not os.path.exists(installer_path):
         download_file(url, installer_path)
     print("Запуск инсталлера (требуется Java)...")
+    set_status(f"Установка {expected_id} (Java)...")
     if not os.path.exists(os.path.join(mc_dir, "launcher_profiles.json")):
         with open(os.path.join(mc_dir, "launcher_profiles.json"), "w") as f: json.dump({"profiles": {}}, f)
+    before = _snapshot_tree(mc_dir) if outputs_dir else None
     java_executable = java_path if java_path else "java"
-    subprocess.run([java_executable, "-jar", installer_path, "--installClient", mc_dir], check=True)
+    with tracing.span("installer_subprocess", installer=os.path.basename(installer_path)):
+        subprocess.run([java_executable, "-jar", installer_path, "--installClient", mc_dir], check=True)
 
+    if outputs_dir:
+        elapsed = time.monotonic() - started
+        after = _snapshot_tree(mc_dir)
+        changed = sorted(rel for rel, stamp in after.items() if before.get(rel) != stamp and not rel.endswith((".tmp", ".lnk")))
+        try:
+            stored = _store_installer_outputs(outputs_dir, mc_dir, changed, outputs_key[0], outputs_key[1], expected_id, elapsed)
+            if stored: print(f"Кеш инсталлера: сохранено {stored} файлов для {expected_id}, инсталлер занял {elapsed:.1f}с")
+            else: print(f"Кеш инсталлера: результаты {expected_id} неполные, не кешируются")
+        except OSError as e:
+            print(f"Не удалось закешировать результаты инсталлера: {e}")
     return expected_id
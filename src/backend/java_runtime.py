@@ -0,0 +1,219 @@
+import os
+import re
+import sys
+import glob
+import json
+import shutil
+import threading
+import subprocess
+from .utils import get_data_root, get_os_name
+from . import tracing
+
+RUNTIME_DIR = os.path.join(get_data_root(), "runtime")
+CACHE_PATH = os.path.join(get_data_root(), "cache", "java.json")
+PROBE_TIMEOUT = 15
+DEFAULT_COMPONENTS = {8: "jre-legacy", 16: "java-runtime-alpha", 17: "java-runtime-gamma", 21: "java-runtime-delta"}
+
+def _exe_name():
+    return "java.exe" if sys.platform == "win32" else "java"
+
+def _search_roots():
+    """Каталоги, в которых обычно лежат JDK/JRE; каждый элемент - шаблон для glob."""
+    home = os.path.expanduser("~")
+    os_name = get_os_name()
+    roots = [os.path.join(RUNTIME_DIR, "*", "*", "*"), os.path.join(home, ".jdks", "*"), os.path.join(home, ".sdkman", "candidates", "java", "*")]
+    if os_name == "windows":
+        for base in filter(None, (os.environ.get("ProgramFiles"), os.environ.get("ProgramFiles(x86)"))):
+            for vendor in ("Java", "Eclipse Adoptium", "Eclipse Foundation", "Zulu", "Microsoft", "BellSoft", "Amazon Corretto", "Semeru"):
+                roots.append(os.path.join(base, vendor, "*"))
+    elif os_name == "osx":
+        roots += ["/Library/Java/JavaVirtualMachines/*/Contents/Home", os.path.join(home, "Library", "Java", "JavaVirtualMachines", "*", "Contents", "Home")]
+    else:
+        roots += ["/usr/lib/jvm/*", "/usr/java/*", "/opt/*jdk*", "/opt/*java*"]
+    return roots
+
+def _candidates(extra_dirs=()):
+    found = []
+    for pattern in list(_search_roots()) + [os.path.join(d, "*", "*", "*") for d in extra_dirs]:
+        for home in glob.glob(pattern):
+            exe = os.path.join(home, "bin", _exe_name())
+            if os.path.isfile(exe): found.append(exe)
+    java_home = os.environ.get("JAVA_HOME")
+    if java_home and os.path.isfile(os.path.join(java_home, "bin", _exe_name())): found.append(os.path.join(java_home, "bin", _exe_name()))
+    on_path = shutil.which("java")
+    if on_path: found.append(on_path)
+    return list(dict.fromkeys(os.path.realpath(p) for p in found))
+
+def parse_major(version):
+    """1.8.0_392 -> 8, 17.0.8 -> 17, 21 -> 21."""
+    parts = re.findall(r"\d+", version or "")
+    if not parts: return None
+    return int(parts[1]) if parts[0] == "1" and len(parts) > 1 else int(parts[0])
+
+def probe(java_exe):
+    """Запускает java -XshowSettings:properties -version и достает версию, вендора и архитектуру."""
+    try:
+        kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if sys.platform == "win32" else {}
+        result = subprocess.run([java_exe, "-XshowSettings:properties", "-version"], capture_output=True, text=True, timeout=PROBE_TIMEOUT, **kwargs)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    props = dict(re.findall(r"^\s*([\w.]+) = (.*)$", result.stderr, re.MULTILINE))
+    version = props.get("java.version")
+    if not version:
+        match = re.search(r'version "([^"]+)"', result.stderr)
+        version = match.group(1) if match else None
+    if not version: return None
+    arch = props.get("os.arch", "")
+    return {"version": version, "major": parse_major(version), "vendor": props.get("java.vendor", ""), "arch": arch, "is_64bit": "64" in arch or props.get("sun.arch.data.model") == "64", "home": props.get("java.home")}
+
+class JavaRegistry:
+    """
+    Найденные Java-рантаймы с результатами java -version. Кеш хранится в data/cache/java.json,
+    и исполняемый файл повторно опрашивается только если изменились его размер или mtime.
+    """
+
+    def __init__(self, cache_path=CACHE_PATH):
+        self.cache_path = cache_path
+        self.entries = None
+        self.scanned = False
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if self.entries is not None: return
+        self.entries = {}
+        try:
+            with open(self.cache_path, "r") as f: self.entries = json.load(f)
+        except (OSError, ValueError): pass
+
+    def _save(self):
+        if not self.dirty: return
+        self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path + ".tmp", "w") as f: json.dump(self.entries, f)
+            os.replace(self.cache_path + ".tmp", self.cache_path)
+        except OSError as e:
+            print(f"Не удалось сохранить список Java: {e}")
+
+    def _describe(self, exe):
+        try: st = os.stat(exe)
+        except OSError: return None
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self.entries.get(exe)
+        if entry and entry.get("stamp") == stamp: return entry
+        info = probe(exe)
+        if not info: return None
+        entry = dict(info, path=exe, stamp=stamp)
+        self.entries[exe] = entry
+        self.dirty = True
+        return entry
+
+    def scan(self, force=False, extra_dirs=()):
+        """Список рантаймов. Полный обход диска делается один раз за сеанс (или при force)."""
+        with self.lock:
+            self._load()
+            if self.scanned and not force and not extra_dirs:
+                return [e for e in self.entries.values() if os.path.isfile(e["path"])]
+            runtimes = [e for e in (self._describe(exe) for exe in _candidates(extra_dirs)) if e]
+            for exe in [exe for exe in self.entries if not os.path.isfile(exe)]:
+                del self.entries[exe]
+                self.dirty = True
+            self._save()
+            if not extra_dirs: self.scanned = True
+            return runtimes
+
+    def describe(self, exe):
+        """Сведения о конкретном java (например, заданном пользователем в настройках)."""
+        path = shutil.which(exe) or exe
+        with self.lock:
+            self._load()
+            entry = self._describe(os.path.realpath(path)) if os.path.isfile(path) else None
+            self._save()
+            return entry
+
+    def find(self, major, extra_dirs=()):
+        """Лучший рантайм с нужной мажорной версией: 64-битный, затем самый новый."""
+        matching = [e for e in self.scan(extra_dirs=extra_dirs) if e["major"] == major]
+        if not matching: return None
+        return max(matching, key=lambda e: (e["is_64bit"], [int(p) for p in re.findall(r"\d+", e["version"])]))["path"]
+
+JAVA_REGISTRY = JavaRegistry()
+
+def version_java_requirement(version_id, instance_dir):
+    """(majorVersion, component) из javaVersion в json версии с учетом inheritsFrom; для старых версий - Java 8."""
+    current = version_id
+    while current:
+        try:
+            with open(os.path.join(instance_dir, "versions", current, f"{current}.json"), "r") as f: data = json.load(f)
+        except (OSError, ValueError): break
+        java_version = data.get("javaVersion")
+        if java_version:
+            return java_version.get("majorVersion", 8), java_version.get("component") or DEFAULT_COMPONENTS.get(java_version.get("majorVersion"))
+        current = data.get("inheritsFrom")
+    return 8, DEFAULT_COMPONENTS[8]
+
+def link_shared_runtime(instance_dir):
+    """
+    Делает instance_dir/runtime ссылкой на общий data/runtime, чтобы рантаймы Mojang,
+    которые minecraft_launcher_lib ставит при установке версии, скачивались один раз на все инстансы.
+    Уже существующий каталог runtime инстанса не трогается.
+    """
+    link = os.path.join(instance_dir, "runtime")
+    if os.path.lexists(link): return os.path.realpath(link) == os.path.realpath(RUNTIME_DIR)
+    os.makedirs(RUNTIME_DIR, exist_ok=True)
+    try:
+        os.symlink(RUNTIME_DIR, link, target_is_directory=True)
+        return True
+    except OSError:
+        if sys.platform != "win32": return False
+    try:
+        # Junction на Windows не требует прав администратора, в отличие от symlink
+        import _winapi
+        _winapi.CreateJunction(RUNTIME_DIR, link)
+        return True
+    except (ImportError, OSError):
+        return False
+
+@tracing.traced()
+def install_shared_runtime(component, callback=None):
+    """Ставит рантайм Mojang в общий data/runtime и возвращает путь к java."""
+    import minecraft_launcher_lib
+    root = get_data_root()
+    exe = minecraft_launcher_lib.runtime.get_executable_path(component, root)
+    if exe: return exe
+    minecraft_launcher_lib.runtime.install_jvm_runtime(component, root, callback=callback)
+    return minecraft_launcher_lib.runtime.get_executable_path(component, root)
+
+def windowless_java(java_exe):
+    """На Windows игра запускается через javaw.exe из того же каталога, чтобы не открывалась консоль."""
+    if sys.platform != "win32" or os.path.basename(java_exe).lower() != "java.exe": return java_exe
+    javaw = os.path.join(os.path.dirname(java_exe), "javaw.exe")
+    return javaw if os.path.isfile(javaw) else java_exe
+
+@tracing.traced()
+def select_java(version_id, instance_dir, preferred=None, callback=None):
+    """
+    Выбирает java для версии: preferred (путь из настроек), если его мажорная версия подходит;
+    иначе подходящий найденный рантайм (включая runtime инстанса); иначе ставит рантайм Mojang в data/runtime.
+    Если ничего не вышло, возвращает preferred или "java".
+    """
+    major, component = version_java_requirement(version_id, instance_dir)
+    if preferred and preferred != "java":
+        info = JAVA_REGISTRY.describe(preferred)
+        if info and info["major"] == major: return preferred
+        print(f"Java {preferred} ({info['version'] if info else 'недоступна'}) не подходит для {version_id}: нужна Java {major}")
+
+    instance_runtime = os.path.join(instance_dir, "runtime")
+    extra = [instance_runtime] if os.path.isdir(instance_runtime) and os.path.realpath(instance_runtime) != os.path.realpath(RUNTIME_DIR) else []
+    found = JAVA_REGISTRY.find(major, extra_dirs=extra)
+    if found: return found
+    if component:
+        try:
+            exe = install_shared_runtime(component, callback)
+            if exe:
+                JAVA_REGISTRY.scan(force=True)
+                return exe
+        except Exception as e:
+            print(f"Не удалось установить рантайм {component}: {e}")
+    return preferred or "java"
@@ -0,0 +1,283 @@
+import time
+import heapq
+import itertools
+import functools
+import threading
+
+# Приоритеты задач: меньше - важнее. Интерактивные задачи (запуск игры) не ждут общего лимита
+# параллельных задач, а во время их загрузок фоновые получают лишь долю полосы.
+INTERACTIVE = 0
+INSTALL = 10
+MAINTENANCE = 20
+BACKGROUND = 30
+
+MAX_RUNNING = 2
+BACKGROUND_SHARE = 0.25
+INTERACTIVE_HOLD = 1.0
+KEEP_FINISHED = 20
+NOTIFY_INTERVAL = 0.25
+
+# detached - задача еще выполняется, но уже отпустила инстанс (запущенная игра): блокирует удаление,
+# а задачи, меняющие содержимое инстанса (все, кроме readonly), ждут ее завершения
+ACTIVE_STATES = ("queued", "running", "detached")
+
+_local = threading.local()
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    def __init__(self, scheduler, job_id, kind, instance, fn, title, priority, key, readonly=False):
+        self.scheduler = scheduler
+        self.id = job_id
+        self.kind = kind
+        self.instance = instance
+        self.fn = fn
+        self.title = title
+        self.priority = priority
+        self.key = key
+        self.readonly = readonly
+        self.state = "queued"
+        self.status = ""
+        self.progress = None
+        self.bytes = 0
+        self.error = None
+        self.result = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.on_cancel = None
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        """Точка отмены: бросает JobCancelled, если задачу отменили."""
+        if self.cancel_event.is_set(): raise JobCancelled(self.title)
+
+    def detach(self):
+        """Отпускает инстанс, не завершая задачу: ожидающие readonly-задачи того же инстанса могут стартовать."""
+        self.scheduler._detach(self)
+
+    def update(self, status=None, progress=None):
+        if status is not None: self.status = status
+        if progress is not None: self.progress = progress
+        self.scheduler._changed(force=False)
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.result
+
+    def public(self):
+        return {"id": self.id, "kind": self.kind, "instance": self.instance, "title": self.title, "priority": self.priority, "state": self.state, "status": self.status, "progress": self.progress, "bytes": self.bytes, "error": self.error, "created": self.created, "started": self.started, "finished": self.finished}
+
+class Bandwidth:
+    """
+    Общий бюджет скорости загрузок всех задач (token bucket, bandwidth_limit_kbps в launcher_config.json).
+    Пока идут загрузки интерактивной задачи, байты фоновых стоят в 1/BACKGROUND_SHARE раз дороже.
+    """
+
+    def __init__(self):
+        self.rate = 0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.interactive_until = 0.0
+        self.lock = threading.Lock()
+
+    def configure(self, limit_kbps):
+        with self.lock:
+            self.rate = max(0, int(limit_kbps or 0)) * 1024
+            self.tokens = float(self.rate)
+            self.updated = time.monotonic()
+
+    def consume(self, n, priority, job=None):
+        now = time.monotonic()
+        with self.lock:
+            if priority <= INTERACTIVE: self.interactive_until = now + INTERACTIVE_HOLD
+            if not self.rate: return
+            cost = n if priority <= INTERACTIVE or now > self.interactive_until else n / BACKGROUND_SHARE
+            self.tokens = min(float(self.rate), self.tokens + (now - self.updated) * self.rate) - cost
+            self.updated = now
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay > 0: sleep(delay, job)
+
+BANDWIDTH = Bandwidth()
+
+def current():
+    """Задача, в которой выполняется текущий поток (или None)."""
+    return getattr(_local, "job", None)
+
+def check():
+    job = current()
+    if job is not None: job.check()
+
+def sleep(seconds, job=None):
+    """time.sleep, прерываемый отменой задачи."""
+    job = job or current()
+    if job is None: return time.sleep(seconds)
+    if job.cancel_event.wait(seconds): job.check()
+
+def wait(event, poll=0.25):
+    """Ждет threading.Event, проверяя отмену текущей задачи."""
+    job = current()
+    while not event.wait(poll):
+        if job is not None: job.check()
+
+def transfer(n):
+    """Вызывается загрузчиком на каждый принятый блок: учет байтов, бюджет скорости и точка отмены."""
+    job = current()
+    if job is not None:
+        job.check()
+        job.bytes += n
+    BANDWIDTH.consume(n, job.priority if job is not None else INSTALL, job)
+
+def wrap(fn):
+    """Переносит текущую задачу в поток пула, чтобы его загрузки учитывались и отменялись вместе с ней."""
+    job = current()
+    if job is None: return fn
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        saved = current()
+        _local.job = job
+        try: return fn(*args, **kwargs)
+        finally: _local.job = saved
+    return wrapper
+
+class JobScheduler:
+    """
+    Очередь задач лаунчера (установки, импорт модпаков, обновления, запуски).
+    - Для инстанса одновременно выполняется не больше одной задачи; остальные ждут в очереди.
+      Долгая задача (игра после старта процесса) может отпустить инстанс через job.detach(); пока она идет,
+      инстанс помечен как занятый игрой и из его задач стартуют только readonly (не меняющие файлы).
+    - Из очереди первой берется задача с меньшим priority; не интерактивных выполняется не больше max_running.
+    - Повторная отправка той же задачи (kind, instance, key), пока она не завершилась, возвращает существующую.
+    - cancel() снимает задачу из очереди или просит выполняющуюся остановиться в ближайшей точке отмены.
+    on_change(list) получает состояние очереди при изменениях (прогресс - не чаще раза в NOTIFY_INTERVAL).
+    """
+
+    def __init__(self, max_running=MAX_RUNNING, on_change=None):
+        self.max_running = max_running
+        self.on_change = on_change
+        self.queue = []
+        self.jobs = {}
+        self.running = set()
+        self.locked = {}
+        self.playing = {}
+        self.ids = itertools.count(1)
+        self.last_notify = 0.0
+        self.lock = threading.Lock()
+
+    def configure(self, max_running=None):
+        if max_running:
+            with self.lock: self.max_running = max(1, int(max_running))
+            self._dispatch()
+
+    def submit(self, kind, instance, fn, title=None, priority=INSTALL, key=None, readonly=False):
+        """
+        fn(job) выполняется в отдельном потоке, когда дойдет очередь и освободится инстанс.
+        readonly=True - задача не меняет файлы инстанса и может идти, пока в нем запущена игра.
+        """
+        with self.lock:
+            for job in self.jobs.values():
+                if job.state in ACTIVE_STATES and (job.kind, job.instance, job.key) == (kind, instance, key): return job
+            job = Job(self, next(self.ids), kind, instance, fn, title or kind, priority, key, readonly)
+            self.jobs[job.id] = job
+            heapq.heappush(self.queue, (priority, job.id, job))
+        self._dispatch()
+        self._changed()
+        return job
+
+    def busy(self, instance):
+        """Есть ли у инстанса выполняющаяся или ожидающая задача."""
+        with self.lock: return any(j.instance == instance and j.state in ACTIVE_STATES for j in self.jobs.values())
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.state not in ACTIVE_STATES: return False
+            job.cancel_event.set()
+            on_cancel = job.on_cancel if job.state in ("running", "detached") else None
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.finished = time.time()
+                job.done.set()
+        if on_cancel:
+            try: on_cancel()
+            except Exception as e: print(f"Job cancel error: {e}")
+        self._changed()
+        return True
+
+    def list(self):
+        """Активные задачи в порядке выполнения, затем последние завершенные."""
+        with self.lock: jobs = list(self.jobs.values())
+        active = sorted((j for j in jobs if j.state in ACTIVE_STATES), key=lambda j: (j.state == "queued", j.priority, j.id))
+        finished = sorted((j for j in jobs if j.state not in ACTIVE_STATES), key=lambda j: -(j.finished or 0))
+        return [j.public() for j in active + finished]
+
+    def _dispatch(self):
+        started, deferred = [], []
+        with self.lock:
+            while self.queue:
+                item = heapq.heappop(self.queue)
+                job = item[2]
+                if job.state != "queued": continue
+                full = job.priority > INTERACTIVE and sum(1 for j in self.running if j.priority > INTERACTIVE) >= self.max_running
+                playing = job.instance in self.playing and not job.readonly
+                if full or playing or (job.instance is not None and job.instance in self.locked):
+                    deferred.append(item)
+                    continue
+                job.state = "running"
+                job.started = time.time()
+                self.running.add(job)
+                if job.instance is not None: self.locked[job.instance] = job
+                started.append(job)
+            for item in deferred: heapq.heappush(self.queue, item)
+        for job in started:
+            threading.Thread(target=self._run, args=(job,), name=f"job-{job.kind}-{job.id}", daemon=True).start()
+
+    def _detach(self, job):
+        with self.lock:
+            if job.state != "running": return
+            job.state = "detached"
+            if self.locked.get(job.instance) is job: del self.locked[job.instance]
+            if job.instance is not None: self.playing[job.instance] = job
+        self._dispatch()
+        self._changed()
+
+    def _run(self, job):
+        _local.job = job
+        try:
+            job.result = job.fn(job)
+            job.state = "cancelled" if job.cancelled() else "done"
+        except JobCancelled:
+            job.state = "cancelled"
+        except Exception as e:
+            print(f"Job {job.kind} ({job.instance}) failed: {e}")
+            job.state = "failed"
+            job.error = str(e)
+        finally:
+            _local.job = None
+            job.finished = time.time()
+            with self.lock:
+                self.running.discard(job)
+                if self.locked.get(job.instance) is job: del self.locked[job.instance]
+                if self.playing.get(job.instance) is job: del self.playing[job.instance]
+                self._prune()
+            job.done.set()
+            self._dispatch()
+            self._changed()
+
+    def _prune(self):
+        finished = sorted((j for j in self.jobs.values() if j.state not in ACTIVE_STATES), key=lambda j: j.finished or 0)
+        for job in finished[:-KEEP_FINISHED]: del self.jobs[job.id]
+
+    def _changed(self, force=True):
+        if not self.on_change: return
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_notify < NOTIFY_INTERVAL: return
+            self.last_notify = now
+        try: self.on_change(self.list())
+        except Exception as e: print(f"Job notify error: {e}")
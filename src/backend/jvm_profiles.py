@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from statistics import median
+from .utils import get_data_root
+
+PROFILES = ("default", "g1", "zgc", "low_memory")
+LAUNCH_STATS_PATH = os.path.join(get_data_root(), "cache", "launch_times.json")
+KEEP_LAUNCHES = 10
+CDS_ARCHIVE = "appcds.jsa"
+CDS_STATE = "appcds.json"
+CDS_MIN_JAVA = 13
+# Строка, которую пишет звуковой движок при выходе в главное меню (одинакова для vanilla, Fabric и Forge)
+MAIN_MENU_PATTERN = re.compile(r"Sound engine started")
+
+# Флаги G1 для клиента с модами (по мотивам широко используемых флагов Aikar)
+G1_FLAGS = ["-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200", "-XX:+UnlockExperimentalVMOptions", "-XX:+DisableExplicitGC", "-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40", "-XX:G1HeapRegionSize=8M", "-XX:G1ReservePercent=20", "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4", "-XX:InitiatingHeapOccupancyPercent=15", "-XX:G1MixedGCLiveThresholdPercent=90", "-XX:SurvivorRatio=32", "-XX:MaxTenuringThreshold=1"]
+
+def resolve_settings(global_settings, instance_config):
+    """Итоговые настройки JVM: ключи jvm_profile, appcds, ram_mb и jvm_args из instance_config.json перекрывают глобальные."""
+    settings = dict(global_settings)
+    for key in ("jvm_profile", "appcds", "ram_mb", "jvm_args"):
+        if instance_config.get(key) not in (None, ""): settings[key] = instance_config[key]
+    if settings.get("jvm_profile") not in PROFILES: settings["jvm_profile"] = "default"
+    return settings
+
+def jvm_arguments(profile, ram_mb, java_major=None):
+    """Флаги кучи и GC для профиля. Возвращает (аргументы, фактический профиль) - ZGC на старой или неизвестной Java заменяется на G1."""
+    ram_mb = int(ram_mb)
+    if profile == "zgc" and (not java_major or java_major < 15):
+        print(f"ZGC требует Java 15+, а выбрана Java {java_major or 'неизвестной версии'}: используется профиль g1")
+        profile = "g1"
+    if profile == "g1": return [f"-Xmx{ram_mb}M", f"-Xms{ram_mb}M"] + G1_FLAGS, profile
+    if profile == "zgc":
+        args = [f"-Xmx{ram_mb}M", f"-Xms{ram_mb}M", "-XX:+UseZGC"]
+        # В 21-22 поколенческий режим включается флагом, с 23 он по умолчанию
+        if java_major in (21, 22): args.append("-XX:+ZGenerational")
+        return args, profile
+    if profile == "low_memory":
+        # Маленькая стартовая куча и Serial GC: меньше потоков GC и резидентной памяти на слабых машинах
+        return [f"-Xmx{ram_mb}M", f"-Xms{min(ram_mb, 512)}M", "-XX:+UseSerialGC", "-XX:MinHeapFreeRatio=10", "-XX:MaxHeapFreeRatio=30"], profile
+    return [f"-Xmx{ram_mb}M", f"-Xms{ram_mb}M"], "default"
+
+def extra_arguments(value):
+    """jvm_args из конфига: список или строка через пробелы."""
+    if isinstance(value, str): return value.split()
+    return [str(v) for v in value or []]
+
+def cds_fingerprint(instance_dir, version_id, java_info, profile):
+    """Отпечаток условий, при которых архив валиден: Java, версия игры, профиль GC и набор модов."""
+    h = hashlib.sha1()
+    h.update(json.dumps([java_info.get("path"), java_info.get("version"), java_info.get("vendor"), version_id, profile]).encode())
+    mods_dir = os.path.join(instance_dir, "mods")
+    try: names = sorted(f for f in os.listdir(mods_dir) if f.endswith(".jar"))
+    except OSError: names = []
+    for name in names:
+        try: st = os.stat(os.path.join(mods_dir, name))
+        except OSError: continue
+        h.update(f"{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+class AppCds:
+    """
+    Динамический архив AppCDS инстанса (instance_dir/appcds.jsa). Первый запуск записывает архив
+    через -XX:ArchiveClassesAtExit, следующие подключают его через -XX:SharedArchiveFile.
+    Если изменились моды, Java или профиль, архив удаляется и записывается заново.
+    """
+
+    def __init__(self, instance_dir, fingerprint):
+        self.archive = os.path.join(instance_dir, CDS_ARCHIVE)
+        self.state_path = os.path.join(instance_dir, CDS_STATE)
+        self.fingerprint = fingerprint
+        self.recording = False
+
+    def _state(self):
+        try:
+            with open(self.state_path, "r") as f: return json.load(f)
+        except (OSError, ValueError): return {}
+
+    def arguments(self):
+        if self._state().get("fingerprint") == self.fingerprint and os.path.isfile(self.archive):
+            return [f"-XX:SharedArchiveFile={self.archive}", "-Xshare:auto"]
+        for path in (self.archive, self.state_path):
+            try: os.remove(path)
+            except OSError: pass
+        self.recording = True
+        return [f"-XX:ArchiveClassesAtExit={self.archive}"]
+
+    def finish(self):
+        """После выхода из игры: архив пишется JVM при нормальном завершении, иначе запись повторится в следующий раз."""
+        if not self.recording: return False
+        if not os.path.isfile(self.archive): return False
+        with open(self.state_path + ".tmp", "w") as f: json.dump({"fingerprint": self.fingerprint, "created": time.time(), "size": os.path.getsize(self.archive)}, f)
+        os.replace(self.state_path + ".tmp", self.state_path)
+        return True
+
+class LaunchStats:
+    """Время от запуска процесса до главного меню по инстансам и профилям (последние KEEP_LAUNCHES запусков)."""
+
+    def __init__(self, path=LAUNCH_STATS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f: return json.load(f)
+        except (OSError, ValueError): return {}
+
+    def record(self, instance_name, profile_key, seconds):
+        with self.lock:
+            data = self._load()
+            runs = data.setdefault(instance_name, {}).setdefault(profile_key, [])
+            runs.append(round(seconds, 2))
+            del runs[:-KEEP_LAUNCHES]
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path + ".tmp", "w") as f: json.dump(data, f)
+                os.replace(self.path + ".tmp", self.path)
+            except OSError as e:
+                print(f"Не удалось сохранить время запуска: {e}")
+
+    def summary(self, instance_name):
+        """{профиль: {"last", "median", "runs"}}"""
+        with self.lock: runs_by_profile = self._load().get(instance_name, {})
+        return {key: {"last": runs[-1], "median": round(median(runs), 2), "runs": len(runs)} for key, runs in runs_by_profile.items() if runs}
+
+    def remove(self, instance_name):
+        with self.lock:
+            data = self._load()
+            if data.pop(instance_name, None) is None: return
+            try:
+                with open(self.path + ".tmp", "w") as f: json.dump(data, f)
+                os.replace(self.path + ".tmp", self.path)
+            except OSError: pass
+
+class MainMenuTimer:
+    """Ловит в выводе игры момент выхода в главное меню и возвращает прошедшее с запуска время."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.elapsed = None
+
+    def feed(self, line):
+        if self.elapsed is None and MAIN_MENU_PATTERN.search(line):
+            self.elapsed = time.monotonic() - self.started
+            return self.elapsed
+        return None
+
+def profile_key(profile, cds_used):
+    return f"{profile}+appcds" if cds_used else profile
+
+def format_summary(summary, current_key):
+    others = ", ".join(f"{key}: {stats['median']}s" for key, stats in sorted(summary.items()) if key != current_key)
+    current = summary.get(current_key)
+    if not current: return others
+    text = f"median {current['median']}s over {current['runs']} launches"
+    return f"{text}; {others}" if others else text
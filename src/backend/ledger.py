@@ -0,0 +1,85 @@
+import os
+import json
+import threading
+
+class VerifyLedger:
+    """
+    Постоянный журнал проверенных файлов: путь -> (size, mtime_ns, inode) и проверенный sha1.
+    Если метаданные файла не изменились с прошлой проверки, повторно хешировать его не нужно.
+    """
+
+    def __init__(self, ledger_path):
+        self.ledger_path = ledger_path
+        self.entries = None
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if self.entries is not None: return
+        self.entries = {}
+        try:
+            with open(self.ledger_path, "r") as f: self.entries = json.load(f)
+        except (OSError, ValueError): pass
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def _stamp(st):
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def lookup(self, path, field="sha1"):
+        """Возвращает сохраненное значение поля, если файл не менялся с момента проверки."""
+        try: st = os.stat(path)
+        except OSError: return None
+        with self.lock:
+            self._load()
+            entry = self.entries.get(self._key(path))
+        if not entry or entry.get("stamp") != self._stamp(st): return None
+        return entry.get(field)
+
+    def record(self, path, st=None, **fields):
+        """Запоминает результат проверки. st - os.stat, снятый до чтения файла."""
+        try: st = st or os.stat(path)
+        except OSError: return
+        key, stamp = self._key(path), self._stamp(st)
+        with self.lock:
+            self._load()
+            entry = self.entries.get(key)
+            if not entry or entry.get("stamp") != stamp: entry = {"stamp": stamp}
+            entry.update(fields)
+            self.entries[key] = entry
+            self.dirty = True
+
+    def forget(self, path):
+        with self.lock:
+            self._load()
+            if self.entries.pop(self._key(path), None) is not None: self.dirty = True
+
+    def prune(self):
+        """Выбрасывает записи файлов, которых больше нет (удаленные инстансы, замененные моды). Возвращает их число."""
+        with self.lock:
+            self._load()
+            keys = list(self.entries)
+        missing = [key for key in keys if not os.path.exists(key)]
+        with self.lock:
+            for key in missing: self.entries.pop(key, None)
+            if missing: self.dirty = True
+        return len(missing)
+
+    def save(self):
+        """Сохраняет журнал, если он менялся; перед записью из него удаляются записи исчезнувших файлов."""
+        with self.lock:
+            if not self.dirty: return
+        self.prune()
+        with self.lock:
+            data = json.dumps(self.entries, separators=(",", ":"))
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.ledger_path), exist_ok=True)
+            temp_path = self.ledger_path + ".tmp"
+            with open(temp_path, "w") as f: f.write(data)
+            os.replace(temp_path, self.ledger_path)
+        except OSError as e:
+            print(f"Не удалось сохранить журнал проверок: {e}")
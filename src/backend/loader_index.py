@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from .utils import get_data_root
+from . import http_cache
+
+INDEX_PATH = os.path.join(get_data_root(), "modloader", "loader_index.json")
+REFRESH_INTERVAL = 300
+
+# Источник -> (url, класс кеша http_cache)
+SOURCES = {
+    "fabric_game": ("https://meta.fabricmc.net/v2/versions/game", "loader_meta"),
+    "fabric_loader": ("https://meta.fabricmc.net/v2/versions/loader", "loader_meta"),
+    "quilt_game": ("https://meta.quiltmc.org/v3/versions/game", "loader_meta"),
+    "quilt_loader": ("https://meta.quiltmc.org/v3/versions/loader", "loader_meta"),
+    "forge_maven": ("https://maven.minecraftforge.net/net/minecraftforge/forge/maven-metadata.xml", "maven_metadata"),
+    "forge_promos": ("https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json", "forge_promos"),
+    "neoforge_maven": ("https://maven.neoforged.net/releases/net/neoforged/neoforge/maven-metadata.xml", "maven_metadata"),
+}
+
+_index = None
+_last_refresh = {}
+_lock = threading.Lock()
+
+def neoforge_mc_version(neo_version):
+    """20.4.80-beta -> 1.20.4, 21.0.10 -> 1.21. Для снапшотных сборок возвращает None."""
+    parts = neo_version.split("-")[0].split(".")
+    if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit(): return None
+    major, minor = int(parts[0]), int(parts[1])
+    if major < 20: return None
+    return f"1.{major}" if minor == 0 else f"1.{major}.{minor}"
+
+def _maven_versions(body):
+    import xml.etree.ElementTree as ET
+    return [v.text for v in ET.fromstring(body).findall(".//version") if v.text]
+
+def _parse_source(name, body):
+    """Превращает ответ источника в компактную структуру для индекса."""
+    if name in ("fabric_game", "quilt_game"):
+        return [g["version"] for g in json.loads(body)]
+    if name in ("fabric_loader", "quilt_loader"):
+        return [{"version": l["version"], "stable": l.get("stable", "beta" not in l["version"])} for l in json.loads(body)]
+    if name == "forge_promos":
+        return json.loads(body).get("promos", {})
+    if name == "forge_maven":
+        builds = {}
+        for v in reversed(_maven_versions(body)):
+            mc, _, forge_ver = v.partition("-")
+            if forge_ver: builds.setdefault(mc, []).append(forge_ver)
+        return builds
+    if name == "neoforge_maven":
+        builds = {}
+        for v in reversed(_maven_versions(body)):
+            mc = neoforge_mc_version(v)
+            if mc: builds.setdefault(mc, []).append(v)
+        return builds
+    return None
+
+def _load_index():
+    try:
+        with open(INDEX_PATH, "r") as f: return json.load(f)
+    except (OSError, ValueError): return {"sources": {}}
+
+def _save_index(index):
+    os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+    with open(INDEX_PATH + ".tmp", "w") as f: json.dump(index, f)
+    os.replace(INDEX_PATH + ".tmp", INDEX_PATH)
+
+def refresh(names=None, force=False):
+    """
+    Обновляет каталог (все источники или только names). Ответы берутся через http_cache
+    (304 или вовсе без сети), а разбирается заново только источник, содержимое которого изменилось.
+    """
+    global _index
+    with _lock:
+        if _index is None: _index = _load_index()
+        changed = False
+        now = time.monotonic()
+        for name in names or SOURCES:
+            if not force and now - _last_refresh.get(name, -REFRESH_INTERVAL) < REFRESH_INTERVAL: continue
+            url, kind = SOURCES[name]
+            try: body = http_cache.fetch(url, kind)
+            except Exception as e:
+                print(f"Каталог загрузчиков: источник {name} недоступен: {e}")
+                _last_refresh[name] = now - REFRESH_INTERVAL + 30 # повторная попытка не раньше чем через 30 с
+                continue
+            _last_refresh[name] = now
+            stamp = hashlib.sha1(body).hexdigest()
+            if _index["sources"].get(name, {}).get("stamp") == stamp: continue
+            try: data = _parse_source(name, body)
+            except Exception as e:
+                print(f"Каталог загрузчиков: не удалось разобрать {name}: {e}")
+                continue
+            if name in ("fabric_game", "quilt_game"): data = {g: True for g in data}
+            _index["sources"][name] = {"stamp": stamp, "data": data}
+            changed = True
+        if changed:
+            try: _save_index(_index)
+            except OSError as e: print(f"Каталог загрузчиков: не удалось сохранить: {e}")
+        return _index
+
+def _source(name):
+    return refresh([name])["sources"].get(name, {}).get("data") or {}
+
+def get_loader_versions(loader_type, mc_version):
+    """Список сборок загрузчика для версии Minecraft, от новых к старым: [{"version", "stable", "recommended"}]."""
+    if loader_type in ("Fabric", "Quilt"):
+        prefix = loader_type.lower()
+        if mc_version not in _source(f"{prefix}_game"): return []
+        return [dict(l, recommended=False) for l in _source(f"{prefix}_loader")]
+    if loader_type == "Forge":
+        promos = _source("forge_promos")
+        recommended = promos.get(f"{mc_version}-recommended")
+        return [{"version": v, "stable": True, "recommended": v == recommended} for v in _source("forge_maven").get(mc_version, [])]
+    if loader_type == "NeoForge":
+        return [{"version": v, "stable": "beta" not in v, "recommended": False} for v in _source("neoforge_maven").get(mc_version, [])]
+    return []
+
+def resolve_loader_version(loader_type, mc_version, preferred=None):
+    """
+    Выбирает сборку загрузчика: явно заданную (если она есть в каталоге), иначе рекомендованную/последнюю стабильную.
+    Версия Minecraft сравнивается точно, поэтому 1.20 не совпадает со сборками 1.20.1.
+    """
+    if loader_type == "Forge" and not preferred:
+        promos = _source("forge_promos")
+        promo = promos.get(f"{mc_version}-recommended") or promos.get(f"{mc_version}-latest")
+        if promo: return promo
+    builds = get_loader_versions(loader_type, mc_version)
+    if preferred:
+        return preferred if any(b["version"] == preferred for b in builds) or not builds else None
+    stable = next((b["version"] for b in builds if b["stable"]), None)
+    return stable or (builds[0]["version"] if builds else None)
@@ -0,0 +1,418 @@
+import os
+import re
+import json
+import gzip
+import mmap
+import time
+import queue
+import threading
+from .gamelog import LOG_NAME, ARCHIVE_DIR, zstandard
+
+INDEX_VERSION = 1
+MAX_EVENTS_PER_FILE = 2000
+MAX_FRAMES = 64
+MESSAGE_LIMIT = 300
+ATTACH_SLACK = 512
+CHUNK_SIZE = 16 * 1024 * 1024
+SEARCH_LIMIT = 200
+TOP_SIGNATURES = 20
+
+# Модули и jar, которые встречаются в стектрейсах любой сборки и модом не являются
+NOT_MODS = {"minecraft", "forge", "neoforge", "fmlloader", "fmlcore", "fmlearlydisplay", "javafmllanguage", "lowcodelanguage", "mclanguage", "fabricloader", "mixin", "java", "client", "client-intermediary"}
+PLATFORM_FRAMES = ("java.", "javax.", "jdk.", "sun.", "com.sun.", "kotlin.", "scala.", "org.spongepowered.asm.", "cpw.mods.", "net.fabricmc.loader.")
+
+# Одна строка-начало события: строка log4j уровня WARN+ (текстовая или XML-раскладка из ванильного
+# log4j-конфига), исключение (в том числе внутри <log4j:Throwable>), описание краш-репорта или сигнал из hs_err
+_EVENT = re.compile(b"|".join([
+    rb'^\[(?P<clock>[^\]\r\n]{1,40})\] \[[^\]\r\n]*?/(?P<level>WARN|ERROR|FATAL)\][^:\r\n]*: ?(?P<msg>[^\r\n]*)',
+    rb'^<log4j:Event [^>]*?timestamp="(?P<xts>\d+)" level="(?P<xlevel>WARN|ERROR|FATAL)"[^>]*>\s*<log4j:Message><!\[CDATA\[(?P<xmsg>[^\r\n]*?)(?:\]\]>|\r?$)',
+    rb'^(?:<log4j:Throwable><!\[CDATA\[)?(?P<cause>Caused by: )?(?:Exception in thread "[^"\r\n]*" )?(?P<exc>(?:[A-Za-z_$][\w$]*\.)+[A-Z][\w$]*(?:Exception|Error|Throwable))(?:: ?(?P<excmsg>[^\r\n]*))?\r?$',
+    rb'^Description: (?P<desc>[^\r\n]*)',
+    rb'^#  ?(?P<signal>SIGSEGV|SIGBUS|SIGILL|SIGFPE|SIGABRT|EXCEPTION_\w+|Internal Error|There is insufficient memory)[^\r\n]*',
+]), re.M)
+# Подстроки, без которых строка не может начинать событие. Поиск подстрок в mmap идет на скорости памяти,
+# а полная регулярка применяется только к найденным строкам, а не к каждой позиции файла
+TRIGGERS = (b"WARN", b"ERROR", b"FATAL", b"Exception", b"Error", b"Throwable", b"Description: ", b"#  ", b"# There is")
+_FRAMES = re.compile(rb'(?:\r?\n[ \t]*at [^\r\n]*)+')
+_FRAME = re.compile(rb'at (?:[\w-]+/)?(?:(?P<module>[a-z][\w.-]*)@[^/\s]*/)?(?P<method>[\w$.<>/-]+)\([^)\r\n]*\)(?: ~?\[(?P<jar>[^\]:\r\n]*))?')
+_MIXIN = re.compile(rb'\$zz[a-z]\d{3}\$([a-z][a-z0-9_]{1,63})\$')
+_PROBLEM_FRAME = re.compile(rb'^# Problematic frame:\r?\n# ?([^\r\n]*)', re.M)
+_HEX = re.compile(r'\+?0x[0-9a-fA-F]+')
+_DIGITS = re.compile(r'\d+')
+_JAR_VERSION = re.compile(r'[-_+]v?\d.*$')
+
+def _text(value, limit=MESSAGE_LIMIT):
+    return value.decode("utf-8", errors="replace").strip()[:limit] if value else ""
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    except OSError: return None
+
+def log_files(instance_dir):
+    """Логи инстанса: {путь относительно инстанса: вид} - game (вывод игры и логи Minecraft), crash, jvm (hs_err)."""
+    found = {}
+    def add(folder, kind, accept):
+        try: names = os.listdir(os.path.join(instance_dir, folder))
+        except OSError: return
+        for name in names:
+            if accept(name) and not name.endswith(".tmp"): found[os.path.join(folder, name).replace(os.sep, "/").lstrip("./")] = kind
+    add("logs", "game", lambda n: n == LOG_NAME or n == "latest.log" or (n.endswith(".log.gz") and not n.startswith("debug")))
+    add(os.path.join("logs", ARCHIVE_DIR), "game", lambda n: n.startswith("game_output-") and n.endswith((".log", ".log.gz", ".log.zst")))
+    add("crash-reports", "crash", lambda n: n.endswith(".txt"))
+    for folder in (".", "logs"):
+        add(folder, "jvm", lambda n: n.startswith("hs_err_pid") and n.endswith(".log"))
+    return found
+
+def _blocks(path):
+    """
+    Содержимое лога блоками (смещение, bytes-подобный объект). Обычный файл отображается в память целиком
+    и сканируется регулярками без копирования; сжатые архивы читаются потоком кусками по границе строки.
+    """
+    if path.endswith((".gz", ".zst")):
+        if path.endswith(".zst"):
+            if zstandard is None: return
+            raw = open(path, "rb")
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = gzip.open(path, "rb")
+        with stream:
+            offset, tail = 0, b""
+            while True:
+                data = stream.read(CHUNK_SIZE)
+                if not data:
+                    if tail: yield offset, tail
+                    return
+                data = tail + data
+                cut = data.rfind(b"\n") + 1
+                if not cut:
+                    tail = data
+                    continue
+                yield offset, data[:cut]
+                offset, tail = offset + cut, data[cut:]
+    else:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0: return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield 0, mm
+
+class _Scanner:
+    """
+    Разбирает лог в события [смещение, время, уровень, сообщение, сигнатура, моды, повторов].
+    Сигнатура - корневая причина исключения и первый кадр стека вне JDK/загрузчика; одинаковые события
+    внутри файла склеиваются в одно со счетчиком.
+    """
+
+    def __init__(self, file_time, mods):
+        self.file_time = file_time
+        self.mods = mods or {}
+        self.events = []
+        self.by_key = {}
+        self.truncated = 0
+        self.current = None
+        self.attach_until = -1
+
+    def _mods_in(self, frames):
+        found = []
+        for m in _FRAME.finditer(frames):
+            module, jar = _text(m.group("module"), 64), _text(m.group("jar"), 128).split(".jar")[0]
+            candidates = [module] if module else []
+            if jar:
+                if jar + ".jar" in self.mods: candidates.append(self.mods[jar + ".jar"])
+                elif not self.mods: candidates.append(_JAR_VERSION.sub("", jar).lower())
+            candidates += [_text(x, 64) for x in _MIXIN.findall(m.group("method"))]
+            for mod_id in candidates:
+                if mod_id and mod_id not in NOT_MODS and mod_id not in found: found.append(mod_id)
+            if len(found) >= 8: break
+        return found
+
+    @staticmethod
+    def _origin(frames):
+        for i, m in enumerate(_FRAME.finditer(frames)):
+            method = _text(m.group("method"), 200)
+            if not method.startswith(PLATFORM_FRAMES): return method
+            if i >= MAX_FRAMES: break
+        return None
+
+    def _new(self, offset, level, message, when=None):
+        self.current = {"offset": offset, "time": when or self.file_time, "level": level, "message": message, "chain": [], "origin": None, "mods": []}
+        return self.current
+
+    def _attach(self, event, m, frames):
+        cls = _text(m.group("exc"), 200)
+        if not event["chain"]:
+            text = (cls + ": " + _text(m.group("excmsg"))).rstrip(": ")
+            event["message"] = f"{event['message']} | {text}"[:MESSAGE_LIMIT] if event["message"] else text
+        event["chain"].append(cls)
+        origin = self._origin(frames)
+        if origin: event["origin"] = origin
+        for mod_id in self._mods_in(frames):
+            if mod_id not in event["mods"]: event["mods"].append(mod_id)
+
+    def _commit(self):
+        event = self.current
+        if event is None: return
+        self.current = None
+        signature = event.pop("signature", None)
+        if signature is None and event["chain"]:
+            signature = event["chain"][-1] + (f" @ {event['origin']}" if event["origin"] else "")
+        key = (event["level"], signature or _DIGITS.sub("#", event["message"][:120]))
+        existing = self.by_key.get(key)
+        if existing is not None:
+            existing[6] += 1
+            return
+        if len(self.events) >= MAX_EVENTS_PER_FILE:
+            self.truncated += 1
+            return
+        record = [event["offset"], event["time"], event["level"], event["message"], signature, event["mods"][:8], 1]
+        self.by_key[key] = record
+        self.events.append(record)
+
+    @staticmethod
+    def _line_starts(block):
+        starts = set()
+        for needle in TRIGGERS:
+            pos = block.find(needle)
+            while pos != -1:
+                starts.add(block.rfind(b"\n", 0, pos) + 1)
+                end = block.find(b"\n", pos)
+                if end == -1: break
+                pos = block.find(needle, end)
+        return sorted(starts)
+
+    def scan(self, block, base):
+        for start in self._line_starts(block):
+            m = _EVENT.match(block, start)
+            if m is None: continue
+            if m.group("exc"):
+                frames_match = _FRAMES.match(block, m.end())
+                frames = frames_match.group(0) if frames_match else b""
+                if self.current is None or start > self.attach_until or (self.current["chain"] and not m.group("cause")):
+                    self._commit()
+                    self._new(base + start, "ERROR", "")
+                self._attach(self.current, m, frames)
+                self.attach_until = (frames_match.end() if frames_match else m.end()) + ATTACH_SLACK
+                continue
+            self._commit()
+            if m.group("level"):
+                self._new(base + start, _text(m.group("level")), _text(m.group("msg")))
+            elif m.group("xlevel"):
+                self._new(base + start, _text(m.group("xlevel")), _text(m.group("xmsg")), int(m.group("xts")) / 1000)
+            elif m.group("desc") is not None:
+                self._new(base + start, "FATAL", _text(m.group("desc")))
+            else:
+                event = self._new(base + start, "FATAL", _text(m.group(0)).lstrip("# "))
+                problem = _PROBLEM_FRAME.search(block, m.end())
+                if problem: event["signature"] = _text(m.group("signal")) + " @ " + _HEX.sub("", _text(problem.group(1))).split()[-1]
+            self.attach_until = m.end() + ATTACH_SLACK
+        self._commit()
+
+def index_file(path, file_time, mods=None):
+    """Индекс одного лога: {"events": [...], "truncated": n}."""
+    scanner = _Scanner(file_time, mods)
+    for base, block in _blocks(path):
+        scanner.scan(block, base)
+        # Совпадения держат ссылку на блок; mmap закрывается только после того, как они отпущены
+        del block
+    return {"events": scanner.events, "truncated": scanner.truncated}
+
+class LogIndex:
+    """
+    Индекс логов всех инстансов: вывод игры (текущий и архив сессий), логи Minecraft, краш-репорты и hs_err JVM.
+    Для каждого файла хранятся события уровня WARN и выше, исключения с сигнатурой и моды из стектрейсов;
+    файлы переиндексируются только при смене размера/mtime, а поиск идет по индексу в памяти, не по самим логам.
+    Индекс инстанса лежит в cache_dir/<инстанс>.json и обновляется фоновым потоком (schedule).
+    mods - функция имя инстанса -> {имя jar в mods: id мода} для сопоставления jar из стектрейсов.
+    """
+
+    def __init__(self, base_dir, cache_dir, mods=None):
+        self.base_dir = base_dir
+        self.cache_dir = cache_dir
+        self.mods = mods
+        self.instances = {}
+        self.haystacks = {}
+        self.lock = threading.Lock()
+        self.pending = queue.Queue()
+        self.queued = set()
+        self.worker = None
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name + ".json")
+
+    def _load(self, name):
+        with self.lock:
+            data = self.instances.get(name)
+            if data is not None: return data
+        data = {"version": INDEX_VERSION, "files": {}}
+        try:
+            with open(self._path(name), "r", encoding="utf-8") as f: stored = json.load(f)
+            if stored.get("version") == INDEX_VERSION: data = stored
+        except (OSError, ValueError, AttributeError): pass
+        with self.lock:
+            return self.instances.setdefault(name, data)
+
+    def _save(self, name, data):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(name)
+            with open(path + ".tmp", "w", encoding="utf-8") as f: json.dump(data, f, separators=(",", ":"))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Не удалось сохранить индекс логов {name}: {e}")
+
+    def update(self, name):
+        """Синхронизирует индекс инстанса с его логами. Возвращает число переиндексированных файлов."""
+        instance_dir = os.path.join(self.base_dir, name)
+        if not os.path.isdir(instance_dir): return 0
+        old = self._load(name)["files"]
+        current = log_files(instance_dir)
+        files, indexed, mods = {}, 0, None
+        log_stamp = _stamp(os.path.join(instance_dir, "logs", LOG_NAME))
+        for rel, kind in current.items():
+            stamp = _stamp(os.path.join(instance_dir, rel))
+            if stamp is None: continue
+            entry = old.get(rel)
+            if entry and entry["stamp"] == stamp:
+                files[rel] = entry
+                continue
+            entry = self._rotated(old, rel, log_stamp)
+            if entry is None:
+                if mods is None:
+                    try: mods = self.mods(name) if self.mods else {}
+                    except Exception as e:
+                        print(f"Не удалось получить список модов {name}: {e}")
+                        mods = {}
+                try: entry = index_file(os.path.join(instance_dir, rel), stamp[1] / 1e9, mods)
+                except (OSError, EOFError, ValueError) as e:
+                    print(f"Ошибка индексации лога {name}/{rel}: {e}")
+                    continue
+                indexed += 1
+            files[rel] = dict(entry, stamp=stamp, kind=kind)
+        if files != old:
+            data = {"version": INDEX_VERSION, "files": files}
+            with self.lock:
+                self.instances[name] = data
+                self.haystacks.pop(name, None)
+            self._save(name, data)
+        return indexed
+
+    @staticmethod
+    def _rotated(old, rel, log_stamp):
+        """
+        События архива сессии без повторного разбора. Архив (rotate_game_log) содержит тот же файл,
+        что проиндексированный game_output.log, если имя архива совпадает с его mtime, а текущий
+        game_output.log (log_stamp) уже другой. Сжатие архива (.log -> .log.gz/.log.zst) событий не меняет.
+        """
+        if not rel.startswith(f"logs/{ARCHIVE_DIR}/game_output-"): return None
+        base = rel[:rel.index(".log") + 4]
+        if base != rel and base in old:
+            previous = old[base]
+        else:
+            previous = old.get(f"logs/{LOG_NAME}")
+            if not previous or previous["stamp"] == log_stamp: return None
+            stamp = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(previous["stamp"][1] / 1e9))
+            if base != f"logs/{ARCHIVE_DIR}/game_output-{stamp}.log": return None
+        return {"events": previous["events"], "truncated": previous.get("truncated", 0)}
+
+    def remove(self, name):
+        with self.lock:
+            self.instances.pop(name, None)
+            self.haystacks.pop(name, None)
+        try: os.remove(self._path(name))
+        except OSError: pass
+
+    def schedule(self, names=None):
+        """Ставит инстансы (по умолчанию все) в очередь фоновой индексации."""
+        if names is None:
+            try: names = [n for n in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, n))]
+            except OSError: names = []
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name="log-index", daemon=True)
+                self.worker.start()
+            for name in names:
+                if name in self.queued: continue
+                self.queued.add(name)
+                self.pending.put(name)
+
+    def busy(self):
+        with self.lock: return bool(self.queued)
+
+    def _run(self):
+        while True:
+            name = self.pending.get()
+            try:
+                started = time.perf_counter()
+                indexed = self.update(name)
+                if indexed: print(f"Индекс логов {name}: {indexed} файлов за {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                print(f"Ошибка индексации логов {name}: {e}")
+            finally:
+                with self.lock: self.queued.discard(name)
+
+    def _haystack(self, name, files):
+        """Строки для поиска по событиям (сообщение, сигнатура, моды, файл) в нижнем регистре, строятся один раз."""
+        with self.lock:
+            cached = self.haystacks.get(name)
+            if cached is not None and cached[0] is files: return cached[1]
+        hay = {rel: [f"{e[3]}\n{e[4] or ''}\n{' '.join(e[5])}\n{rel}".lower() for e in entry["events"]] for rel, entry in files.items()}
+        with self.lock: self.haystacks[name] = (files, hay)
+        return hay
+
+    def search(self, query="", instance=None, level=None, kind=None, mod=None, since=None, limit=SEARCH_LIMIT):
+        """
+        Поиск по индексу всех инстансов: все слова query должны встречаться в сообщении, сигнатуре, модах или имени файла.
+        level - минимальный уровень (WARN/ERROR/FATAL), kind - game/crash/jvm, mod - id мода из стектрейса,
+        since - unix-время. Возвращает события (новые первыми) и самые частые сигнатуры среди найденного.
+        """
+        started = time.perf_counter()
+        words = [w for w in (query or "").lower().split() if w]
+        levels = ("WARN", "ERROR", "FATAL")
+        min_level = levels.index(level.upper()) if level and level.upper() in levels else 0
+        mod = mod.lower() if mod else None
+        if instance: names = [instance]
+        else:
+            try: names = sorted(n for n in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, n)))
+            except OSError: names = []
+
+        matches, signatures = [], {}
+        for name in names:
+            files = self._load(name)["files"]
+            hay = self._haystack(name, files)
+            for rel, entry in files.items():
+                if kind and entry["kind"] != kind: continue
+                texts = hay[rel]
+                for i, e in enumerate(entry["events"]):
+                    if min_level and (e[2] not in levels or levels.index(e[2]) < min_level): continue
+                    if since and e[1] < since: continue
+                    if mod and mod not in e[5]: continue
+                    if words and not all(w in texts[i] for w in words): continue
+                    matches.append((name, rel, entry["kind"], e))
+                    if e[4]:
+                        group = signatures.setdefault(e[4], {"signature": e[4], "count": 0, "instances": set(), "mods": set(), "last_seen": 0})
+                        group["count"] += e[6]
+                        group["instances"].add(name)
+                        group["mods"].update(e[5])
+                        group["last_seen"] = max(group["last_seen"], e[1])
+
+        matches.sort(key=lambda m: -m[3][1])
+        results = [{"instance": name, "file": rel, "kind": kind_, "offset": e[0], "time": e[1], "level": e[2], "message": e[3], "signature": e[4], "mods": e[5], "count": e[6]} for name, rel, kind_, e in matches[:limit]]
+        top = sorted(signatures.values(), key=lambda g: (-g["count"], -g["last_seen"]))[:TOP_SIGNATURES]
+        for group in top: group["instances"], group["mods"] = sorted(group["instances"]), sorted(group["mods"])
+        return {"results": results, "total": len(matches), "signatures": top, "indexing": self.busy(), "took_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    def excerpt(self, name, rel, offset, lines=40):
+        """Фрагмент лога с найденного события: lines строк начиная со смещения offset."""
+        instance_dir = os.path.realpath(os.path.join(self.base_dir, name))
+        path = os.path.realpath(os.path.join(instance_dir, rel))
+        if not path.startswith(instance_dir + os.sep) or rel not in log_files(instance_dir): return None
+        for base, block in _blocks(path):
+            if base + len(block) <= offset: continue
+            start = max(0, offset - base)
+            end = start
+            for _ in range(lines):
+                end = block.find(b"\n", end) + 1
+                if not end: end = len(block); break
+            return block[start:end].decode("utf-8", errors="replace")
+        return None
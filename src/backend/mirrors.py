@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Правила подмены по умолчанию: префикс оригинального URL -> список префиксов зеркал.
+# Пользовательские правила задаются ключом "mirrors" в launcher_config.json.
+DEFAULT_RULES = {}
+
+PROBE_TIMEOUT = 3
+PROBE_INTERVAL = 600
+FAILURE_COOLDOWN = 60
+EWMA_ALPHA = 0.3
+REFERENCE_SIZE = 1024 * 1024
+
+class MirrorTable:
+    """
+    Таблица зеркал: превращает URL в список кандидатов (оригинал + зеркала по правилам подмены)
+    и упорядочивает их по скользящей статистике хостов - задержке, пропускной способности и ошибкам.
+    Хосты без статистики проверяются HEAD-запросом в фоне (probe_background), ранжирование его не ждет;
+    упавший хост уходит в конец списка на время cooldown.
+    """
+
+    def __init__(self, stats_path, session_factory):
+        self.stats_path = stats_path
+        self.session_factory = session_factory
+        self.rules = dict(DEFAULT_RULES)
+        self.exclusive = False
+        self.hosts = None
+        self.probing = set()
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def configure(self, rules, exclusive=False):
+        """
+        rules: {"https://libraries.minecraft.net/": ["https://mirror.example/maven/"], ...}
+        exclusive - оригинальный хост не используется, если для URL есть зеркало (например, когда он недоступен).
+        """
+        merged = dict(DEFAULT_RULES)
+        for origin, targets in (rules or {}).items():
+            if isinstance(targets, str): targets = [targets]
+            merged[origin] = [t for t in targets if isinstance(t, str) and t]
+        with self.lock:
+            self.rules = merged
+            self.exclusive = bool(exclusive)
+
+    def _load(self):
+        if self.hosts is not None: return
+        self.hosts = {}
+        try:
+            with open(self.stats_path, "r") as f: self.hosts = json.load(f)
+        except (OSError, ValueError): pass
+
+    @staticmethod
+    def host(url):
+        return urlsplit(url).netloc.lower()
+
+    def candidates(self, urls):
+        """Все URL, по которым можно скачать файл: исходные (str или список) и их зеркала, без повторов."""
+        if isinstance(urls, str): urls = [urls]
+        with self.lock: rules, exclusive = list(self.rules.items()), self.exclusive
+        result = []
+        for url in urls:
+            mirrored = [target + url[len(origin):] for origin, targets in rules if url.startswith(origin) for target in targets]
+            for candidate in (mirrored if exclusive and mirrored else [url] + mirrored):
+                if candidate not in result: result.append(candidate)
+        return result
+
+    def rewrite(self, url):
+        """URL для одиночных запросов к API (метаданные, поиск): оригинал или, в режиме exclusive, первое зеркало."""
+        return self.candidates(url)[0]
+
+    def _stats(self, host):
+        self._load()
+        return self.hosts.setdefault(host, {"latency": None, "throughput": None, "failures": 0, "failed_at": 0, "probed_at": 0})
+
+    def _score(self, host, size):
+        """Ожидаемое время загрузки файла размера size с хоста; для упавших хостов - бесконечность."""
+        stats = self._stats(host)
+        if stats["failures"] and time.time() - stats["failed_at"] < FAILURE_COOLDOWN * min(stats["failures"], 10):
+            return float("inf")
+        latency = stats["latency"] if stats["latency"] is not None else 0.5
+        throughput = stats["throughput"] or 1024 * 1024
+        return latency + (size or REFERENCE_SIZE) / throughput
+
+    def rank(self, urls, size=None):
+        """Упорядочивает кандидатов от самого быстрого здорового хоста; при равенстве сохраняется исходный порядок."""
+        with self.lock:
+            scores = {u: self._score(self.host(u), size) for u in urls}
+        return sorted(urls, key=lambda u: scores[u])
+
+    def _claim_probes(self, urls):
+        """Хосты без свежего замера, которые еще никто не проверяет: {host: url}."""
+        now = time.time()
+        with self.lock:
+            pending = {}
+            for url in urls:
+                host = self.host(url)
+                stats = self._stats(host)
+                if host in self.probing or host in pending or now - stats["probed_at"] < PROBE_INTERVAL: continue
+                pending[host] = url
+            self.probing.update(pending)
+        return pending
+
+    def probe_background(self, urls):
+        """Запускает probe в фоновом потоке и сразу возвращается; имеет смысл, только если хостов больше одного."""
+        if len({self.host(u) for u in urls}) < 2: return
+        pending = self._claim_probes(urls)
+        if pending: threading.Thread(target=self._probe, args=(pending,), name="mirror-probe", daemon=True).start()
+
+    def probe(self, urls):
+        """Замеряет задержку хостов, по которым еще нет свежих данных (параллельно, HEAD-запросом)."""
+        pending = self._claim_probes(urls)
+        if pending: self._probe(pending)
+
+    def _probe(self, pending):
+        def check(item):
+            host, url = item
+            started = time.monotonic()
+            try:
+                resp = self.session_factory().head(url, timeout=PROBE_TIMEOUT, allow_redirects=True)
+                ok = resp.status_code < 400
+            except Exception:
+                ok = False
+            elapsed = time.monotonic() - started
+            with self.lock:
+                self.probing.discard(host)
+                stats = self._stats(host)
+                stats["probed_at"] = time.time()
+                if ok: stats["latency"] = elapsed if stats["latency"] is None else stats["latency"] * (1 - EWMA_ALPHA) + elapsed * EWMA_ALPHA
+                else: self._mark_failed(stats)
+                self.dirty = True
+
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="mirror-probe") as pool:
+            list(pool.map(check, pending.items()))
+
+    def _mark_failed(self, stats):
+        stats["failures"] += 1
+        stats["failed_at"] = time.time()
+
+    def report_success(self, url, size, seconds):
+        """Обновляет скользящую пропускную способность хоста после успешной загрузки."""
+        with self.lock:
+            stats = self._stats(self.host(url))
+            stats["failures"] = 0
+            if size >= 64 * 1024 and seconds > 0:
+                rate = size / seconds
+                stats["throughput"] = rate if not stats["throughput"] else stats["throughput"] * (1 - EWMA_ALPHA) + rate * EWMA_ALPHA
+            self.dirty = True
+
+    def report_failure(self, url):
+        with self.lock:
+            self._mark_failed(self._stats(self.host(url)))
+            self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty or self.hosts is None: return
+            data = json.dumps(self.hosts)
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.stats_path), exist_ok=True)
+            temp_path = self.stats_path + ".tmp"
+            with open(temp_path, "w") as f: f.write(data)
+            os.replace(temp_path, self.stats_path)
+        except OSError as e:
+            print(f"Не удалось сохранить статистику зеркал: {e}")
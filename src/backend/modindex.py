@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import base64
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .utils import VERIFY_LEDGER, file_sha1
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+MAX_ICON_SIZE = 64 * 1024
+INDEX_WORKERS = 4
+
+def _read_json(z, name):
+    return json.loads(z.read(name).decode("utf-8", errors="replace"), strict=False)
+
+def _icon(z, name):
+    """Иконка как data URL; слишком большие и отсутствующие иконки пропускаются."""
+    if not name: return None
+    name = name.lstrip("/")
+    try: info = z.getinfo(name)
+    except KeyError: return None
+    if info.file_size > MAX_ICON_SIZE: return None
+    mime = "image/png" if name.lower().endswith(".png") else "image/jpeg"
+    return f"data:{mime};base64," + base64.b64encode(z.read(info)).decode("ascii")
+
+def _text(value):
+    """Текст из строки или JSON-компонента (как в description у pack.mcmeta)."""
+    if isinstance(value, str): return value
+    if isinstance(value, list): return "".join(_text(v) for v in value)
+    if isinstance(value, dict): return _text(value.get("text", "")) + _text(value.get("extra", []))
+    return ""
+
+def _fabric(z):
+    data = _read_json(z, "fabric.mod.json")
+    icon = data.get("icon")
+    if isinstance(icon, dict):
+        # {"16": "...", "128": "..."} - берем самую крупную из разумных
+        sizes = sorted(icon, key=lambda s: int(s) if str(s).isdigit() else 0)
+        icon = icon[next((s for s in reversed(sizes) if str(s).isdigit() and int(s) <= 128), sizes[-1])] if sizes else None
+    return {"id": data.get("id"), "name": data.get("name"), "version": data.get("version"), "description": _text(data.get("description")), "loaders": ["fabric", "quilt"], "icon": _icon(z, icon)}
+
+def _quilt(z):
+    loader = _read_json(z, "quilt.mod.json").get("quilt_loader", {})
+    meta = loader.get("metadata", {})
+    icon = meta.get("icon")
+    if isinstance(icon, dict): icon = next(iter(icon.values()), None)
+    return {"id": loader.get("id"), "name": meta.get("name"), "version": loader.get("version"), "description": _text(meta.get("description")), "loaders": ["quilt"], "icon": _icon(z, icon)}
+
+def _parse_toml(text):
+    if tomllib: return tomllib.loads(text)
+    # Без tomllib/tomli достаем только простые строковые поля: верхний уровень и первый [[mods]]
+    field = re.compile(r'^\s*(\w+)\s*=\s*"([^"]*)"', re.MULTILINE)
+    head, _, rest = text.partition("[[mods]]")
+    mod = dict(field.findall(rest.split("\n[", 1)[0]))
+    return dict(field.findall(head.split("\n[", 1)[0]), mods=[mod] if mod else [])
+
+def _manifest_version(z):
+    try: manifest = z.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+    except KeyError: return None
+    match = re.search(r"^Implementation-Version:\s*(.+)$", manifest, re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+def _forge(z, name, loader):
+    data = _parse_toml(z.read(name).decode("utf-8", errors="replace"))
+    if not data.get("mods"): return None
+    mod = data["mods"][0]
+    version = mod.get("version")
+    if not version or "${" in version: version = _manifest_version(z) or version
+    logo = mod.get("logoFile") or data.get("logoFile")
+    return {"id": mod.get("modId"), "name": mod.get("displayName"), "version": version, "description": (mod.get("description") or "").strip(), "loaders": [loader], "icon": _icon(z, logo)}
+
+def _pack(z):
+    pack = _read_json(z, "pack.mcmeta").get("pack", {})
+    return {"id": None, "name": None, "version": None, "description": _text(pack.get("description")), "pack_format": pack.get("pack_format"), "loaders": [], "icon": _icon(z, "pack.png")}
+
+def read_metadata(path):
+    """
+    Метаданные мода/пака из архива. Читается только центральный каталог zip и нужные записи,
+    а не весь jar. Для файлов без известных дескрипторов возвращает пустые метаданные.
+    """
+    try:
+        with zipfile.ZipFile(path, "r") as z:
+            names = set(z.namelist())
+            if "fabric.mod.json" in names: meta = _fabric(z)
+            elif "quilt.mod.json" in names: meta = _quilt(z)
+            elif "META-INF/neoforge.mods.toml" in names: meta = _forge(z, "META-INF/neoforge.mods.toml", "neoforge")
+            elif "META-INF/mods.toml" in names: meta = _forge(z, "META-INF/mods.toml", "forge")
+            elif "pack.mcmeta" in names: meta = _pack(z)
+            else: meta = None
+    except Exception as e:
+        print(f"Не удалось прочитать метаданные {os.path.basename(path)}: {e}")
+        meta = None
+    return meta or {"id": None, "name": None, "version": None, "description": "", "loaders": [], "icon": None}
+
+class ModIndex:
+    """
+    Кеш метаданных установленного контента по sha1 файла: jar, общий для нескольких инстансов,
+    разбирается один раз. sha1 берется из VERIFY_LEDGER, поэтому неизменившиеся файлы не перехешируются.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.entries = None
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+
+    def _load(self):
+        if self.entries is not None: return
+        self.entries = {}
+        try:
+            with open(self.index_path, "r") as f: self.entries = json.load(f)
+        except (OSError, ValueError): pass
+
+    def _sha1(self, path):
+        digest = VERIFY_LEDGER.lookup(path)
+        if digest: return digest
+        st = os.stat(path)
+        digest = file_sha1(path)
+        VERIFY_LEDGER.record(path, st, sha1=digest)
+        return digest
+
+    def describe(self, path):
+        digest = self._sha1(path)
+        with self.lock:
+            self._load()
+            meta = self.entries.get(digest)
+        if meta is None:
+            meta = read_metadata(path)
+            with self.lock:
+                self.entries[digest] = meta
+                self.dirty = True
+        return dict(meta, sha1=digest)
+
+    def list(self, folder, extensions):
+        """Содержимое каталога с метаданными: [{"file_name", "name", "id", "version", ...}]; новые файлы индексируются параллельно."""
+        try: files = sorted(f for f in os.listdir(folder) if f.endswith(extensions))
+        except OSError: return []
+
+        def entry(file_name):
+            try: meta = self.describe(os.path.join(folder, file_name))
+            except OSError: meta = {}
+            return dict(meta, file_name=file_name, name=meta.get("name") or file_name)
+
+        if not files: return []
+        with ThreadPoolExecutor(max_workers=min(INDEX_WORKERS, len(files)), thread_name_prefix="mod-index") as pool:
+            items = list(pool.map(entry, files))
+        mark_duplicates(items)
+        self.save()
+        VERIFY_LEDGER.save()
+        return items
+
+    def warm(self, folders):
+        """Фоновая индексация каталогов инстанса (при выборе инстанса), чтобы вкладки открывались мгновенно."""
+        def worker():
+            for folder, extensions in folders:
+                try: self.list(folder, extensions)
+                except Exception as e: print(f"Ошибка индексации {folder}: {e}")
+        threading.Thread(target=worker, name="mod-index-warm", daemon=True).start()
+
+    def save(self):
+        with self.lock:
+            if not self.dirty: return
+            data = json.dumps(self.entries, separators=(",", ":"))
+            self.dirty = False
+        try:
+            with self.save_lock:
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                with open(self.index_path + ".tmp", "w") as f: f.write(data)
+                os.replace(self.index_path + ".tmp", self.index_path)
+        except OSError as e:
+            print(f"Не удалось сохранить индекс модов: {e}")
+
+def mark_duplicates(items):
+    """Помечает моды с одинаковым id (duplicate_of - остальные файлы с тем же id). Возвращает {id: [файлы]}."""
+    by_id = {}
+    for item in items:
+        if item.get("id"): by_id.setdefault(item["id"], []).append(item["file_name"])
+    duplicates = {mod_id: files for mod_id, files in by_id.items() if len(files) > 1}
+    for item in items:
+        files = duplicates.get(item.get("id"))
+        if files: item["duplicate_of"] = [f for f in files if f != item["file_name"]]
+    return duplicates
@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from .utils import get_session, get_data_root, download_files, VERIFY_LEDGER, MIRRORS
+from . import http_cache
+
+API_URL = "https://api.modrinth.com/v2"
+HASH_BATCH = 500
+MOD_LOADERS = ("fabric", "forge", "quilt", "neoforge")
+RESOLVE_WORKERS = 8
+SEARCH_LIMIT = 20
+SEARCH_TTL = 120
+SEARCH_CACHE_SIZE = 256
+PREFETCH_LIMIT = 4
+ICON_DIR = os.path.join(get_data_root(), "cache", "icons")
+MAX_ICON_SIZE = 256 * 1024
+# Тип проекта Modrinth -> каталог инстанса
+PROJECT_FOLDERS = {"mod": "mods", "resourcepack": "resourcepacks", "shader": "shaderpacks", "shaderpack": "shaderpacks", "datapack": "datapacks"}
+
+def _post(path, payload, timeout=30):
+    resp = get_session().post(MIRRORS.rewrite(f"{API_URL}{path}"), json=payload, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+def _batched(hashes, path, payload):
+    result = {}
+    for i in range(0, len(hashes), HASH_BATCH):
+        result.update(_post(path, dict(payload, hashes=hashes[i:i + HASH_BATCH])))
+    return result
+
+def version_files(hashes, algorithm="sha1"):
+    """Один запрос на пачку хешей: hash -> версия Modrinth, к которой относится файл."""
+    return _batched(list(hashes), "/version_files", {"algorithm": algorithm})
+
+def latest_versions(hashes, loaders, game_versions, algorithm="sha1"):
+    """Одним запросом: hash -> последняя версия того же проекта для loaders/game_versions."""
+    return _batched(list(hashes), "/version_files/update", {"algorithm": algorithm, "loaders": list(loaders), "game_versions": list(game_versions)})
+
+def primary_file(version):
+    """Основной файл версии (primary), а если он не отмечен - первый."""
+    files = version.get("files") or []
+    return next((f for f in files if f.get("primary")), files[0] if files else None)
+
+def check_updates(mods_dir, loader, game_version, mod_index):
+    """
+    Ищет обновления модов каталога: sha1 файлов (из кеша ModIndex/VERIFY_LEDGER) уходят
+    в один пакетный запрос /version_files/update. Возвращает список доступных обновлений.
+    """
+    loader = (loader or "").lower()
+    if loader not in MOD_LOADERS or not game_version: return []
+    mods = mod_index.list(mods_dir, (".jar",))
+    by_hash = {m["sha1"]: m for m in mods if m.get("sha1")}
+    if not by_hash: return []
+
+    current = version_files(by_hash)
+    known = [h for h in by_hash if h in current]
+    latest = latest_versions(known, [loader], [game_version]) if known else {}
+
+    updates = []
+    for digest, version in latest.items():
+        old = current.get(digest)
+        new_file = primary_file(version)
+        if not old or not new_file or version["id"] == old["id"]: continue
+        if new_file.get("hashes", {}).get("sha1") == digest: continue
+        updates.append({
+            "file_name": by_hash[digest]["file_name"],
+            "name": by_hash[digest].get("name"),
+            "project_id": version["project_id"],
+            "current_version": old.get("version_number"),
+            "new_version": version.get("version_number"),
+            "new_file": {"url": new_file["url"], "filename": new_file["filename"], "sha1": new_file.get("hashes", {}).get("sha1"), "size": new_file.get("size")},
+        })
+    return sorted(updates, key=lambda u: (u["name"] or u["file_name"]).lower())
+
+def apply_updates(mods_dir, updates, callback=None):
+    """
+    Скачивает новые версии параллельно одним пакетом и только после успешной загрузки всех файлов
+    удаляет старые, чтобы сбой на середине не оставил инстанс без модов.
+    """
+    tasks = [{"url": u["new_file"]["url"], "path": os.path.join(mods_dir, u["new_file"]["filename"]), "sha1": u["new_file"]["sha1"], "size": u["new_file"]["size"]} for u in updates]
+    download_files(tasks, callback)
+    for update in updates:
+        if update["file_name"] == update["new_file"]["filename"]: continue
+        old_path = os.path.join(mods_dir, update["file_name"])
+        try: os.remove(old_path)
+        except OSError: pass
+        VERIFY_LEDGER.forget(old_path)
+    VERIFY_LEDGER.save()
+    return len(tasks)
+
+def get_project(project_id):
+    return http_cache.get_json(f"{API_URL}/project/{project_id}", "modrinth")
+
+def get_version(version_id):
+    return http_cache.get_json(f"{API_URL}/version/{version_id}", "modrinth")
+
+def compatible_versions(project_id, project_type, loader, game_version):
+    params = {"game_versions": json.dumps([game_version])}
+    if project_type == "mod": params["loaders"] = json.dumps([loader])
+    return http_cache.get_json(f"{API_URL}/project/{project_id}/version", "modrinth", params=params)
+
+def installed_projects(mods_dir, mod_index):
+    """id проектов Modrinth, которые уже лежат в mods/ (по sha1 файлов, одним запросом)."""
+    hashes = [m["sha1"] for m in mod_index.list(mods_dir, (".jar",)) if m.get("sha1")]
+    if not hashes: return set()
+    return {v["project_id"] for v in version_files(hashes).values()}
+
+class DependencyResolver:
+    """
+    Обходит обязательные зависимости в ширину. Метаданные всех проектов одного уровня запрашиваются
+    параллельно, а одинаковые запросы (один проект из нескольких веток) выполняются один раз.
+    """
+
+    def __init__(self, loader, game_version, max_workers=RESOLVE_WORKERS):
+        self.loader = loader
+        self.game_version = game_version
+        self.max_workers = max_workers
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def _once(self, pool, key, fn, *args):
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is None: future = self.inflight[key] = pool.submit(fn, *args)
+        return future
+
+    def _fetch(self, project_id, version_id):
+        """(проект, версия) для зависимости: конкретная версия, если она указана, иначе последняя совместимая."""
+        version = get_version(version_id) if version_id else None
+        project = get_project(project_id or version["project_id"])
+        if version is None:
+            versions = compatible_versions(project["id"], project.get("project_type"), self.loader, self.game_version)
+            version = versions[0] if versions else None
+        return project, version
+
+    def resolve(self, project_id, skip_projects=()):
+        """
+        Возвращает (список (проект, версия) для установки, список проектов без совместимой версии).
+        Корневой проект ставится всегда, зависимости из skip_projects (id проектов) пропускаются,
+        в том числе указанные только через version_id.
+        """
+        resolved, missing = [], []
+        seen_projects, seen_keys = set(), {project_id}
+        level = [(project_id, None)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="modrinth-resolve") as pool:
+            while level:
+                futures = [self._once(pool, (pid, vid), self._fetch, pid, vid) for pid, vid in level]
+                level = []
+                for future in futures:
+                    project, version = future.result()
+                    if project["id"] in seen_projects: continue
+                    # Зависимость, заданная только version_id, узнается как установленная лишь после запроса ее проекта
+                    if seen_projects and project["id"] in skip_projects: continue
+                    seen_projects.add(project["id"])
+                    if version is None:
+                        missing.append(project.get("title") or project["id"])
+                        continue
+                    resolved.append((project, version))
+                    for dep in version.get("dependencies") or []:
+                        if dep.get("dependency_type") != "required": continue
+                        pid, vid = dep.get("project_id"), dep.get("version_id")
+                        key = pid or vid
+                        if not key or key in seen_keys or pid in skip_projects or pid in seen_projects: continue
+                        seen_keys.add(key)
+                        level.append((pid, vid))
+        return resolved, missing
+
+def install_with_dependencies(project_id, instance_dir, loader, game_version, mod_index, callback=None):
+    """
+    Ставит проект вместе с обязательными зависимостями одним параллельным пакетом.
+    Уже установленные в mods/ проекты не скачиваются повторно. Возвращает тип корневого проекта,
+    число файлов и список зависимостей без совместимой версии.
+    """
+    loader = (loader or "").lower()
+    skip = installed_projects(os.path.join(instance_dir, "mods"), mod_index)
+    resolved, missing = DependencyResolver(loader, game_version).resolve(project_id, skip)
+    if not resolved: return None
+
+    tasks = []
+    for project, version in resolved:
+        file_data = primary_file(version)
+        if not file_data: continue
+        folder = PROJECT_FOLDERS.get(project.get("project_type"), "mods")
+        tasks.append({"url": file_data["url"], "path": os.path.join(instance_dir, folder, file_data["filename"]), "sha1": file_data.get("hashes", {}).get("sha1"), "size": file_data.get("size")})
+    download_files(tasks, callback)
+    return {"type": resolved[0][0].get("project_type"), "installed": len(tasks), "missing": missing}
+
+
+class SearchCache:
+    """
+    Кеш поиска Modrinth: LRU с коротким TTL по (query, facets, offset, index).
+    Одинаковые одновременные запросы объединяются в один, а следующая страница запрашивается заранее в фоне.
+    Запросы, устаревшие из-за нового ввода в том же канале (seq меньше последнего), не уходят в сеть:
+    поколение сверяется перед каждым запросом страницы, в том числе фоновой. Фоновых подгрузок
+    одновременно не больше PREFETCH_LIMIT, лишние отбрасываются. Уже отправленный запрос не прерывается,
+    его результат просто попадает в кеш.
+    """
+
+    def __init__(self, max_entries=SEARCH_CACHE_SIZE, ttl=SEARCH_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.latest = {}
+        self.prefetching = 0
+        self.lock = threading.RLock()
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="modrinth-prefetch")
+
+    def _get_cached(self, key):
+        entry = self.entries.get(key)
+        if not entry: return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def _fetch(self, key):
+        query, facets, offset, index = key
+        params = {"query": query, "limit": SEARCH_LIMIT, "offset": offset, "facets": facets}
+        if index: params["index"] = index
+        resp = get_session().get(MIRRORS.rewrite(f"{API_URL}/search"), params=params, timeout=15)
+        resp.raise_for_status()
+        return resp.json().get("hits", [])
+
+    def get(self, key, stale=None):
+        """
+        Результат поиска по ключу: из кеша, из уже идущего запроса или новым запросом.
+        stale() проверяется перед отправкой нового запроса: если запрос уже не нужен, возвращается None.
+        """
+        with self.lock:
+            hits = self._get_cached(key)
+            if hits is not None: return hits
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                if stale and stale(): return None
+                future = self.inflight[key] = Future()
+        if not owner: return future.result()
+        try:
+            hits = self._fetch(key)
+            future.set_result(hits)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+                if future.exception() is None:
+                    self.entries[key] = (time.monotonic(), hits)
+                    while len(self.entries) > self.max_entries: self.entries.popitem(last=False)
+        return hits
+
+    def supersede(self, channel, seq):
+        """Запоминает номер последнего запроса канала; True, если запрос seq уже устарел."""
+        if seq is None: return False
+        with self.lock:
+            if seq < self.latest.get(channel, -1): return True
+            self.latest[channel] = seq
+            return False
+
+    def is_stale(self, channel, seq):
+        with self.lock: return seq is not None and seq < self.latest.get(channel, -1)
+
+    def prefetch(self, key, stale=None):
+        query, facets, offset, index = key
+        next_key = (query, facets, offset + SEARCH_LIMIT, index)
+        with self.lock:
+            if self.prefetching >= PREFETCH_LIMIT: return
+            self.prefetching += 1
+        def worker():
+            try: prefetch_icons(self.get(next_key, stale))
+            except Exception as e: print(f"Modrinth prefetch failed: {e}")
+            finally:
+                with self.lock: self.prefetching -= 1
+        self.pool.submit(worker)
+
+SEARCH_CACHE = SearchCache()
+
+def search(query, facets, offset=0, index=None, channel="search", seq=None):
+    """
+    Поиск по Modrinth через SEARCH_CACHE. Возвращает None, если за время ожидания пришел
+    более новый запрос того же канала (интерфейс такой ответ игнорирует).
+    """
+    if SEARCH_CACHE.supersede(channel, seq): return None
+    key = (query or "", json.dumps(facets), int(offset), index)
+    stale = lambda: SEARCH_CACHE.is_stale(channel, seq)
+    hits = SEARCH_CACHE.get(key, stale)
+    if hits is None or stale(): return None
+    if len(hits) == SEARCH_LIMIT: SEARCH_CACHE.prefetch(key, stale)
+    return with_cached_icons(hits)
+
+_icon_lock = threading.Lock()
+_icon_pending = set()
+
+def _icon_path(url):
+    return os.path.join(ICON_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+def _download_icon(url):
+    try:
+        resp = get_session().get(MIRRORS.rewrite(url), timeout=15)
+        resp.raise_for_status()
+        if len(resp.content) > MAX_ICON_SIZE: return
+        mime = resp.headers.get("Content-Type", "image/png").split(";")[0]
+        os.makedirs(ICON_DIR, exist_ok=True)
+        path = _icon_path(url)
+        with open(path + ".tmp", "w") as f: f.write(f"data:{mime};base64," + base64.b64encode(resp.content).decode("ascii"))
+        os.replace(path + ".tmp", path)
+    except Exception as e:
+        print(f"Icon download failed for {url}: {e}")
+    finally:
+        with _icon_lock: _icon_pending.discard(url)
+
+def prefetch_icons(hits):
+    """Скачивает в фоне иконки, которых еще нет в дисковом кеше."""
+    for hit in hits or []:
+        url = hit.get("icon_url")
+        if not url or os.path.exists(_icon_path(url)): continue
+        with _icon_lock:
+            if url in _icon_pending: continue
+            _icon_pending.add(url)
+        SEARCH_CACHE.pool.submit(_download_icon, url)
+
+def with_cached_icons(hits):
+    """Подменяет icon_url на data URL из дискового кеша; отсутствующие иконки докачиваются в фоне."""
+    result = []
+    for hit in hits:
+        url = hit.get("icon_url")
+        if url:
+            try:
+                with open(_icon_path(url), "r") as f: hit = dict(hit, icon_url=f.read())
+            except OSError: pass
+        result.append(hit)
+    prefetch_icons(hits)
+    return result
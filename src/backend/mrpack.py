@@ -0,0 +1,139 @@
+import os
+import json
+import zlib
+import shutil
+import hashlib
+import zipfile
+import threading
+from .utils import download_files, format_size, store_path
+from . import tracing
+
+OVERRIDE_DIRS = ("overrides/", "client-overrides/")
+LOADER_DEPENDENCIES = (("fabric-loader", "Fabric"), ("forge", "Forge"), ("quilt-loader", "Quilt"), ("neoforge", "NeoForge"))
+
+def detect_loader(dependencies):
+    for key, loader in LOADER_DEPENDENCIES:
+        if key in dependencies: return loader
+    return "Vanilla"
+
+def safe_target(instance_dir, rel_path):
+    """Путь внутри инстанса; пути вида ../ или абсолютные (path traversal) отклоняются."""
+    root = os.path.realpath(instance_dir)
+    target = os.path.realpath(os.path.join(root, rel_path))
+    if os.path.isabs(rel_path) or os.path.commonpath([root, target]) != root:
+        raise ValueError(f"Недопустимый путь в модпаке: {rel_path}")
+    return target
+
+def _file_crc32(path):
+    crc = 0
+    with open(path, "rb") as f:
+        while data := f.read(1024 * 1024): crc = zlib.crc32(data, crc)
+    return crc
+
+def _file_sha512(path):
+    sha512 = hashlib.sha512()
+    with open(path, "rb") as f:
+        while data := f.read(1024 * 1024): sha512.update(data)
+    return sha512.hexdigest()
+
+def _override_entries(z, instance_dir):
+    """Файлы overrides/ и client-overrides/ (последние перекрывают первые): путь -> ZipInfo."""
+    entries = {}
+    for prefix in OVERRIDE_DIRS:
+        for info in z.infolist():
+            if info.is_dir() or not info.filename.startswith(prefix) or info.filename == prefix: continue
+            entries[safe_target(instance_dir, info.filename[len(prefix):])] = info
+    return entries
+
+@tracing.traced()
+def _extract_overrides(mrpack_path, entries):
+    """Распаковывает overrides; файлы с тем же размером и CRC32 не перезаписываются. Возвращает число записанных."""
+    written = 0
+    with zipfile.ZipFile(mrpack_path, "r") as z:
+        for target, info in entries.items():
+            if os.path.isfile(target) and os.path.getsize(target) == info.file_size and _file_crc32(target) == info.CRC: continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with z.open(info) as source, open(target + ".tmp", "wb") as dest:
+                shutil.copyfileobj(source, dest, 1024 * 1024)
+            os.replace(target + ".tmp", target)
+            written += 1
+            tracing.count("override_bytes", info.file_size)
+    return written
+
+def _existing_parent(path):
+    while not os.path.exists(path) and os.path.dirname(path) != path: path = os.path.dirname(path)
+    return path
+
+def _download_target(task):
+    """Куда реально пишет задача download_files: в общее хранилище (shared) или прямо по path."""
+    return store_path(task["sha1"]) if task.get("shared") and task.get("sha1") else task["path"]
+
+def check_free_space(needed):
+    """needed: {путь: байт}. Проверяет каждый том отдельно - общее хранилище может лежать на другом диске."""
+    volumes = {}
+    for path, size in needed.items():
+        root = _existing_parent(os.path.abspath(path))
+        device = os.stat(root).st_dev
+        volumes.setdefault(device, [root, 0])[1] += size
+    for root, size in volumes.values():
+        free = shutil.disk_usage(root).free
+        if size > free:
+            raise OSError(f"Недостаточно места на диске ({root}): нужно {format_size(size)}, свободно {format_size(free)}")
+
+@tracing.traced()
+def install_mrpack_archive(mrpack_path, instance_dir, callback=None):
+    """
+    Устанавливает .mrpack в instance_dir, читая архив на месте (без копирования).
+    Место на диске проверяется заранее по fileSize, файлы качаются параллельно с проверкой sha1/sha512,
+    а overrides распаковываются в отдельном потоке одновременно с загрузкой.
+    Возвращает (версия Minecraft, загрузчик).
+    """
+    with zipfile.ZipFile(mrpack_path, "r") as z:
+        with z.open("modrinth.index.json") as f: index = json.load(f)
+        overrides = _override_entries(z, instance_dir)
+
+    dependencies = index.get("dependencies", {})
+    mc_version, loader = dependencies["minecraft"], detect_loader(dependencies)
+
+    tasks, sha512_checks = [], []
+    for file_info in index.get("files", []):
+        if file_info.get("env", {}).get("client") == "unsupported": continue
+        hashes = file_info.get("hashes", {})
+        path = safe_target(instance_dir, file_info["path"])
+        if not hashes.get("sha1") and hashes.get("sha512") and os.path.isfile(path) and _file_sha512(path) == hashes["sha512"].lower(): continue
+        tasks.append({"url": file_info["downloads"], "path": path, "sha1": hashes.get("sha1"), "size": file_info.get("fileSize")})
+        if hashes.get("sha512") and not hashes.get("sha1"): sha512_checks.append((path, hashes["sha512"]))
+
+    needed = {}
+    for task in tasks:
+        target = _download_target(task)
+        if not os.path.exists(target): needed[target] = task["size"] or 0
+    needed.update((path, info.file_size) for path, info in overrides.items())
+    check_free_space(needed)
+
+    # Overrides, совпадающие с файлами из index, применяются после загрузки, чтобы не писать в один файл из двух потоков
+    download_paths = {t["path"] for t in tasks}
+    deferred = {p: info for p, info in overrides.items() if p in download_paths}
+    concurrent = {p: info for p, info in overrides.items() if p not in download_paths}
+    result = {}
+
+    def extract():
+        try: result["written"] = _extract_overrides(mrpack_path, concurrent)
+        except Exception as e: result["error"] = e
+
+    extractor = threading.Thread(target=tracing.wrap(extract), name="mrpack-overrides", daemon=True)
+    extractor.start()
+    try:
+        download_files(tasks, callback)
+    finally:
+        extractor.join()
+    if "error" in result: raise result["error"]
+
+    for path, expected in sha512_checks:
+        if _file_sha512(path) != expected.lower():
+            os.remove(path)
+            raise ValueError(f"Несовпадение sha512: {os.path.relpath(path, instance_dir)}")
+
+    written = result.get("written", 0) + _extract_overrides(mrpack_path, deferred)
+    print(f"Модпак: {len(tasks)} файлов из index, {written} файлов overrides")
+    return mc_version, loader
@@ -0,0 +1,183 @@
+import os
+import json
+import queue
+import threading
+
+CONFIG_NAME = "instance_config.json"
+
+class InstanceRegistry:
+    """
+    Кеш инстансов в памяти: имя -> данные instance_config.json и производная статистика
+    (размер на диске, число модов, время последнего запуска).
+    Каталог minecraft_instances пересканируется только при смене его mtime, а изменения,
+    сделанные самим лаунчером, вносятся через update/remove/touch. Статистика считается в фоне
+    и сохраняется на диск, чтобы при следующем старте не обходить неизменившиеся инстансы.
+    """
+
+    def __init__(self, base_dir, stats_path):
+        self.base_dir = base_dir
+        self.stats_path = stats_path
+        self.entries = {}
+        self.dir_mtime = None
+        self.lock = threading.RLock()
+        self.stats = self._load_stats()
+        self.stats_dirty = False
+        self.pending = queue.Queue()
+        self.queued = set()
+        self.worker = threading.Thread(target=self._stats_worker, name="instance-stats", daemon=True)
+        self.worker.start()
+
+    def _load_stats(self):
+        try:
+            with open(self.stats_path, "r") as f: return json.load(f)
+        except (OSError, ValueError): return {}
+
+    def _save_stats(self):
+        with self.lock:
+            if not self.stats_dirty: return
+            data = json.dumps(self.stats)
+            self.stats_dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.stats_path), exist_ok=True)
+            with open(self.stats_path + ".tmp", "w") as f: f.write(data)
+            os.replace(self.stats_path + ".tmp", self.stats_path)
+        except OSError as e:
+            print(f"Не удалось сохранить статистику инстансов: {e}")
+
+    def _cfg_stamp(self, name):
+        """(mtime_ns, size) файла instance_config.json или None, если его нет."""
+        try: st = os.stat(os.path.join(self.base_dir, name, CONFIG_NAME))
+        except OSError: return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_entry(self, name):
+        cfg_stamp = self._cfg_stamp(name)
+        config = {}
+        try:
+            with open(os.path.join(self.base_dir, name, CONFIG_NAME), "r") as f: config = json.load(f)
+        except (OSError, ValueError): pass
+        return {"name": name, "version": config.get("version", "?"), "loader": config.get("loader", "Vanilla"), "config": config, "cfg_stamp": cfg_stamp}
+
+    def _scan(self):
+        """Сверяет кеш с каталогом: новые инстансы читаются, удаленные выбрасываются, измененные конфиги перечитываются."""
+        try: mtime = os.stat(self.base_dir).st_mtime_ns
+        except OSError: mtime = None
+        if mtime is not None and mtime == self.dir_mtime: return
+        try: names = [e.name for e in os.scandir(self.base_dir) if e.is_dir()]
+        except OSError: names = []
+        with self.lock:
+            for name in set(self.entries) | set(self.stats):
+                if name not in names: self.remove(name)
+            for name in names:
+                entry = self.entries.get(name)
+                if entry and self._cfg_stamp(name) == entry["cfg_stamp"]: continue
+                self.entries[name] = self._read_entry(name)
+                self._queue_stats(name)
+            self.dir_mtime = mtime
+
+    def _public(self, entry):
+        stats = self.stats.get(entry["name"], {})
+        return {"name": entry["name"], "version": entry["version"], "loader": entry["loader"], "size": stats.get("size"), "mods": stats.get("mods"), "last_played": stats.get("last_played")}
+
+    def list(self):
+        with self.lock:
+            self._scan()
+            return [self._public(self.entries[name]) for name in sorted(self.entries, key=str.lower)]
+
+    def page(self, offset=0, limit=50):
+        items = self.list()
+        offset, limit = max(0, int(offset)), max(1, int(limit))
+        return {"total": len(items), "offset": offset, "items": items[offset:offset + limit]}
+
+    def get_config(self, name):
+        """
+        Содержимое instance_config.json (копия) или None, если инстанса нет.
+        Правка конфига не меняет mtime каталога minecraft_instances, поэтому файл инстанса сверяется
+        по (mtime_ns, size) при каждом вызове и перечитывается, если изменился.
+        """
+        with self.lock:
+            self._scan()
+            entry = self.entries.get(name)
+            if entry and self._cfg_stamp(name) != entry["cfg_stamp"]:
+                entry = self.entries[name] = self._read_entry(name)
+            return dict(entry["config"]) if entry else None
+
+    def update(self, name):
+        """Перечитывает инстанс после того, как лаунчер создал его или изменил конфиг."""
+        with self.lock:
+            if os.path.isdir(os.path.join(self.base_dir, name)):
+                self.entries[name] = self._read_entry(name)
+                self._queue_stats(name)
+            else: self.remove(name)
+
+    def remove(self, name):
+        with self.lock:
+            self.entries.pop(name, None)
+            if self.stats.pop(name, None) is not None: self.stats_dirty = True
+
+    def touch(self, name, played_at=None):
+        """Пересчитывает статистику инстанса (после запуска, установки модов); played_at - время запуска."""
+        with self.lock:
+            if played_at:
+                self.stats.setdefault(name, {})["last_played"] = played_at
+                self.stats_dirty = True
+            self._queue_stats(name, force=True)
+
+    def _queue_stats(self, name, force=False):
+        if name in self.queued: return
+        self.queued.add(name)
+        self.pending.put((name, force))
+
+    def _stamp(self, instance_dir):
+        """Дешевый признак изменений: mtime корня инстанса и каталога mods."""
+        stamp = []
+        for path in (instance_dir, os.path.join(instance_dir, "mods")):
+            try: stamp.append(os.stat(path).st_mtime_ns)
+            except OSError: stamp.append(None)
+        return stamp
+
+    @staticmethod
+    def _dir_size(path):
+        total, stack = 0, [path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False): stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False): total += entry.stat(follow_symlinks=False).st_size
+                        except OSError: pass
+            except OSError: pass
+        return total
+
+    def _compute(self, name, force):
+        instance_dir = os.path.join(self.base_dir, name)
+        if not os.path.isdir(instance_dir): return
+        stamp = self._stamp(instance_dir)
+        with self.lock: previous = dict(self.stats.get(name, {}))
+        if not force and previous.get("stamp") == stamp and "size" in previous: return
+
+        mods_dir = os.path.join(instance_dir, "mods")
+        try: mods = sum(1 for f in os.listdir(mods_dir) if f.endswith(".jar"))
+        except OSError: mods = 0
+        last_played = previous.get("last_played")
+        if last_played is None:
+            # Для инстансов, запущенных до появления реестра, берем время последнего лога
+            for log_name in ("game_output.log", "latest.log"):
+                try:
+                    last_played = os.path.getmtime(os.path.join(instance_dir, "logs", log_name))
+                    break
+                except OSError: pass
+        stats = {"stamp": stamp, "size": self._dir_size(instance_dir), "mods": mods, "last_played": last_played}
+        with self.lock:
+            if name in self.entries or os.path.isdir(instance_dir):
+                self.stats[name] = stats
+                self.stats_dirty = True
+
+    def _stats_worker(self):
+        while True:
+            name, force = self.pending.get()
+            with self.lock: self.queued.discard(name)
+            try: self._compute(name, force)
+            except Exception as e: print(f"Ошибка подсчета статистики инстанса {name}: {e}")
+            if self.pending.empty(): self._save_stats()
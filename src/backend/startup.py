@@ -0,0 +1,25 @@
+import time
+
+PHASES = ("import", "api_init", "window", "first_paint")
+
+_started = time.perf_counter()
+_marks = {}
+
+def begin(started):
+    """Точка отсчета - время старта процесса (perf_counter в самом начале main.py)."""
+    global _started
+    _started = started
+
+def mark(phase):
+    _marks.setdefault(phase, time.perf_counter())
+
+def report():
+    """Длительность каждой фазы запуска и общее время до первой отрисовки, в миллисекундах."""
+    result, previous = {}, _started
+    for phase in PHASES:
+        if phase not in _marks: continue
+        result[phase] = round((_marks[phase] - previous) * 1000, 1)
+        previous = _marks[phase]
+    result["total"] = round((previous - _started) * 1000, 1)
+    print("Startup: " + ", ".join(f"{k} {v} ms" for k, v in result.items()))
+    return result
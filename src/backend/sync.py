@@ -1,7 +1,14 @@
 import os
+import json
 import shutil
 import hashlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = ".sync_manifest.json"
+HASH_CHUNK = 1024 * 1024
+HASH_WORKERS = 4
+SKIP_DIRS = {"__pycache__"}
 
 def calculate_file_hash(filepath):
     """
@@ -11,22 +18,84 @@ def calculate_file_hash(filepath):
     hasher = hashlib.sha256()
     try:
         with open(filepath, 'rb') as f:
-            while chunk := f.read(8192):
+            while chunk := f.read(HASH_CHUNK):
                 hasher.update(chunk)
         return hasher.hexdigest()
     except (FileNotFoundError, PermissionError):
         return None
 
-def sync_source_to_data():
+def _stamp(st):
+    return [st.st_size, st.st_mtime_ns]
+
+def _stat(path):
+    try: return _stamp(os.stat(path))
+    except OSError: return None
+
+def _scan(source_path, item):
+    """Файлы источника: {относительный путь от data: [size, mtime_ns]}, без __pycache__ и .pyc."""
+    if os.path.isfile(source_path): return {item: _stat(source_path)}
+    result = {}
+    stack = [(source_path, item)]
+    while stack:
+        directory, rel = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS: stack.append((entry.path, rel + "/" + entry.name))
+                    elif entry.is_file() and not entry.name.endswith(".pyc"):
+                        result[rel + "/" + entry.name] = _stamp(entry.stat())
+        except OSError as e:
+            print(f"[Sync] Warning: cannot read {directory}: {e}")
+    return result
+
+def _load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+        return data.get("files", {}) if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(path, files):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f: json.dump({"version": 1, "files": files}, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+def _copy_atomic(src_file, dst_file):
+    """Копия через временный файл рядом с целью: прерванная синхронизация не оставляет обрезанных файлов."""
+    os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+    temp_path = dst_file + ".sync-tmp"
+    try:
+        shutil.copy2(src_file, temp_path)
+        os.replace(temp_path, dst_file)
+    except BaseException:
+        try: os.remove(temp_path)
+        except OSError: pass
+        raise
+
+def _remove_empty_dirs(path, stop):
+    while path.startswith(stop) and path != stop:
+        try: os.rmdir(path)
+        except OSError: return
+        path = os.path.dirname(path)
+
+def sync_source_to_data(base_dir=None, data_dir=None, verify=False):
     """
     Синхронизирует папку 'src' и файл 'main.py' в папку 'data'.
     - Создает структуру папок.
     - Копирует только новые или измененные файлы.
+    - Удаляет из 'data' файлы, которые ранее были синхронизированы, но исчезли из источника.
     - Игнорирует __pycache__ и .pyc файлы.
+
+    В data/.sync_manifest.json хранится для каждого файла [size, mtime_ns] источника и копии и SHA256.
+    Если метаданные обеих сторон совпадают с манифестом, файл не читается вовсе, поэтому синхронизация
+    без изменений занимает миллисекунды; хешируются (параллельно) только файлы с изменившимися метаданными.
+    verify=True игнорирует манифест и сверяет содержимое всех файлов.
+    Возвращает счетчики: copied, removed, unchanged, hashed.
     """
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(base_dir, "data")
-    
+    base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+    data_dir = data_dir or os.path.join(base_dir, "data")
+
     # Создаем папку data, если её нет
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
@@ -42,51 +111,78 @@ def sync_source_to_data():
         os.makedirs(user_dir)
         print(f"[Sync] Created user directory: {user_dir}")
 
+    manifest_path = os.path.join(data_dir, MANIFEST_NAME)
+    previous = _load_manifest(manifest_path)
+    manifest = {} if verify else previous
+    stats = {"copied": 0, "removed": 0, "unchanged": 0, "hashed": 0}
+
+    source = {}
     for item in items_to_sync:
         source_path = os.path.join(base_dir, item)
-        dest_path = os.path.join(data_dir, item)
-
         if not os.path.exists(source_path):
             print(f"[Sync] Warning: Source item '{item}' not found in {base_dir}")
+            # Отсутствующий элемент не считается удаленным: записи манифеста сохраняются
+            source.update({rel: None for rel in previous if rel == item or rel.startswith(item + "/")})
             continue
+        source.update(_scan(source_path, item))
 
-        if os.path.isdir(source_path):
-            # Если папки назначения нет, копируем целиком (быстро)
-            if not os.path.exists(dest_path):
-                shutil.copytree(source_path, dest_path, ignore=shutil.ignore_patterns('__pycache__', '*.pyc'))
-                print(f"[Sync] Copied directory: {item}")
+    new_manifest = {}
+    candidates = []
+    for rel, src_stamp in source.items():
+        entry = manifest.get(rel)
+        if src_stamp is None:
+            new_manifest[rel] = previous[rel]
+            continue
+        dst_stamp = _stat(os.path.join(data_dir, rel))
+        if entry and dst_stamp and entry[:2] == src_stamp and entry[2:4] == dst_stamp:
+            new_manifest[rel] = entry
+            stats["unchanged"] += 1
+        else:
+            candidates.append((rel, src_stamp, dst_stamp, entry))
+
+    def check(candidate):
+        """Хеш источника, а копии - только если ее метаданные не подтверждены манифестом."""
+        rel, src_stamp, dst_stamp, entry = candidate
+        src_digest = calculate_file_hash(os.path.join(base_dir, rel))
+        if dst_stamp is None: return src_digest, None, 1
+        if entry and entry[2:4] == dst_stamp: return src_digest, entry[4], 1
+        return src_digest, calculate_file_hash(os.path.join(data_dir, rel)), 2
+
+    if candidates:
+        with ThreadPoolExecutor(max_workers=min(HASH_WORKERS, len(candidates)), thread_name_prefix="sync-hash") as pool:
+            results = list(pool.map(check, candidates))
+        for (rel, src_stamp, dst_stamp, entry), (src_digest, dst_digest, hashed) in zip(candidates, results):
+            stats["hashed"] += hashed
+            if src_digest is None: continue
+            dst_file = os.path.join(data_dir, rel)
+            if dst_digest != src_digest:
+                _copy_atomic(os.path.join(base_dir, rel), dst_file)
+                dst_stamp = _stat(dst_file)
+                stats["copied"] += 1
+                print(f"[Sync] Updated: {rel}")
             else:
-                # Если папка есть, идем внутрь и сверяем файлы
-                for root, dirs, files in os.walk(source_path):
-                    # Исключаем кэш Python из обхода
-                    dirs[:] = [d for d in dirs if d != '__pycache__']
-                    
-                    rel_path = os.path.relpath(root, source_path)
-                    dest_root = os.path.join(dest_path, rel_path)
-
-                    if not os.path.exists(dest_root):
-                        os.makedirs(dest_root)
-
-                    for file in files:
-                        if file.endswith('.pyc'): continue
-                        
-                        src_file = os.path.join(root, file)
-                        dst_file = os.path.join(dest_root, file)
-                        
-                        # Копируем, если файла нет или хеши не совпадают
-                        if not os.path.exists(dst_file) or calculate_file_hash(src_file) != calculate_file_hash(dst_file):
-                            shutil.copy2(src_file, dst_file)
-                            print(f"[Sync] Updated: {os.path.join(item, rel_path, file)}")
-        
-        elif os.path.isfile(source_path):
-            # Синхронизация отдельного файла (main.py)
-            if not os.path.exists(dest_path) or calculate_file_hash(source_path) != calculate_file_hash(dest_path):
-                shutil.copy2(source_path, dest_path)
-                print(f"[Sync] Updated file: {item}")
+                stats["unchanged"] += 1
+            new_manifest[rel] = src_stamp + dst_stamp + [src_digest]
+
+    # Удаляются только файлы из манифеста, чья копия не менялась после синхронизации
+    for rel, entry in previous.items():
+        if rel in source: continue
+        dst_file = os.path.join(data_dir, rel)
+        if _stat(dst_file) == entry[2:4]:
+            try:
+                os.remove(dst_file)
+                stats["removed"] += 1
+                print(f"[Sync] Removed: {rel}")
+                _remove_empty_dirs(os.path.dirname(dst_file), data_dir)
+            except OSError as e:
+                print(f"[Sync] Warning: cannot remove {rel}: {e}")
+
+    if new_manifest != previous: _save_manifest(manifest_path, new_manifest)
+    return stats
 
 if __name__ == "__main__":
     try:
-        sync_source_to_data()
-        print("[Sync] Done.")
+        stats = sync_source_to_data(verify="--verify" in sys.argv[1:])
+        print(f"[Sync] Done: {stats['copied']} copied, {stats['removed']} removed, {stats['unchanged']} unchanged, {stats['hashed']} hashed.")
     except Exception as e:
-        print(f"[Sync] Error: {e}")
\ No newline at end of file
+        print(f"[Sync] Error: {e}")
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+
+KEEP_TRACES = 20
+
+_enabled = os.environ.get("FOLIA_TRACE") == "1"
+_directory = "traces"
+# Активная трасса у каждого потока своя: параллельные задачи пишут каждая в свою, в пул она переносится через wrap()
+_local = threading.local()
+
+def configure(enabled, directory=None):
+    """Включает запись трасс (настройка tracing в launcher_config.json или FOLIA_TRACE=1); directory - куда их писать."""
+    global _enabled, _directory
+    _enabled = bool(enabled) or os.environ.get("FOLIA_TRACE") == "1"
+    if directory: _directory = directory
+
+def current():
+    """Трасса, в которую пишет текущий поток (или None)."""
+    return getattr(_local, "trace", None)
+
+def enabled():
+    return current() is not None
+
+class _NoopSpan:
+    """Заглушка, которую span() отдает без активной трассы: никаких аллокаций и блокировок."""
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def set(self, **args): pass
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.counters = {}
+
+    def __enter__(self):
+        _stack().append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        stack = _stack()
+        if stack and stack[-1] is self: stack.pop()
+        if exc_type: self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.trace._finish_span(self, ended)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None: stack = _local.stack = []
+    return stack
+
+class Trace:
+    """
+    Трасса одной операции (запуск, импорт mrpack): события в формате Chrome trace-event
+    и сводка по фазам - число вызовов, суммарное время и счетчики (байты, попадания в кеш, повторы).
+    Счетчик засчитывается всем открытым спанам потока, в том числе унаследованным через wrap().
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.pid = os.getpid()
+        self.events = []
+        self.phases = {}
+        self.totals = {}
+        self.threads = {}
+        self.finished = False
+        self.lock = threading.Lock()
+
+    def _tid(self):
+        ident = threading.get_ident()
+        tid = self.threads.get(ident)
+        if tid is None:
+            tid = self.threads[ident] = (len(self.threads) + 1, threading.current_thread().name)
+        return tid[0]
+
+    def _us(self, t):
+        return round((t - self.started) * 1e6, 1)
+
+    def count(self, name, value):
+        with self.lock:
+            self.totals[name] = self.totals.get(name, 0) + value
+            seen = set()
+            for span in _stack():
+                if span.trace is not self or id(span) in seen: continue
+                seen.add(id(span))
+                span.counters[name] = span.counters.get(name, 0) + value
+
+    def _finish_span(self, span, ended):
+        duration = ended - span.started
+        with self.lock:
+            tid = self._tid()
+            self.events.append({"name": span.name, "cat": "launcher", "ph": "X", "ts": self._us(span.started), "dur": round(duration * 1e6, 1), "pid": self.pid, "tid": tid, "args": dict(span.args, **span.counters)})
+            phase = self.phases.setdefault(span.name, {"calls": 0, "ms": 0.0, "counters": {}})
+            phase["calls"] += 1
+            phase["ms"] += duration * 1000
+            for name, value in span.counters.items():
+                phase["counters"][name] = phase["counters"].get(name, 0) + value
+
+    def record(self, name, started, ended=None, **args):
+        """Событие с явными границами (например, от старта JVM до главного меню), без вложенности."""
+        span = _Span(self, name, args)
+        span.started = started
+        self._finish_span(span, ended if ended is not None else time.perf_counter())
+
+    def summary(self):
+        total_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        with self.lock:
+            phases = {name: {"calls": p["calls"], "ms": round(p["ms"], 1), "counters": dict(p["counters"])} for name, p in self.phases.items()}
+            return {"label": self.label, "started_at": self.wall_started, "total_ms": total_ms, "phases": phases, "counters": dict(self.totals)}
+
+    def write(self, directory):
+        """Пишет <label>-<время>.trace.json (открывается в chrome://tracing или Perfetto) и .summary.txt рядом."""
+        summary = self.summary()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.wall_started))
+        base = os.path.join(directory, f"{self.label}-{stamp}")
+        with self.lock:
+            meta = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}} for tid, name in self.threads.values()]
+            events = meta + list(self.events)
+        os.makedirs(directory, exist_ok=True)
+        with open(base + ".trace.json.tmp", "w") as f: json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": summary}, f)
+        os.replace(base + ".trace.json.tmp", base + ".trace.json")
+        with open(base + ".summary.txt", "w", encoding="utf-8") as f: f.write(format_summary(summary) + "\n")
+        _prune(directory)
+        return base + ".trace.json", summary
+
+def _prune(directory, keep=KEEP_TRACES):
+    try: traces = sorted((f for f in os.listdir(directory) if f.endswith(".trace.json")), key=lambda f: os.path.getmtime(os.path.join(directory, f)))
+    except OSError: return
+    for name in traces[:-keep]:
+        for path in (name, name[:-len(".trace.json")] + ".summary.txt"):
+            try: os.remove(os.path.join(directory, path))
+            except OSError: pass
+
+def format_summary(summary):
+    """Компактная таблица фаз, отсортированная по времени."""
+    lines = [f"{summary['label']}: {summary['total_ms'] / 1000:.2f}s"]
+    for name, phase in sorted(summary["phases"].items(), key=lambda item: -item[1]["ms"]):
+        counters = " ".join(f"{k}={v}" for k, v in sorted(phase["counters"].items()))
+        lines.append(f"  {name:<36} {phase['calls']:>6}x {phase['ms'] / 1000:>9.2f}s  {counters}".rstrip())
+    if summary["counters"]:
+        lines.append("  totals: " + " ".join(f"{k}={v}" for k, v in sorted(summary["counters"].items())))
+    return "\n".join(lines)
+
+def span(name, **args):
+    """with tracing.span("install_assets"): ... - без активной трассы почти ничего не стоит."""
+    trace = current()
+    if trace is None: return _NOOP
+    return _Span(trace, name, args)
+
+def count(name, value=1):
+    trace = current()
+    if trace is not None: trace.count(name, value)
+
+def record(name, started, ended=None, **args):
+    trace = current()
+    if trace is not None: trace.record(name, started, ended, **args)
+
+def traced(name=None):
+    """Декоратор: вызов функции оборачивается в спан с ее именем."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = current()
+            if trace is None: return fn(*args, **kwargs)
+            with _Span(trace, span_name, {}): return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def wrap(fn):
+    """Переносит трассу и открытые спаны текущего потока в задачу пула, чтобы ее счетчики попали в фазу-родителя."""
+    trace = current()
+    if trace is None: return fn
+    parent = list(_stack())
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        saved, saved_trace = list(stack), current()
+        stack[:] = parent
+        _local.trace = trace
+        try: return fn(*args, **kwargs)
+        finally:
+            stack[:] = saved
+            _local.trace = saved_trace
+    return wrapper
+
+def start(label):
+    """
+    Начинает трассу текущего потока, если запись включена и у потока еще нет своей трассы
+    (вложенная операция пишется во внешнюю). Возвращает Trace или None.
+    """
+    if not _enabled or current() is not None: return None
+    trace = _local.trace = Trace(label)
+    return trace
+
+def finish(trace, directory=None):
+    """Завершает трассу, начатую start(); повторный вызов ничего не делает. Возвращает (путь, сводка) или None."""
+    if trace is None or trace.finished: return None
+    trace.finished = True
+    if current() is trace: _local.trace = None
+    try:
+        path, summary = trace.write(directory or _directory)
+    except OSError as e:
+        print(f"Не удалось записать трассу: {e}")
+        return None
+    print(format_summary(summary))
+    print(f"Трасса: {path}")
+    return path, summary
+
+@contextmanager
+def session(label, directory=None):
+    trace = start(label)
+    try: yield trace
+    finally: finish(trace, directory)
@@ -1,78 +1,497 @@
 import sys
 import os
-import requests
+import atexit
+import json
 import time
 import shutil
 import zipfile
 import hashlib
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .ledger import VerifyLedger
+from .mirrors import MirrorTable
+from . import tracing, jobs
+
+DOWNLOAD_WORKERS = 8
+CHUNK_SIZE = 256 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+SEGMENT_THRESHOLD = 32 * 1024 * 1024
+SEGMENTS = 4
+USER_AGENT = "FoliaLauncher/beta-2"
+
+_session = None
+_session_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def get_data_root():
+    # Отдельный каталог данных (портативная установка, бенчмарки)
+    if os.environ.get("FOLIA_DATA_DIR"): return os.environ["FOLIA_DATA_DIR"]
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.path.dirname(sys.executable), "data")
+
+    path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(path, "data")
+
+STORE_DIR = os.path.join(get_data_root(), "store")
+VERIFY_LEDGER = VerifyLedger(os.path.join(get_data_root(), "cache", "verified.json"))
+MIRRORS = MirrorTable(os.path.join(get_data_root(), "cache", "mirrors.json"), lambda: get_session())
+# Одиночные загрузки (инсталлеры, клиент вне пакета) пишут в журнал без save(): сохраняем его при выходе
+atexit.register(VERIFY_LEDGER.save)
+atexit.register(MIRRORS.save)
 
 def get_os_name():
     if sys.platform == "win32": return "windows"
     elif sys.platform == "darwin": return "osx"
     return "linux"
 
-def verify_hash(path, expected_hash):
-    if not expected_hash: return True
+def configure_downloads(max_workers=None):
+    """Задает лимит параллельных загрузок (download_threads в launcher_config.json)."""
+    global DOWNLOAD_WORKERS, _session
+    if max_workers:
+        DOWNLOAD_WORKERS = max(1, int(max_workers))
+        with _session_lock: _session = None
+
+def configure_mirrors(rules=None, exclusive=False):
+    """Задает правила подмены URL на зеркала (mirrors и mirrors_exclusive в launcher_config.json)."""
+    MIRRORS.configure(rules, exclusive)
+
+def get_session():
+    """
+    Общая requests.Session для всех загрузок.
+    Держит keep-alive пул соединений на каждый хост, чтобы не делать TLS-рукопожатие на каждый файл.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            # requests импортируется при первой загрузке, а не при старте лаунчера
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(DOWNLOAD_WORKERS, 10))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT})
+            _session = session
+        return _session
+
+def format_size(num):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num < 1024 or unit == "GB": break
+        num /= 1024.0
+    return f"{num:.1f} {unit}" if unit != "B" else f"{int(num)} B"
+
+def file_sha1(path):
     sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(1024 * 1024)
+            if not data: break
+            sha1.update(data)
+    return sha1.hexdigest()
+
+def verify_hash(path, expected_hash, deep=False):
+    """
+    Сверяет sha1 файла. Без deep результат берется из VERIFY_LEDGER,
+    если файл не менялся с момента последней проверки.
+    """
+    if not expected_hash: return True
+    if not deep:
+        cached = VERIFY_LEDGER.lookup(path)
+        if cached: return cached == expected_hash.lower()
     try:
-        with open(path, 'rb') as f:
-            while True:
-                data = f.read(65536)
-                if not data: break
-                sha1.update(data)
-        return sha1.hexdigest().lower() == expected_hash.lower()
-    except: return False
-
-def download_file(url, path, callback=None, sha1=None):
+        st = os.stat(path)
+        digest = file_sha1(path)
+    except OSError: return False
+    VERIFY_LEDGER.record(path, st, sha1=digest)
+    return digest == expected_hash.lower()
+
+def verify_zip(path, deep=False):
+    """Проверяет целостность jar/zip через testzip, результат кешируется в VERIFY_LEDGER."""
+    if not deep and VERIFY_LEDGER.lookup(path, "zip"): return True
+    try:
+        st = os.stat(path)
+        with zipfile.ZipFile(path, 'r') as z:
+            if z.testzip() is not None: return False
+    except (OSError, zipfile.BadZipFile): return False
+    VERIFY_LEDGER.record(path, st, zip=True)
+    return True
+
+@tracing.traced()
+def download_file(url, path, callback=None, sha1=None, on_bytes=None):
+    """
+    url - строка или список равноценных URL (например, downloads из mrpack).
+    Кандидаты дополняются зеркалами из MIRRORS и перебираются от самого быстрого хоста;
+    при ошибке загрузка сразу переходит на следующий кандидат, а пауза делается только после обхода всех.
+    Один и тот же путь (например, объект общего хранилища, нужный двум задачам сразу) качается
+    одним потоком, остальные ждут его и затем берут готовый файл.
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    while True:
+        with _inflight_lock:
+            done = _inflight.get(key)
+            if done is None:
+                done = _inflight[key] = threading.Event()
+                break
+        tracing.count("inflight_waits")
+        jobs.wait(done)
+    try: return _download_file(url, path, callback, sha1, on_bytes)
+    finally:
+        with _inflight_lock: _inflight.pop(key, None)
+        done.set()
+
+def _download_file(url, path, callback, sha1, on_bytes):
     if os.path.exists(path):
         if sha1:
-            if verify_hash(path, sha1): return
+            if verify_hash(path, sha1): tracing.count("cache_hits"); return
             print(f"Hash mismatch for {path}, redownloading...")
             try: os.remove(path)
             except OSError: pass
         # Если это jar, проверяем, что архив не битый
         elif path.endswith(".jar"):
-            try:
-                with zipfile.ZipFile(path, 'r') as z:
-                    if z.testzip() is not None:
-                        raise zipfile.BadZipFile("CRC mismatch")
-            except zipfile.BadZipFile:
-                print(f"Обнаружен поврежденный файл: {path}. Перекачиваем...")
-                try: os.remove(path)
-                except OSError: pass
-            else:
-                return # Файл цел
+            if verify_zip(path): tracing.count("cache_hits"); return # Файл цел
+            print(f"Обнаружен поврежденный файл: {path}. Перекачиваем...")
+            try: os.remove(path)
+            except OSError: pass
         else:
-            return # Файл существует, пропускаем скачивание
+            tracing.count("cache_hits"); return # Файл существует, пропускаем скачивание
 
-    max_retries = 3
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    candidates = MIRRORS.candidates(url)
+    MIRRORS.probe_background(candidates)
+    tried = set()
+    max_retries = max(5, len(candidates))
     for attempt in range(max_retries):
+        current = next((u for u in MIRRORS.rank(candidates) if u not in tried), None)
+        if current is None:
+            tried.clear()
+            current = MIRRORS.rank(candidates)[0]
         try:
             if callback:
                 callback.get("setStatus", lambda x: None)(f"Скачивание: {os.path.basename(path)}")
-                
-            os.makedirs(os.path.dirname(path), exist_ok=True)
             print(f"Скачивание: {os.path.basename(path)} (Попытка {attempt+1})")
-            
-            resp = requests.get(url, stream=True, timeout=15)
-            resp.raise_for_status()
-            
-            temp_path = path + ".tmp"
-            with open(temp_path, 'wb') as f:
-                for chunk in resp.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            if os.path.exists(path):
-                try: os.remove(path)
-                except OSError: pass
-            
-            shutil.move(temp_path, path)
-            
-            if sha1 and not verify_hash(path, sha1):
+
+            started = time.monotonic()
+            digest, received = _download_to_temp(current, temp_path, sha1, on_bytes)
+            if sha1 and digest != sha1.lower():
+                _drop_partial(temp_path)
                 raise Exception("Downloaded file hash mismatch")
+            MIRRORS.report_success(current, received, time.monotonic() - started)
+            tracing.count("bytes", received)
+
+            os.replace(temp_path, path)
+            _drop_partial(temp_path)
+            if digest: VERIFY_LEDGER.record(path, sha1=digest)
             return
-            
+
+        except jobs.JobCancelled:
+            raise
         except Exception as e:
-            print(f"Ошибка при скачивании {url}: {e}")
+            print(f"Ошибка при скачивании {current}: {e}")
+            MIRRORS.report_failure(current)
+            tracing.count("retries")
+            tried.add(current)
             if attempt == max_retries - 1: raise e
-            time.sleep(2)
\ No newline at end of file
+            if len(tried) >= len(candidates): jobs.sleep(_backoff_delay(attempt))
+
+def _backoff_delay(attempt):
+    """Экспоненциальная задержка с джиттером: ~1, 2, 4, 8... секунд, не более 30."""
+    return min(30.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+
+def _partial_meta_path(temp_path):
+    return temp_path + ".meta"
+
+def _read_partial(temp_path):
+    """Сведения о недокачанном файле: {"url", "validator"} или None."""
+    try:
+        with open(_partial_meta_path(temp_path), "r") as f: meta = json.load(f)
+        return meta if isinstance(meta, dict) else None
+    except (OSError, ValueError): return None
+
+def _write_partial(temp_path, url, resp):
+    """Запоминает рядом с .tmp валидатор ответа (сильный ETag или Last-Modified) для If-Range при докачке."""
+    etag = resp.headers.get("ETag")
+    validator = etag if etag and not etag.startswith("W/") else resp.headers.get("Last-Modified")
+    with open(_partial_meta_path(temp_path), "w") as f: json.dump({"url": url, "validator": validator}, f)
+    return validator
+
+def _drop_partial(temp_path):
+    for name in (temp_path, _partial_meta_path(temp_path)):
+        try: os.remove(name)
+        except OSError: pass
+
+def _download_to_temp(url, temp_path, sha1=None, on_bytes=None):
+    """
+    Качает url в temp_path, продолжая с уже скачанной части через HTTP Range.
+    Докачка идет с If-Range по валидатору из temp_path.meta: если файл на сервере изменился,
+    сервер отвечает 200 и загрузка начинается заново. Без валидатора (и без sha1 для проверки) часть не используется.
+    Часть, скачанная с другого хоста (загрузка переключилась на зеркало), отбрасывается.
+    Хеш считается по ходу записи, поэтому после загрузки файл не перечитывается.
+    Большие файлы с поддержкой Range качаются в несколько соединений.
+    Возвращает (sha1 или None, число реально принятых байтов).
+    """
+    session = get_session()
+    hasher = hashlib.sha1() if sha1 else None
+    offset = os.path.getsize(temp_path) if os.path.exists(temp_path) else 0
+    meta = _read_partial(temp_path) if offset else None
+    validator = (meta or {}).get("validator")
+    if offset and meta and MIRRORS.host(meta.get("url") or "") != MIRRORS.host(url):
+        _drop_partial(temp_path)
+        offset, validator = 0, None
+    if offset and not validator and not sha1:
+        _drop_partial(temp_path)
+        offset = 0
+    if offset and hasher:
+        with open(temp_path, 'rb') as f:
+            while data := f.read(1024 * 1024): hasher.update(data)
+
+    headers = {"Accept-Encoding": "identity"}
+    if offset: headers["Range"] = f"bytes={offset}-"
+    if offset and validator: headers["If-Range"] = validator
+    resp = session.get(url, stream=True, timeout=15, headers=headers)
+    if offset and resp.status_code == 416:
+        resp.close()
+        # Временный файл уже полный (или больше файла на сервере): с sha1 вызывающий проверит его как есть,
+        # а без него такому файлу (например, .tmp от старой версии того же URL) верить нельзя - качаем заново
+        if hasher: return hasher.hexdigest(), 0
+        _drop_partial(temp_path)
+        offset, validator = 0, None
+        resp = session.get(url, stream=True, timeout=15, headers={"Accept-Encoding": "identity"})
+    resp.raise_for_status()
+    if offset and resp.status_code != 206:
+        # Сервер не поддерживает Range или файл изменился (If-Range не совпал) - начинаем заново
+        offset = 0
+        hasher = hashlib.sha1() if sha1 else None
+    if not offset: validator = _write_partial(temp_path, url, resp)
+
+    length = int(resp.headers.get("Content-Length") or 0)
+    if not offset and length >= SEGMENT_THRESHOLD and resp.headers.get("Accept-Ranges") == "bytes":
+        resp.close()
+        return _download_segmented(session, url, temp_path, length, on_bytes, validator=validator, sha1=bool(sha1)), length
+
+    chunk_size = MIN_CHUNK_SIZE
+    received = 0
+    with open(temp_path, 'ab' if offset else 'wb') as f:
+        while True:
+            started = time.monotonic()
+            chunk = resp.raw.read(chunk_size, decode_content=True)
+            if not chunk: break
+            f.write(chunk)
+            received += len(chunk)
+            if hasher: hasher.update(chunk)
+            if on_bytes: on_bytes(len(chunk))
+            jobs.transfer(len(chunk))
+            # Адаптивный размер блока: быстрое соединение - крупнее блоки, медленное - мельче
+            elapsed = time.monotonic() - started
+            if elapsed < 0.05 and chunk_size < MAX_CHUNK_SIZE: chunk_size *= 2
+            elif elapsed > 0.5 and chunk_size > MIN_CHUNK_SIZE: chunk_size //= 2
+    return (hasher.hexdigest() if hasher else None), received
+
+def _download_segmented(session, url, temp_path, total, on_bytes=None, segments=None, validator=None, sha1=False):
+    """
+    Многопоточная загрузка большого файла диапазонами в заранее выделенный файл.
+    sha1=True: первый сегмент хешируется прямо из потока, остальные - по порядку, как только готовы
+    предыдущие, пока следующие еще качаются; повторного чтения всего файла после загрузки нет.
+    Возвращает sha1 или None.
+    """
+    segments = segments or SEGMENTS
+    with open(temp_path, 'wb') as f: f.truncate(total)
+    step = -(-total // segments)
+    ranges = [(start, min(start + step, total) - 1) for start in range(0, total, step)]
+    hasher = hashlib.sha1() if sha1 else None
+
+    def fetch(segment):
+        index, (start, end) = segment
+        headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+        if validator: headers["If-Range"] = validator
+        r = session.get(url, stream=True, timeout=15, headers=headers)
+        r.raise_for_status()
+        if r.status_code != 206: raise Exception("Server ignored Range request")
+        with open(temp_path, 'r+b') as f:
+            f.seek(start)
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                if hasher and index == 0: hasher.update(chunk)
+                if on_bytes: on_bytes(len(chunk))
+                jobs.transfer(len(chunk))
+            if f.tell() != end + 1: raise Exception("Incomplete segment")
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="segment") as pool:
+            for index, _ in enumerate(pool.map(jobs.wrap(tracing.wrap(fetch)), enumerate(ranges))):
+                if not hasher or index == 0: continue
+                start, end = ranges[index]
+                with open(temp_path, 'rb') as f:
+                    f.seek(start)
+                    remaining = end + 1 - start
+                    while remaining > 0 and (data := f.read(min(1024 * 1024, remaining))):
+                        hasher.update(data)
+                        remaining -= len(data)
+    except Exception:
+        # Частично заполненный предвыделенный файл нельзя докачать по смещению
+        _drop_partial(temp_path)
+        raise
+    return hasher.hexdigest() if hasher else None
+
+def store_path(sha1):
+    """Путь к объекту в общем хранилище лаунчера (data/store/<xx>/<sha1>)."""
+    sha1 = sha1.lower()
+    return os.path.join(STORE_DIR, sha1[:2], sha1)
+
+def link_file(src, dest):
+    """
+    Связывает dest с файлом src: жесткая ссылка, при неудаче символическая, в крайнем случае копия.
+    Замена атомарная, чтобы игра никогда не увидела наполовину созданный файл.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    temp_path = dest + ".lnk"
+    if os.path.lexists(temp_path): os.remove(temp_path)
+    try:
+        os.link(src, temp_path)
+    except OSError:
+        try: os.symlink(os.path.abspath(src), temp_path)
+        except OSError: shutil.copy2(src, temp_path)
+    os.replace(temp_path, dest)
+
+def download_shared(url, path, sha1, on_bytes=None):
+    """
+    Скачивает файл в общее хранилище по sha1 и связывает его с path внутри инстанса.
+    Уже скачанные другими инстансами файлы не требуют ни сети, ни места на диске.
+    """
+    shared = store_path(sha1)
+    if os.path.exists(path):
+        if os.path.exists(shared) and os.path.samefile(path, shared): tracing.count("store_hits"); return
+        # Файл от старой установки: забираем его в хранилище вместо повторной загрузки
+        if not os.path.exists(shared) and verify_hash(path, sha1):
+            os.makedirs(os.path.dirname(shared), exist_ok=True)
+            try: os.link(path, shared)
+            except OSError: shutil.copy2(path, shared)
+            if os.path.samefile(path, shared): return
+    if os.path.exists(shared): tracing.count("store_hits")
+    download_file(url, shared, sha1=sha1, on_bytes=on_bytes)
+    link_file(shared, path)
+
+class _BatchProgress:
+    """Сводный прогресс пакетной загрузки: файлы, байты, скорость и ETA через callback."""
+
+    def __init__(self, callback, total_files, total_bytes):
+        self.callback = callback or {}
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.done_files = 0
+        self.done_bytes = 0
+        self.started = time.monotonic()
+        self.last_report = 0.0
+        self.lock = threading.Lock()
+        self.callback.get("setMax", lambda x: None)(max(1, total_files))
+
+    def add_bytes(self, n):
+        with self.lock: self.done_bytes += n
+        self.report()
+
+    def file_done(self):
+        with self.lock: self.done_files += 1
+        self.report()
+
+    def report(self, force=False):
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_report < 0.25: return
+            self.last_report = now
+            done_files, done_bytes = self.done_files, self.done_bytes
+        elapsed = max(now - self.started, 1e-6)
+        speed = done_bytes / elapsed
+        eta = None
+        if self.total_bytes and speed > 0:
+            eta = max(0.0, (self.total_bytes - done_bytes) / speed)
+        elif done_files:
+            eta = (self.total_files - done_files) * elapsed / done_files
+        text = f"Скачивание: {done_files}/{self.total_files} • {format_size(speed)}/s"
+        if eta is not None: text += f" • ETA {int(eta // 60)}:{int(eta % 60):02d}"
+        self.callback.get("setProgress", lambda x: None)(done_files)
+        self.callback.get("setStatus", lambda x: None)(text)
+
+def download_files(tasks, callback=None, max_workers=None):
+    """
+    Пакетная загрузка через ограниченный пул потоков.
+    tasks: список словарей {"url" (строка или список URL), "path", "sha1" (опц.), "size" (опц.), "shared" (опц.)}.
+    Задачи с "shared" и sha1 идут через общее хранилище (download_shared).
+    Дубликаты по пути отбрасываются, при первой ошибке оставшиеся задачи пропускаются и ошибка пробрасывается.
+    """
+    unique = {}
+    for task in tasks:
+        unique.setdefault(os.path.normcase(os.path.abspath(task["path"])), task)
+    tasks = list(unique.values())
+    if not tasks: return 0
+
+    progress = _BatchProgress(callback, len(tasks), sum(t.get("size") or 0 for t in tasks))
+    # Хосты замеряются один раз в фоне до старта пула; потоки загрузки не ждут HEAD-запросов
+    mirrored = [c for c in (MIRRORS.candidates(t["url"]) for t in tasks) if len({MIRRORS.host(u) for u in c}) > 1]
+    MIRRORS.probe_background([u for c in mirrored for u in c])
+    failed = threading.Event()
+
+    def worker(task):
+        if failed.is_set(): return
+        try:
+            if task.get("shared") and task.get("sha1"):
+                download_shared(task["url"], task["path"], task["sha1"], on_bytes=progress.add_bytes)
+            else:
+                download_file(task["url"], task["path"], sha1=task.get("sha1"), on_bytes=progress.add_bytes)
+        except Exception:
+            failed.set()
+            raise
+        progress.file_done()
+
+    workers = min(max_workers or DOWNLOAD_WORKERS, len(tasks))
+    error = None
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+        worker = jobs.wrap(tracing.wrap(worker))
+        futures = [pool.submit(worker, t) for t in tasks]
+        for future in as_completed(futures):
+            exc = future.exception()
+            if exc and not error: error = exc
+    progress.report(force=True)
+    VERIFY_LEDGER.save()
+    MIRRORS.save()
+    if error: raise error
+    return len(tasks)
+
+def deep_verify(entries, callback=None, max_workers=None):
+    """
+    Полная перепроверка файлов в обход VERIFY_LEDGER, параллельно.
+    entries: список пар (path, sha1); без sha1 jar-файлы проверяются через testzip.
+    Поврежденные файлы удаляются (вместе с объектом общего хранилища), чтобы следующий запуск их перекачал.
+    Возвращает список удаленных путей.
+    """
+    entries = [e for e in dict(entries).items() if os.path.exists(e[0])]
+    if callback: callback.get("setMax", lambda x: None)(max(1, len(entries)))
+    done = [0]
+    lock = threading.Lock()
+    broken = []
+
+    def check(entry):
+        path, sha1 = entry
+        if sha1: ok = verify_hash(path, sha1, deep=True)
+        elif path.endswith(".jar"): ok = verify_zip(path, deep=True)
+        else: ok = True
+        if not ok:
+            shared = store_path(sha1) if sha1 else None
+            if shared and os.path.exists(shared) and os.path.samefile(path, shared):
+                try: os.remove(shared)
+                except OSError: pass
+            try: os.remove(path)
+            except OSError: pass
+            VERIFY_LEDGER.forget(path)
+        with lock:
+            done[0] += 1
+            if not ok: broken.append(path)
+            if callback: callback.get("setProgress", lambda x: None)(done[0])
+
+    if entries:
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 4, thread_name_prefix="verify") as pool:
+            list(pool.map(check, entries))
+    VERIFY_LEDGER.save()
+    return broken
@@ -47,27 +47,54 @@ const languageGroups = {
     ],
 };
 
+// Файл и глобальная переменная с переводами для каждой группы языков
+const languageBundles = {
+    "MOST USED": { file: 'lang/most_used.js', resources: () => typeof mostUsedResources !== 'undefined' ? mostUsedResources : null },
+    "SLAVIC": { file: 'lang/slavic.js', resources: () => typeof slavicResources !== 'undefined' ? slavicResources : null },
+    "ROMANCE": { file: 'lang/romance.js', resources: () => typeof romanceResources !== 'undefined' ? romanceResources : null },
+    "GERMANIC": { file: 'lang/germanic.js', resources: () => typeof germanicResources !== 'undefined' ? germanicResources : null },
+    "URALIC": { file: 'lang/uralic.js', resources: () => typeof uralicResources !== 'undefined' ? uralicResources : null },
+    "BALTIC": { file: 'lang/baltic.js', resources: () => typeof balticResources !== 'undefined' ? balticResources : null },
+    "OTHER": { file: 'lang/other.js', resources: () => typeof otherResources !== 'undefined' ? otherResources : null },
+};
+
 const i18n = {
     lang: 'en',
     resources: {},
     languageGroups: languageGroups,
     languages: Object.values(languageGroups).flat(),
+    loading: {},
     init: function() {
-        // Now that all lang files are loaded, populate the resources
-        this.resources = {
-            ...(typeof mostUsedResources !== 'undefined' ? mostUsedResources : {}),
-            ...(typeof slavicResources !== 'undefined' ? slavicResources : {}),
-            ...(typeof romanceResources !== 'undefined' ? romanceResources : {}),
-            ...(typeof germanicResources !== 'undefined' ? germanicResources : {}),
-            ...(typeof uralicResources !== 'undefined' ? uralicResources : {}),
-            ...(typeof balticResources !== 'undefined' ? balticResources : {}),
-            ...(typeof otherResources !== 'undefined' ? otherResources : {}),
-        };
+        // Сразу доступна только группа "MOST USED" (в ней английский - запасной язык), остальные грузятся по требованию
+        Object.values(languageBundles).forEach(bundle => Object.assign(this.resources, bundle.resources() || {}));
+    },
+    loadLanguage: function(lang) {
+        if (this.resources[lang]) return Promise.resolve();
+        const group = Object.keys(this.languageGroups).find(g => this.languageGroups[g].some(l => l.code === lang));
+        const bundle = languageBundles[group];
+        if (!bundle) return Promise.resolve();
+        if (!this.loading[group]) {
+            this.loading[group] = new Promise((resolve) => {
+                const script = document.createElement('script');
+                script.src = bundle.file;
+                script.onload = () => {
+                    Object.assign(this.resources, bundle.resources() || {});
+                    resolve();
+                };
+                script.onerror = () => {
+                    delete this.loading[group];
+                    resolve();
+                };
+                document.body.appendChild(script);
+            });
+        }
+        return this.loading[group];
     },
     t: function(key, params = {}) {
         const dict = this.resources[this.lang] || this.resources['en'];
         if (!dict) return key;
-        let str = dict.translation[key] || key;
+        const fallback = this.resources['en'] ? this.resources['en'].translation : {};
+        let str = dict.translation[key] || fallback[key] || key;
         
         // Замена параметров {{param}}
         Object.keys(params).forEach(param => {
@@ -75,7 +102,8 @@ const i18n = {
         });
         return str;
     },
-    changeLanguage: function(lang) {
+    changeLanguage: async function(lang) {
+        await this.loadLanguage(lang);
         if (this.resources[lang]) {
             this.lang = lang;
             this.updatePage();
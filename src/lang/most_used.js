@@ -122,7 +122,36 @@ const mostUsedResources = {
             "importing_mrpack": "Importing modpack...",
             "mrpack_imported": "Modpack imported successfully!",
             "info": "Info",
-            "confirmation": "Confirmation"
+            "confirmation": "Confirmation",
+            "verify_files": "Verify",
+            "verifying_files": "Verifying files...",
+            "verify_repaired": "{{count}} damaged files removed. They will be downloaded again on next launch.",
+            "verify_ok_reinstall": "All files are intact. Reinstall the version and loader on next launch anyway?",
+            "loader_build": "Loader build",
+            "loader_build_auto": "Latest recommended",
+            "duplicate_mod": "Duplicate ID",
+            "check_updates": "Check updates",
+            "checking_updates": "Checking for updates...",
+            "mods_up_to_date": "All mods are up to date.",
+            "mod_updates_available": "{{count}} updates available. Update all?",
+            "missing_dependencies": "No compatible version found for required dependencies: {{names}}",
+            "jvm_profile": "JVM profile:",
+            "appcds": "Speed up startup with a class-data archive (AppCDS)",
+            "jobs": "Jobs",
+            "no_jobs": "No jobs",
+            "cancel": "Cancel",
+            "job_queued": "Queued",
+            "job_running": "Running",
+            "job_done": "Done",
+            "job_failed": "Failed",
+            "job_cancelled": "Cancelled",
+            "job_launch": "Launch",
+            "job_install_mrpack": "Modpack install",
+            "job_import_mrpack": "Modpack import",
+            "job_install_item": "Content install",
+            "job_update_mods": "Mod updates",
+            "job_verify": "Verification",
+            "job_detached": "Running in background"
         }
     },
     ru: {
@@ -248,7 +277,36 @@ const mostUsedResources = {
             "importing_mrpack": "Импорт сборки...",
             "mrpack_imported": "Сборка успешно импортирована!",
             "info": "Информация",
-            "confirmation": "Подтверждение"
+            "confirmation": "Подтверждение",
+            "verify_files": "Проверить",
+            "verifying_files": "Проверка файлов...",
+            "verify_repaired": "Удалено поврежденных файлов: {{count}}. Они будут скачаны заново при следующем запуске.",
+            "verify_ok_reinstall": "Все файлы в порядке. Все равно переустановить версию и загрузчик при следующем запуске?",
+            "loader_build": "Сборка загрузчика",
+            "loader_build_auto": "Последняя рекомендуемая",
+            "duplicate_mod": "Дубликат ID",
+            "check_updates": "Проверить обновления",
+            "checking_updates": "Проверка обновлений...",
+            "mods_up_to_date": "Все моды обновлены.",
+            "mod_updates_available": "Доступно обновлений: {{count}}. Обновить все?",
+            "missing_dependencies": "Не найдена совместимая версия обязательных зависимостей: {{names}}",
+            "jvm_profile": "Профиль JVM:",
+            "appcds": "Ускорять запуск архивом классов (AppCDS)",
+            "jobs": "Задачи",
+            "no_jobs": "Нет задач",
+            "cancel": "Отмена",
+            "job_queued": "В очереди",
+            "job_running": "Выполняется",
+            "job_done": "Готово",
+            "job_failed": "Ошибка",
+            "job_cancelled": "Отменено",
+            "job_launch": "Запуск",
+            "job_install_mrpack": "Установка модпака",
+            "job_import_mrpack": "Импорт модпака",
+            "job_install_item": "Установка контента",
+            "job_update_mods": "Обновление модов",
+            "job_verify": "Проверка",
+            "job_detached": "Работает в фоне"
         }
     },
     fr: {
@@ -374,7 +432,36 @@ const mostUsedResources = {
             "importing_mrpack": "Importation du modpack...",
             "mrpack_imported": "Modpack importé avec succès !",
             "info": "Info",
-            "confirmation": "Confirmation"
+            "confirmation": "Confirmation",
+            "verify_files": "Vérifier",
+            "verifying_files": "Vérification des fichiers...",
+            "verify_repaired": "{{count}} fichiers endommagés supprimés. Ils seront retéléchargés au prochain lancement.",
+            "verify_ok_reinstall": "Tous les fichiers sont intacts. Réinstaller quand même la version et le loader au prochain lancement ?",
+            "loader_build": "Version du loader",
+            "loader_build_auto": "Dernière recommandée",
+            "duplicate_mod": "ID en double",
+            "check_updates": "Vérifier les mises à jour",
+            "checking_updates": "Recherche de mises à jour...",
+            "mods_up_to_date": "Tous les mods sont à jour.",
+            "mod_updates_available": "{{count}} mises à jour disponibles. Tout mettre à jour ?",
+            "missing_dependencies": "Aucune version compatible trouvée pour les dépendances requises : {{names}}",
+            "jvm_profile": "Profil JVM :",
+            "appcds": "Accélérer le démarrage avec une archive de classes (AppCDS)",
+            "jobs": "Tâches",
+            "no_jobs": "Aucune tâche",
+            "cancel": "Annuler",
+            "job_queued": "En attente",
+            "job_running": "En cours",
+            "job_done": "Terminé",
+            "job_failed": "Échec",
+            "job_cancelled": "Annulé",
+            "job_launch": "Lancement",
+            "job_install_mrpack": "Installation du modpack",
+            "job_import_mrpack": "Import du modpack",
+            "job_install_item": "Installation de contenu",
+            "job_update_mods": "Mises à jour des mods",
+            "job_verify": "Vérification",
+            "job_detached": "En arrière-plan"
         }
     },
     de: {
@@ -500,7 +587,36 @@ const mostUsedResources = {
             "importing_mrpack": "Importiere Modpack...",
             "mrpack_imported": "Modpack erfolgreich importiert!",
             "info": "Info",
-            "confirmation": "Bestätigung"
+            "confirmation": "Bestätigung",
+            "verify_files": "Prüfen",
+            "verifying_files": "Dateien werden geprüft...",
+            "verify_repaired": "{{count}} beschädigte Dateien entfernt. Sie werden beim nächsten Start erneut heruntergeladen.",
+            "verify_ok_reinstall": "Alle Dateien sind intakt. Version und Loader beim nächsten Start trotzdem neu installieren?",
+            "loader_build": "Loader-Build",
+            "loader_build_auto": "Neueste empfohlene",
+            "duplicate_mod": "Doppelte ID",
+            "check_updates": "Nach Updates suchen",
+            "checking_updates": "Suche nach Updates...",
+            "mods_up_to_date": "Alle Mods sind aktuell.",
+            "mod_updates_available": "{{count}} Updates verfügbar. Alle aktualisieren?",
+            "missing_dependencies": "Keine kompatible Version für benötigte Abhängigkeiten gefunden: {{names}}",
+            "jvm_profile": "JVM-Profil:",
+            "appcds": "Start mit Klassendaten-Archiv beschleunigen (AppCDS)",
+            "jobs": "Aufgaben",
+            "no_jobs": "Keine Aufgaben",
+            "cancel": "Abbrechen",
+            "job_queued": "Wartend",
+            "job_running": "Läuft",
+            "job_done": "Fertig",
+            "job_failed": "Fehlgeschlagen",
+            "job_cancelled": "Abgebrochen",
+            "job_launch": "Start",
+            "job_install_mrpack": "Modpack-Installation",
+            "job_import_mrpack": "Modpack-Import",
+            "job_install_item": "Inhaltsinstallation",
+            "job_update_mods": "Mod-Updates",
+            "job_verify": "Überprüfung",
+            "job_detached": "Im Hintergrund"
         }
     }
 };
\ No newline at end of file
@@ -3,17 +3,23 @@ let allVersions = [];
 let allAccounts = [];
 
 window.addEventListener('pywebviewready', async function() {
-    i18n.init(); // Initialize i18n with all loaded language resources
+    i18n.init(); // Initialize i18n with the bundled language resources
 
     const data = await pywebview.api.get_init_data();
+    // Локаль подгружается до первой отрисовки, иначе списки успеют построиться на языке по умолчанию
+    await i18n.changeLanguage(data.config.language || 'en');
     allAccounts = data.accounts;
-    renderInstances(data.instances);
+    renderInstances(data.instances, data.instances_total);
     renderAccounts(data.accounts, data.current_account);
+    updateJobs(data.jobs || []);
     
     // Load and apply settings
     document.getElementById('settingsJavaPath').value = data.config.java_path;
     document.getElementById('settingsRam').value = data.config.ram;
-    i18n.changeLanguage(data.config.language || 'en'); // Set language from config or default to 'en'
+    document.getElementById('settingsJvmProfile').value = data.config.jvm_profile || 'default';
+    document.getElementById('settingsAppCds').checked = !!data.config.appcds;
+    // Первая отрисовка с данными: бэкенд печатает разбивку времени запуска
+    requestAnimationFrame(() => pywebview.api.report_startup(performance.now()));
     
     allVersions = await pywebview.api.get_mc_versions();
     renderModpackVersionFilter();
@@ -32,12 +38,55 @@ window.addEventListener('pywebviewready', async function() {
     if(msTab) msTab.classList.add('hidden');
 });
 
-function renderInstances(list) {
+const INSTANCE_PAGE_SIZE = 100;
+let instancesTotal = 0;
+let instancesLoaded = 0;
+let instancesLoading = false;
+
+function renderInstances(list, total) {
     const container = document.getElementById('instanceList');
     container.innerHTML = '';
+    instancesTotal = total ?? list.length;
+    instancesLoaded = 0;
+    appendInstances(list);
+    container.onscroll = () => {
+        if (container.scrollTop + container.clientHeight >= container.scrollHeight - 200) loadMoreInstances();
+    };
+}
+
+// Остальные инстансы подгружаются страницами при прокрутке списка
+async function loadMoreInstances() {
+    if (instancesLoading || instancesLoaded >= instancesTotal) return;
+    instancesLoading = true;
+    try {
+        const page = await pywebview.api.get_instances_page(instancesLoaded, INSTANCE_PAGE_SIZE);
+        instancesTotal = page.total;
+        appendInstances(page.items);
+    } finally {
+        instancesLoading = false;
+    }
+}
+
+function instanceDetails(inst) {
+    const parts = [`${inst.loader} ${inst.version}`];
+    if (inst.mods) parts.push(`${inst.mods} mods`);
+    return parts.join(' • ');
+}
+
+function instanceTooltip(inst) {
+    const parts = [];
+    if (inst.size != null) parts.push(`${(inst.size / 1048576).toFixed(1)} MB`);
+    if (inst.last_played) parts.push(new Date(inst.last_played * 1000).toLocaleString());
+    return parts.join(' • ');
+}
+
+function appendInstances(list) {
+    const container = document.getElementById('instanceList');
+    instancesLoaded += list.length;
     list.forEach(inst => {
         const btn = document.createElement('button');
         btn.className = 'w-full text-left px-3 py-2 rounded-md text-sm font-medium transition-all duration-200 flex items-center gap-3 group text-zinc-400 hover:text-zinc-100 hover:bg-zinc-800/50';
+        btn.title = instanceTooltip(inst);
         
         let iconClass = 'fa-cube';
         if(inst.loader === 'Fabric') iconClass = 'fa-scroll';
@@ -49,7 +98,7 @@ function renderInstances(list) {
             </div>
             <div class="truncate flex-1">
                 <div class="truncate text-zinc-300 group-hover:text-white">${inst.name}</div>
-                <div class="text-[10px] text-zinc-600 group-hover:text-zinc-500 font-normal">${inst.loader} ${inst.version}</div>
+                <div class="text-[10px] text-zinc-600 group-hover:text-zinc-500 font-normal">${instanceDetails(inst)}</div>
             </div>
         `;
         
@@ -126,7 +175,7 @@ function selectInstance(inst, btnElement) {
     
     // Set active button
     if(btnElement) {
-        btnElement.className = 'w-full text-left px-3 py-2 rounded-md text-sm font-medium transition-all duration-200 flex items-center gap-3 group bg-zinc-800 text-white shadow-sm ring-1 ring-zinc-700/50';
+        btnElement.className = 'w-full text-left px-3 py-2 rounded-md text-sm font-medium transition-all duration-200 flex items-center gap-3 group bg-zinc-800 text-white shadow-xs ring-1 ring-zinc-700/50';
         const iconDiv = btnElement.querySelector('div:first-child');
         iconDiv.className = 'w-8 h-8 rounded bg-emerald-950/30 flex items-center justify-center shrink-0 border border-emerald-500/30';
         iconDiv.querySelector('i').classList.remove('text-zinc-500', 'group-hover:text-zinc-300');
@@ -136,7 +185,7 @@ function selectInstance(inst, btnElement) {
 
 function launchGame() {
     document.getElementById('playBtn').disabled = true;
-    document.getElementById('console').innerHTML = '';
+    consoleClear();
     pywebview.api.launch_game_thread();
 }
 
@@ -156,12 +205,83 @@ function updateProgress(percent) {
     document.getElementById('progressPercent').innerText = percent + '%';
 }
 
-function consoleLog(text) {
+// --- Console: bounded ring buffer with virtual scrolling ---
+const CONSOLE_MAX_LINES = 10000;
+const CONSOLE_LINE_HEIGHT = 18;
+const CONSOLE_OVERSCAN = 20;
+let consoleLines = [];
+let consoleRenderQueued = false;
+let consoleStickToBottom = true;
+
+function ensureConsoleView() {
     const c = document.getElementById('console');
-    const line = document.createElement('div');
-    line.textContent = text;
-    c.appendChild(line);
-    c.scrollTop = c.scrollHeight;
+    let spacer = document.getElementById('consoleSpacer');
+    if (!spacer) {
+        c.innerHTML = '';
+        spacer = document.createElement('div');
+        spacer.id = 'consoleSpacer';
+        spacer.style.position = 'relative';
+        const rows = document.createElement('div');
+        rows.id = 'consoleRows';
+        rows.style.position = 'absolute';
+        rows.style.left = '0';
+        rows.style.right = '0';
+        spacer.appendChild(rows);
+        c.appendChild(spacer);
+        c.onscroll = () => {
+            consoleStickToBottom = c.scrollTop + c.clientHeight >= c.scrollHeight - CONSOLE_LINE_HEIGHT * 2;
+            scheduleConsoleRender();
+        };
+    }
+    return c;
+}
+
+function scheduleConsoleRender() {
+    if (consoleRenderQueued) return;
+    consoleRenderQueued = true;
+    requestAnimationFrame(renderConsole);
+}
+
+function renderConsole() {
+    consoleRenderQueued = false;
+    const c = ensureConsoleView();
+    const spacer = document.getElementById('consoleSpacer');
+    const rows = document.getElementById('consoleRows');
+    spacer.style.height = (consoleLines.length * CONSOLE_LINE_HEIGHT) + 'px';
+    if (consoleStickToBottom) c.scrollTop = c.scrollHeight;
+
+    const first = Math.max(0, Math.floor(c.scrollTop / CONSOLE_LINE_HEIGHT) - CONSOLE_OVERSCAN);
+    const visible = Math.ceil(c.clientHeight / CONSOLE_LINE_HEIGHT) + CONSOLE_OVERSCAN * 2;
+    const last = Math.min(consoleLines.length, first + visible);
+
+    rows.style.top = (first * CONSOLE_LINE_HEIGHT) + 'px';
+    const fragment = document.createDocumentFragment();
+    for (let i = first; i < last; i++) {
+        const line = document.createElement('div');
+        line.style.height = CONSOLE_LINE_HEIGHT + 'px';
+        line.style.lineHeight = CONSOLE_LINE_HEIGHT + 'px';
+        line.textContent = consoleLines[i];
+        fragment.appendChild(line);
+    }
+    rows.replaceChildren(fragment);
+}
+
+function consoleLogBatch(lines) {
+    consoleLines.push(...lines);
+    if (consoleLines.length > CONSOLE_MAX_LINES) {
+        consoleLines.splice(0, consoleLines.length - CONSOLE_MAX_LINES);
+    }
+    scheduleConsoleRender();
+}
+
+function consoleLog(text) {
+    consoleLogBatch([text]);
+}
+
+function consoleClear() {
+    consoleLines = [];
+    consoleStickToBottom = true;
+    scheduleConsoleRender();
 }
 
 function gameClosed() {
@@ -170,6 +290,47 @@ function gameClosed() {
     updateStatus("Ready");
 }
 
+// --- Job Queue ---
+function updateJobs(jobs) {
+    const list = document.getElementById('jobsList');
+    const badge = document.getElementById('jobsBadge');
+    if (!list) return;
+    const active = jobs.filter(j => j.state === 'queued' || j.state === 'running' || j.state === 'detached');
+    badge.innerText = active.length;
+    badge.classList.toggle('hidden', active.length === 0);
+
+    if (!jobs.length) {
+        list.innerHTML = `<div class="px-2 py-3 text-xs text-zinc-500 text-center">${i18n.t('no_jobs')}</div>`;
+        return;
+    }
+    const fragment = document.createDocumentFragment();
+    jobs.forEach(job => {
+        const row = document.createElement('div');
+        row.className = 'px-2 py-2 rounded-lg hover:bg-zinc-800/50 flex items-center gap-2';
+        const info = document.createElement('div');
+        info.className = 'flex-1 overflow-hidden';
+        const title = document.createElement('div');
+        title.className = 'text-xs font-medium text-zinc-200 truncate';
+        title.textContent = `${i18n.t('job_' + job.kind)}${job.instance ? ' • ' + job.instance : ''}`;
+        const detail = document.createElement('div');
+        detail.className = 'text-[10px] text-zinc-500 truncate';
+        const progress = job.state === 'running' && job.progress !== null ? ` ${job.progress}%` : '';
+        detail.textContent = `${i18n.t('job_' + job.state)}${progress}${job.error ? ' • ' + job.error : (job.status ? ' • ' + job.status : '')}`;
+        info.append(title, detail);
+        row.appendChild(info);
+        if (job.state === 'queued' || job.state === 'running' || job.state === 'detached') {
+            const cancel = document.createElement('button');
+            cancel.className = 'w-6 h-6 rounded-md text-zinc-500 hover:text-red-400 hover:bg-red-900/20 flex items-center justify-center shrink-0';
+            cancel.title = i18n.t('cancel');
+            cancel.innerHTML = '<i class="fa-solid fa-xmark text-xs"></i>';
+            cancel.onclick = (e) => { e.stopPropagation(); pywebview.api.cancel_job(job.id); };
+            row.appendChild(cancel);
+        }
+        fragment.appendChild(row);
+    });
+    list.replaceChildren(fragment);
+}
+
 function hideWindow() { /* Optional: implement minimize logic if needed */ }
 function showWindow() { /* Optional */ }
 
@@ -210,6 +371,36 @@ function selectVersion(v) {
     document.getElementById('versionBtnText').innerText = v;
     document.getElementById('versionBtnText').classList.remove('text-zinc-500');
     document.getElementById('versionBtnText').classList.add('text-white');
+    refreshLoaderBuilds();
+}
+
+let loaderBuildsRequest = 0;
+
+async function refreshLoaderBuilds() {
+    const loader = document.getElementById('newInstLoader').value;
+    const version = document.getElementById('newInstVersion').value;
+    const row = document.getElementById('loaderBuildRow');
+    const select = document.getElementById('newInstLoaderVersion');
+    select.innerHTML = '';
+    if (loader === 'Vanilla' || !version) {
+        row.classList.add('hidden');
+        return;
+    }
+    row.classList.remove('hidden');
+    const request = ++loaderBuildsRequest;
+    const builds = await pywebview.api.get_loader_versions(loader, version);
+    if (request !== loaderBuildsRequest) return;
+
+    const auto = document.createElement('option');
+    auto.value = '';
+    auto.innerText = i18n.t('loader_build_auto');
+    select.appendChild(auto);
+    builds.forEach(b => {
+        const opt = document.createElement('option');
+        opt.value = b.version;
+        opt.innerText = b.version + (b.recommended ? ' ★' : '') + (b.stable ? '' : ' (beta)');
+        select.appendChild(opt);
+    });
 }
 
 function filterVersions(query) {
@@ -263,6 +454,7 @@ function renderLoaders() {
             document.getElementById('newInstLoader').value = l;
             document.getElementById('loaderBtnText').innerText = l;
             toggleDropdown('loaderDropdownMenu');
+            refreshLoaderBuilds();
         };
         container.appendChild(btn);
     });
@@ -286,10 +478,11 @@ async function createInstance() {
     const name = document.getElementById('newInstName').value;
     const ver = document.getElementById('newInstVersion').value;
     const loader = document.getElementById('newInstLoader').value;
+    const loaderVersion = loader === 'Vanilla' ? null : (document.getElementById('newInstLoaderVersion').value || null);
     if(name && ver) {
-        await pywebview.api.create_instance(name, ver, loader);
+        await pywebview.api.create_instance(name, ver, loader, loaderVersion);
         const data = await pywebview.api.get_init_data();
-        renderInstances(data.instances);
+        renderInstances(data.instances, data.instances_total);
         closeAllModals();
     }
 }
@@ -331,6 +524,8 @@ function hideImportForm() {
 }
 
 let modpackSearchOffset = 0;
+// Номер последнего запроса поиска: ответы на устаревшие запросы игнорируются
+let modpackSearchSeq = 0;
 
 async function searchModpacks(loadMore = false) {
     const query = document.getElementById('modpackSearchInput').value;
@@ -349,7 +544,9 @@ async function searchModpacks(loadMore = false) {
     }
     
     try {
-        const results = await pywebview.api.search_modrinth_modpacks(query, version, modpackSearchOffset);
+        const seq = ++modpackSearchSeq;
+        const results = await pywebview.api.search_modrinth_modpacks(query, version, modpackSearchOffset, seq);
+        if (results === null || seq !== modpackSearchSeq) return;
         if (!loadMore) container.innerHTML = '';
         else {
             const btn = document.getElementById('loadMoreModpacksBtn');
@@ -449,12 +646,12 @@ async function installModpackVersion(projectId, versionId, versionName, packTitl
     
     try {
         const success = await pywebview.api.install_mrpack(instName, projectId, versionId);
-        if(success) {
+        if(success === true) {
             const data = await pywebview.api.get_init_data();
-            renderInstances(data.instances);
+            renderInstances(data.instances, data.instances_total);
             await showAlert(i18n.t('modpack_installed'));
         } else {
-            await showAlert(i18n.t('modpack_install_failed'));
+            await showAlert(i18n.t('modpack_install_failed') + (success && success.error ? `: ${success.error}` : ''));
         }
     } catch(e) {
         await showAlert("Error: " + e);
@@ -493,12 +690,12 @@ async function importMrpack() {
     
     try {
         const success = await pywebview.api.import_mrpack_local(name, path);
-        if(success) {
+        if(success === true) {
             const data = await pywebview.api.get_init_data();
-            renderInstances(data.instances);
+            renderInstances(data.instances, data.instances_total);
             await showAlert(i18n.t('mrpack_imported'));
         } else {
-            await showAlert("Failed to import modpack.");
+            await showAlert("Failed to import modpack." + (success && success.error ? ` ${success.error}` : ''));
         }
     } catch(e) {
         await showAlert("Error: " + e);
@@ -572,8 +769,10 @@ function renderAppVersion() {
 async function saveSettings() {
     const java = document.getElementById('settingsJavaPath').value;
     const ram = document.getElementById('settingsRam').value;
+    const jvmProfile = document.getElementById('settingsJvmProfile').value;
+    const appcds = document.getElementById('settingsAppCds').checked;
     const lang = i18n.lang;
-    await pywebview.api.save_settings({"java_path": java, "ram": ram, "language": lang});
+    await pywebview.api.save_settings({"java_path": java, "ram": ram, "language": lang, "jvm_profile": jvmProfile, "appcds": appcds});
     closeAllModals();
 }
 
@@ -589,15 +788,49 @@ async function deleteInstance() {
     if(await showConfirm("Are you sure?")) {
         if(await pywebview.api.delete_instance()) {
             const data = await pywebview.api.get_init_data();
-            renderInstances(data.instances);
+            renderInstances(data.instances, data.instances_total);
             document.getElementById('homeScreen').classList.remove('hidden');
             document.getElementById('instanceScreen').classList.add('hidden');
         }
     }
 }
 
+async function verifyInstance() {
+    if (!currentInstance) return;
+    updateStatus(i18n.t('verifying_files'));
+    try {
+        const result = await pywebview.api.verify_instance();
+        if (!result) return;
+        if (!result.success) await showAlert("Error: " + result.error);
+        else if (result.broken.length === 0) {
+            if (await showConfirm(i18n.t('verify_ok_reinstall'))) await pywebview.api.repair_instance();
+        }
+        else await showAlert(i18n.t('verify_repaired', {count: result.broken.length}));
+    } finally {
+        updateStatus("Ready");
+    }
+}
+
+async function checkModUpdates() {
+    if (!currentInstance) return;
+    updateStatus(i18n.t('checking_updates'));
+    try {
+        const result = await pywebview.api.check_mod_updates(currentInstance);
+        if (!result.success) return await showAlert("Error: " + result.error);
+        if (result.updates.length === 0) return await showAlert(i18n.t('mods_up_to_date'));
+        const lines = result.updates.map(u => `${u.name || u.file_name}: ${u.current_version} → ${u.new_version}`);
+        if (!await showConfirm(i18n.t('mod_updates_available', {count: result.updates.length}) + "\n\n" + lines.join("\n"))) return;
+        const applied = await pywebview.api.update_all_mods(currentInstance);
+        if (!applied.success) await showAlert("Error: " + applied.error);
+        await refreshInstalledItems('mod');
+    } finally {
+        updateStatus("Ready");
+    }
+}
+
 // --- MOD/ITEM INSTALLATION SCRIPT ---
 let modSearchOffset = 0;
+let modSearchSeq = 0;
 let modToDelete = null;
 let currentItemBrowserType = 'mod';
 
@@ -645,9 +878,15 @@ function switchInstanceTab(tabId, button, type) {
     
     if (type !== 'console') {
         refreshInstalledItems(type);
+    } else if (consoleLines.length > 0) {
+        scheduleConsoleRender();
     }
 }
 
+function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+}
+
 // This would be called when the mods tab is opened or a mod is installed/deleted
 async function refreshInstalledItems(type) {
     if (type === 'shaderpack') type = 'shader'; // Defensively handle old values
@@ -714,16 +953,22 @@ async function refreshInstalledItems(type) {
             modElement.className = 'group flex items-center justify-between bg-zinc-900/40 hover:bg-zinc-800/80 border border-zinc-800/50 hover:border-zinc-700 transition-all duration-200 p-3 rounded-xl mb-2 last:mb-0';
             
             const displayName = item.name || item.file_name;
-            const subText = item.name ? item.file_name : (type === 'mod' ? 'Mod file' : 'File');
+            const subText = item.name !== item.file_name ? item.file_name : (type === 'mod' ? 'Mod file' : 'File');
+            const version = item.version ? `<span class="text-xs text-zinc-500 ml-2">${escapeHtml(item.version)}</span>` : '';
+            const duplicate = item.duplicate_of ? `<span class="text-[10px] text-amber-400 bg-amber-900/20 border border-amber-800/40 px-1.5 py-0.5 rounded ml-2" title="${escapeHtml(item.duplicate_of.join(', '))}">${i18n.t('duplicate_mod')}</span>` : '';
+            const icon = item.icon
+                ? `<img src="${item.icon}" class="w-10 h-10 rounded-lg object-cover" style="image-rendering: pixelated" alt="">`
+                : `<i class="fa-solid ${iconMap[type]} text-lg"></i>`;
+            modElement.title = item.description || '';
 
             modElement.innerHTML = `
                 <div class="flex items-center gap-4 overflow-hidden flex-1">
-                    <div class="w-10 h-10 rounded-lg bg-zinc-800 flex items-center justify-center shrink-0 text-zinc-500 group-hover:text-emerald-400 transition-colors border border-zinc-700/50">
-                        <i class="fa-solid ${iconMap[type]} text-lg"></i>
+                    <div class="w-10 h-10 rounded-lg bg-zinc-800 flex items-center justify-center shrink-0 text-zinc-500 group-hover:text-emerald-400 transition-colors border border-zinc-700/50 overflow-hidden">
+                        ${icon}
                     </div>
                     <div class="flex flex-col overflow-hidden">
-                        <span class="font-medium text-zinc-200 truncate group-hover:text-white transition-colors text-sm">${displayName}</span>
-                        <span class="text-xs text-zinc-500 truncate font-mono bg-zinc-950/30 px-1.5 py-0.5 rounded w-fit mt-1">${subText}</span>
+                        <span class="font-medium text-zinc-200 truncate group-hover:text-white transition-colors text-sm">${escapeHtml(displayName)}${version}${duplicate}</span>
+                        <span class="text-xs text-zinc-500 truncate font-mono bg-zinc-950/30 px-1.5 py-0.5 rounded w-fit mt-1">${escapeHtml(subText)}</span>
                     </div>
                 </div>
                 <div class="flex items-center gap-2 opacity-0 group-hover:opacity-100 transition-opacity duration-200">
@@ -801,8 +1046,10 @@ async function searchItems(loadMore = false) {
         }
     }
 
+    const seq = ++modSearchSeq;
     try {
-        const results = await pywebview.api.search_modrinth(query, currentInstance, modSearchOffset, currentItemBrowserType);
+        const results = await pywebview.api.search_modrinth(query, currentInstance, modSearchOffset, currentItemBrowserType, seq);
+        if (results === null || seq !== modSearchSeq) return;
 
         if (!loadMore) {
             resultsContainer.innerHTML = ''; // Clear loading message or previous results
@@ -842,7 +1089,7 @@ async function searchItems(loadMore = false) {
         resultsContainer.innerHTML = `<div class="text-center text-red-500 pt-16"><p>Error searching for items: ${e}</p></div>`;
         console.error(e);
     } finally {
-        spinner.style.display = 'none';
+        if (seq === modSearchSeq) spinner.style.display = 'none';
     }
 }
 
@@ -861,6 +1108,7 @@ async function installItem(projectId, button) {
             let itemType = result.type || 'mod';
             if (itemType === 'shaderpack') itemType = 'shader'; // Defensively handle old values from backend
             refreshInstalledItems(itemType); 
+            if (result.missing && result.missing.length) await showAlert(i18n.t('missing_dependencies', {names: result.missing.join(', ')}));
         } else {
             throw new Error(result.error);
         }
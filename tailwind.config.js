@@ -0,0 +1,12 @@
+// Тема для src/tailwind.css (подключается из src/tailwind.input.css через @config); сборка описана в README
+module.exports = {
+    content: ['./src/**/*.{html,js}'],
+    theme: {
+        extend: {
+            fontFamily: { sans: ['Inter', 'sans-serif'] },
+            colors: {
+                zinc: { 850: '#1f1f22', 950: '#0c0c0e' } // Custom deep dark colors
+            }
+        }
+    }
+}
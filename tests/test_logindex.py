@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from backend import logindex, gamelog
+from backend.logindex import LogIndex
+from backend.gamelog import LOG_NAME, ARCHIVE_DIR, rotate_game_log
+
+
+def _write_log(path, message, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[12:00:00] [Render thread/INFO]: Loading\n")
+        f.write(f"[12:00:01] [Render thread/ERROR]: {message}\n")
+    os.utime(path, (mtime, mtime))
+
+
+def _setup(tmp_path, monkeypatch):
+    logs_dir = tmp_path / "instances" / "pack" / "logs"
+    logs_dir.mkdir(parents=True)
+    parsed = []
+    original = logindex.index_file
+    def counting(path, *args, **kwargs):
+        parsed.append(os.path.basename(path))
+        return original(path, *args, **kwargs)
+    monkeypatch.setattr(logindex, "index_file", counting)
+    index = LogIndex(str(tmp_path / "instances"), str(tmp_path / "cache"))
+    return index, logs_dir, parsed
+
+
+def _messages(index):
+    return sorted(r["message"] for r in index.search()["results"])
+
+
+def _wait_archive():
+    for thread in threading.enumerate():
+        if thread.name == "log-archive": thread.join(5)
+
+
+def test_rotated_session_is_carried_over(tmp_path, monkeypatch):
+    index, logs_dir, parsed = _setup(tmp_path, monkeypatch)
+    _write_log(logs_dir / LOG_NAME, "first session failed", time.time() - 3600)
+    assert index.update("pack") == 1
+
+    rotate_game_log(str(logs_dir))
+    _wait_archive()
+    _write_log(logs_dir / LOG_NAME, "second session failed", time.time())
+    parsed.clear()
+
+    assert index.update("pack") == 1
+    assert parsed == [LOG_NAME]
+    assert _messages(index) == ["first session failed", "second session failed"]
+
+
+def test_compressed_archive_is_carried_over(tmp_path, monkeypatch):
+    index, logs_dir, parsed = _setup(tmp_path, monkeypatch)
+    mtime = time.time() - 3600
+    _write_log(logs_dir / LOG_NAME, "first session failed", mtime)
+    index.update("pack")
+
+    archive_dir = logs_dir / ARCHIVE_DIR
+    archive_dir.mkdir()
+    stamp = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(os.path.getmtime(logs_dir / LOG_NAME)))
+    rotated = archive_dir / f"game_output-{stamp}.log"
+    os.replace(logs_dir / LOG_NAME, rotated)
+    _write_log(logs_dir / LOG_NAME, "second session failed", time.time())
+    parsed.clear()
+    index.update("pack")
+    assert parsed == [LOG_NAME]
+
+    gamelog._compress_log(str(rotated))
+    parsed.clear()
+    assert index.update("pack") == 0
+    assert parsed == []
+    assert _messages(index) == ["first session failed", "second session failed"]
+
+
+def test_unrelated_archive_is_indexed(tmp_path, monkeypatch):
+    index, logs_dir, parsed = _setup(tmp_path, monkeypatch)
+    _write_log(logs_dir / LOG_NAME, "current session failed", time.time())
+    index.update("pack")
+
+    archive_dir = logs_dir / ARCHIVE_DIR
+    archive_dir.mkdir()
+    _write_log(archive_dir / "game_output-2001-01-01_00-00-00.log", "old session failed", time.time() - 86400)
+    parsed.clear()
+
+    assert index.update("pack") == 1
+    assert parsed == ["game_output-2001-01-01_00-00-00.log"]
+    assert _messages(index) == ["current session failed", "old session failed"]